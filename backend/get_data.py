@@ -16,35 +16,53 @@ Usage:
     python get_data.py --interactive
 """
 
-import os
+import re
 import sys
 import argparse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
+from urllib.parse import urlsplit
 
-# Add src to path for imports
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+import orjson
+
+try:
+    from ciso8601 import parse_datetime
+except ImportError:
+    def parse_datetime(value: str) -> datetime:
+        """Fallback ISO 8601 parser (fromisoformat only accepts 'Z' from Python 3.11)."""
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
 from dotenv import load_dotenv
-from src.scraper import (
-    scrape_blog_or_rss, 
-    scrape_twitter, 
-    scrape_substack_research,
-    check_and_scrape
-)
-from src.db_postgres import (
-    connect_postgres,
-    insert_posts,
-    get_existing_articles,
-    get_articles_for_processing,
-    get_article_count_by_source
-)
+# Scraper and database modules (newspaper, feedparser, psycopg2) are imported
+# inside the methods that use them, so --help and argument errors stay fast.
 from utils.logger import get_logger, log_performance
 
 # Load environment variables
 load_dotenv()
 
+# Sources may be separated by commas and/or newlines (CLI strings, textareas)
+_SOURCE_SPLIT = re.compile(r'[,\n\r]+')
+
+
+def split_sources(sources_string: str) -> List[str]:
+    """Split a comma/newline separated sources string into stripped, non-empty entries."""
+    return [s.strip() for s in _SOURCE_SPLIT.split(sources_string) if s.strip()]
+
+
+def _parse_pub(published: Any, default: datetime) -> datetime:
+    """Parse an article's 'published' value (ISO string or datetime), or return default."""
+    if not published:
+        return default
+    if isinstance(published, str):
+        return parse_datetime(published)
+    return published
+
+
 class SourceType:
     """Source type constants"""
     TWITTER = "twitter"
@@ -53,19 +71,69 @@ class SourceType:
     UNKNOWN = "unknown"
 
 
+# dataclass(slots=True) is only available from Python 3.10
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
+class Stats:
+    """Counters for a data collection run"""
+    total_sources: int = 0
+    sources_processed: int = 0
+    total_articles: int = 0
+    new_articles: int = 0
+    cached_articles: int = 0
+    unsaved_articles: int = 0  # new articles whose bulk load failed (counted in new_articles too)
+    errors: int = 0
+    
+    def merge(self, other: 'Stats'):
+        """Add another Stats' counters into this one."""
+        self.total_sources += other.total_sources
+        self.sources_processed += other.sources_processed
+        self.total_articles += other.total_articles
+        self.new_articles += other.new_articles
+        self.cached_articles += other.cached_articles
+        self.unsaved_articles += other.unsaved_articles
+        self.errors += other.errors
+
+
 class DataOrchestrator:
     """Main orchestrator for data collection workflow"""
     
+    # Upper bound on concurrent source workers (scraping is network-bound)
+    MAX_WORKERS = 16
+    
+    # --output serialization: orjson encodes datetimes natively, so default=str
+    # only fires for unexpected types; non-str dict keys are stringified in C
+    OUTPUT_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+    OUTPUT_BUFFER_SIZE = 1 << 20
+    
+    # Known domains (matched against the host and each parent domain)
+    _DOMAIN_MAP = {
+        'x.com': SourceType.TWITTER,
+        'twitter.com': SourceType.TWITTER,
+        'substack.com': SourceType.SUBSTACK,
+        'nytimes.com': SourceType.RSS,
+        'theguardian.com': SourceType.RSS,
+        'theverge.com': SourceType.RSS,
+        'ycombinator.com': SourceType.RSS,
+    }
+    # Substrings anywhere in the URL that indicate a feed
+    _RSS_TOKENS = ('rss', 'feed', 'atom', '.xml')
+    # Substrings of the host that indicate a news site with feeds
+    _NEWS_HOST_TOKENS = ('bbc',)
+    
     def __init__(self):
         self.logger = get_logger("orchestrator")
-        self.stats = {
-            'total_sources': 0,
-            'sources_processed': 0,
-            'total_articles': 0,
-            'new_articles': 0,
-            'cached_articles': 0,
-            'errors': 0
-        }
+        self._stats_lock = threading.Lock()
+        # Lifetime counters across all runs; each process_all_sources run
+        # counts into its own Stats, so one instance can serve concurrent runs
+        self.stats = Stats()
+    
+    def _merge_stats(self, stats: Stats):
+        """Fold a worker's counters into self.stats; safe to call from any thread."""
+        with self._stats_lock:
+            self.stats.merge(stats)
     
     def detect_source_type(self, source_url: str) -> str:
         """
@@ -79,19 +147,22 @@ class DataOrchestrator:
         """
         source_url = source_url.strip().lower()
         
-        if 'x.com' in source_url or 'twitter.com' in source_url:
-            return SourceType.TWITTER
-        elif 'substack.com' in source_url:
-            return SourceType.SUBSTACK
-        elif any(rss_indicator in source_url for rss_indicator in 
-                 ['rss', 'feed', 'atom', '.xml']):
+        # Parse the host once; accept bare "domain/path" input as well as full URLs
+        host = urlsplit(source_url if '//' in source_url else '//' + source_url).hostname or ''
+        
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            source_type = self._DOMAIN_MAP.get('.'.join(labels[i:]))
+            if source_type:
+                return source_type
+        
+        if any(token in source_url for token in self._RSS_TOKENS):
             return SourceType.RSS
-        elif any(news_site in source_url for news_site in 
-                 ['nytimes.com', 'theguardian.com', 'bbc', 'theverge.com', 'ycombinator.com']):
+        if any(token in host for token in self._NEWS_HOST_TOKENS):
             return SourceType.RSS
-        else:
-            self.logger.warning(f"Could not determine source type for: {source_url}")
-            return SourceType.UNKNOWN
+        
+        self.logger.warning(f"Could not determine source type for: {source_url}")
+        return SourceType.UNKNOWN
     
     def parse_sources_from_file(self, file_path: str) -> List[str]:
         """
@@ -106,16 +177,12 @@ class DataOrchestrator:
         self.logger.info(f"Reading sources from file: {file_path}")
         
         try:
-            with open(file_path, 'r') as f:
-                sources = []
-                for line in f:
-                    line = line.strip()
-                    # Skip empty lines and comments
-                    if line and not line.startswith('#'):
-                        sources.append(line)
-                
-                self.logger.info(f"Found {len(sources)} sources in file")
-                return sources
+            lines = Path(file_path).read_text(encoding='utf-8').splitlines()
+            # Skip empty lines and comments
+            sources = [line for line in map(str.strip, lines) if line and not line.startswith('#')]
+            
+            self.logger.info(f"Found {len(sources)} sources in file")
+            return sources
                 
         except FileNotFoundError:
             self.logger.error(f"Sources file not found: {file_path}")
@@ -126,30 +193,47 @@ class DataOrchestrator:
     
     def parse_sources_from_string(self, sources_string: str) -> List[str]:
         """
-        Parse sources from comma-separated string.
+        Parse sources from a comma- or newline-separated string.
         
         Args:
-            sources_string: Comma-separated URLs/handles
+            sources_string: Comma/newline-separated URLs/handles
             
         Returns:
             List of source URLs/handles
         """
-        sources = [s.strip() for s in sources_string.split(',') if s.strip()]
+        sources = split_sources(sources_string)
         self.logger.info(f"Parsed {len(sources)} sources from input string")
         return sources
     
     @log_performance
-    def process_source(self, source_url: str, days_back: int = 7) -> Dict[str, Any]:
+    def process_source(self, source_url: str, days_back: int = 7,
+                       prefetched: Optional[Tuple[List[Dict], bool]] = None,
+                       persist: bool = True,
+                       stats: Optional[Stats] = None) -> Dict[str, Any]:
         """
         Process a single source: detect type, check cache, scrape if needed.
         
         Args:
             source_url: Source URL or handle
             days_back: How many days back to look for articles
+            prefetched: Optional (existing_articles, needs_scraping) pair from
+                check_and_scrape_many; skips the per-source DB lookup
+            persist: If False, new articles are not inserted but returned
+                under 'pending' for the caller to bulk-load, and the feeds'
+                HTTP validators under 'feed_validators', to store after it
+            stats: Optional caller-owned Stats to count into; by default the
+                counts are merged into self.stats when the source finishes
             
         Returns:
             Dictionary with results and metadata
         """
+        from src.scraper import (
+            scrape_blog_or_rss,
+            scrape_twitter,
+            scrape_substack_research,
+            check_and_scrape
+        )
+        
         self.logger.info(f"Processing source: {source_url}")
         
         source_type = self.detect_source_type(source_url)
@@ -166,17 +250,24 @@ class DataOrchestrator:
         
         start_time = datetime.now()
         
+        merge_stats = stats is None
+        if merge_stats:
+            stats = Stats()
+        
         try:
             # Check existing data in database first
-            existing_articles, needs_scraping = check_and_scrape(
-                source_url, source_type, days_back
-            )
+            if prefetched is not None:
+                existing_articles, needs_scraping = prefetched
+            else:
+                existing_articles, needs_scraping = check_and_scrape(
+                    source_url, source_type, days_back
+                )
             
             if not needs_scraping and existing_articles:
                 # Use cached data
                 result['articles'] = existing_articles
                 result['cached_count'] = len(existing_articles)
-                self.stats['cached_articles'] += len(existing_articles)
+                stats.cached_articles += len(existing_articles)
                 self.logger.info(f"Using {len(existing_articles)} cached articles for {source_url}")
             
             else:
@@ -184,19 +275,28 @@ class DataOrchestrator:
                 self.logger.info(f"Scraping fresh data for {source_url}")
                 
                 if source_type == SourceType.TWITTER:
-                    scrape_result = scrape_twitter(source_url, days_back)
+                    scrape_result = scrape_twitter(source_url, days_back, persist=persist)
                     
                 elif source_type == SourceType.SUBSTACK:
-                    scrape_result = scrape_substack_research(source_url, days_back)
+                    scrape_result = scrape_substack_research(
+                        [source_url], days_back, persist=persist,
+                        prefetched={source_url.strip(): (existing_articles, needs_scraping)}
+                    )
                     
                 elif source_type == SourceType.RSS:
-                    scrape_result = scrape_blog_or_rss(source_url, days_back)
+                    scrape_result = scrape_blog_or_rss(
+                        source_url, days_back, persist=persist,
+                        prefetched=(existing_articles, needs_scraping)
+                    )
                     
                 else:
                     raise ValueError(f"Unsupported source type: {source_type}")
                 
                 # Process scraping results
                 new_articles = scrape_result.get('results', [])
+                if not persist:
+                    result['pending'] = scrape_result.get('pending', [])
+                    result['feed_validators'] = scrape_result.get('feed_validators', [])
                 
                 if new_articles:
             
@@ -204,25 +304,41 @@ class DataOrchestrator:
                     
                     result['articles'] = new_articles
                     result['new_count'] = inserted_count
-                    self.stats['new_articles'] += inserted_count
+                    stats.new_articles += inserted_count
                     
                     self.logger.info(f"Processed {len(new_articles)} total articles from {source_url} ({inserted_count} new, {len(new_articles) - inserted_count} cached)")
                 else:
                     self.logger.info(f"No articles found for {source_url}")
             
-            self.stats['sources_processed'] += 1
+            stats.sources_processed += 1
             
         except Exception as e:
             error_msg = f"Error processing {source_url}: {str(e)}"
             self.logger.error(error_msg)
             result['error'] = error_msg
-            self.stats['errors'] += 1
+            stats.errors += 1
         
         result['processing_time'] = (datetime.now() - start_time).total_seconds()
-        self.stats['total_articles'] += len(result['articles'])
+        stats.total_articles += len(result['articles'])
+        
+        if merge_stats:
+            self._merge_stats(stats)
         
         return result
     
+    async def process_source_async(self, source_url: str, days_back: int = 7) -> Dict[str, Any]:
+        """
+        Awaitable process_source for async callers (runs in a worker thread).
+        
+        Args:
+            source_url: Source URL or handle
+            days_back: How many days back to look for articles
+            
+        Returns:
+            Dictionary with results and metadata
+        """
+        return await asyncio.to_thread(self.process_source, source_url, days_back)
+    
     def format_articles_for_db(self, articles: List[Dict], source_type: str, source_url: str) -> List[Dict[str, Any]]:
         """
         Convert scraped articles to database format.
@@ -235,78 +351,156 @@ class DataOrchestrator:
         Returns:
             List of articles formatted for database insertion
         """
-        db_articles = []
+        # One timestamp for every article without a published date
+        now = datetime.utcnow()
         
-        for article in articles:
-            published_date = None
-            if article.get('published'):
-                if isinstance(article['published'], str):
-                    published_date = datetime.fromisoformat(article['published'].replace('Z', '+00:00'))
-                else:
-                    published_date = article['published']
-            
-            db_article = {
+        db_articles = [
+            {
                 'source_type': source_type,
-                'source_url': source_url,  
+                'source_url': source_url,
                 'title': article.get('title'),
                 'content': article.get('content', ''),
                 'link': article.get('link'),
-                'published_date': published_date or datetime.utcnow()
+                'published_date': _parse_pub(article.get('published'), now)
             }
-            
-            db_articles.append(db_article)
+            for article in articles
+        ]
         
         return db_articles
     
     @log_performance
-    def process_all_sources(self, sources: List[str], days_back: int = 7) -> Dict[str, Any]:
+    def process_all_sources(self, sources: List[str], days_back: int = 7,
+                            output_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Process all sources and return consolidated results.
         
+        When ``output_path`` is given, each source result is streamed to that
+        file as soon as the source finishes, and the in-memory results keep
+        only per-source counts (``articles`` is emptied and ``article_count``
+        is set), so peak memory stays at roughly one source's articles.
+        
         Args:
             sources: List of source URLs/handles
             days_back: How many days back to look for articles
+            output_path: Optional JSON file to stream results into
             
         Returns:
             Dictionary with all results and statistics
         """
+        from src.scraper import check_and_scrape_many
+        from src.db_postgres import bulk_copy_posts, store_feed_validators
+        
         self.logger.info(f"Starting processing of {len(sources)} sources")
         
-        self.stats['total_sources'] = len(sources)
-        results = []
+        run_stats = Stats(total_sources=len(sources))
+        results = [None] * len(sources)
         
-        for i, source in enumerate(sources, 1):
-            self.logger.info(f"Processing source {i}/{len(sources)}: {source}")
+        out = open(output_path, 'wb', buffering=self.OUTPUT_BUFFER_SIZE) if output_path else None
+        try:
+            if out:
+                out.write(b'{"success":true,"sources":[')
             
-            source_result = self.process_source(source, days_back)
-            results.append(source_result)
+            # Look up cached articles for every source in one DB round-trip;
+            # fall back to per-source checks if the batch lookup fails.
+            try:
+                prefetched = check_and_scrape_many([s.strip() for s in sources], days_back)
+            except Exception as e:
+                self.logger.warning(f"Batch cache lookup failed, checking sources individually: {str(e)}")
+                prefetched = {}
             
-            # Log progress
-            if i % 5 == 0 or i == len(sources):
-                self.logger.info(f"Progress: {i}/{len(sources)} sources processed")
-        
-        # Generate final statistics
-        final_result = {
-            'success': True,
-            'sources': results,
-            'statistics': self.stats,
-            'summary': {
-                'total_sources': self.stats['total_sources'],
-                'successful_sources': self.stats['sources_processed'],
-                'failed_sources': self.stats['errors'],
-                'total_articles': self.stats['total_articles'],
-                'new_articles': self.stats['new_articles'],
-                'cached_articles': self.stats['cached_articles']
-            },
-            'timestamp': datetime.utcnow().isoformat()
-        }
+            # New articles from every source, inserted with one COPY at the end
+            pending = []
+            # Validators of the feeds those articles came from, stored after the COPY
+            feed_validators = []
+            
+            # Sources are independent and I/O-bound, so fan them out to a
+            # thread pool and handle each result as soon as it completes.
+            # Results are kept in input order; the streamed file is in
+            # completion order.
+            # Each task counts into its own Stats, merged here as it completes
+            task_stats = [Stats() for _ in sources]
+            max_workers = max(1, min(self.MAX_WORKERS, len(sources)))
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        self.process_source, source, days_back,
+                        prefetched.get(source.strip()), persist=False,
+                        stats=task_stats[idx]
+                    ): idx
+                    for idx, source in enumerate(sources)
+                }
+                
+                for i, future in enumerate(as_completed(futures), 1):
+                    idx = futures[future]
+                    source_result = future.result()
+                    run_stats.merge(task_stats[idx])
+                    pending.extend(source_result.pop('pending', ()))
+                    feed_validators.extend(source_result.pop('feed_validators', ()))
+                    
+                    if out:
+                        if i > 1:
+                            out.write(b',')
+                        out.write(orjson.dumps(source_result, default=str, option=self.OUTPUT_JSON_OPTIONS))
+                        source_result['article_count'] = len(source_result['articles'])
+                        source_result['articles'] = []
+                    
+                    results[idx] = source_result
+                    
+                    # Log progress
+                    if i % 5 == 0 or i == len(sources):
+                        self.logger.info(f"Progress: {i}/{len(sources)} sources processed")
+            
+            saved = True
+            if pending:
+                try:
+                    bulk_copy_posts(pending)
+                except Exception as e:
+                    # Every source succeeded; only the load failed
+                    self.logger.error(f"Failed to save {len(pending)} new articles: {str(e)}")
+                    run_stats.unsaved_articles += len(pending)
+                    saved = False
+            
+            # Only once the articles are stored may their feeds answer 304 next run
+            if saved:
+                for validators in feed_validators:
+                    store_feed_validators(*validators)
+            
+            # Generate final statistics
+            final_result = {
+                'success': True,
+                'sources': results,
+                'statistics': asdict(run_stats),
+                'summary': {
+                    'total_sources': run_stats.total_sources,
+                    'successful_sources': run_stats.sources_processed,
+                    'failed_sources': run_stats.errors,
+                    'total_articles': run_stats.total_articles,
+                    'new_articles': run_stats.new_articles,
+                    'cached_articles': run_stats.cached_articles,
+                    'unsaved_articles': run_stats.unsaved_articles
+                },
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            
+            if out:
+                # Close the sources array and append the remaining top-level keys
+                tail = {k: v for k, v in final_result.items() if k not in ('success', 'sources')}
+                out.write(b'],' + orjson.dumps(tail, default=str, option=self.OUTPUT_JSON_OPTIONS)[1:])
+        finally:
+            if out:
+                out.close()
+        
+        self._merge_stats(run_stats)
         
         self.logger.info("=== Processing Complete ===")
-        self.logger.info(f"Sources processed: {self.stats['sources_processed']}/{self.stats['total_sources']}")
-        self.logger.info(f"Total articles: {self.stats['total_articles']}")
-        self.logger.info(f"New articles: {self.stats['new_articles']}")
-        self.logger.info(f"Cached articles: {self.stats['cached_articles']}")
-        self.logger.info(f"Errors: {self.stats['errors']}")
+        self.logger.info(f"Sources processed: {run_stats.sources_processed}/{run_stats.total_sources}")
+        self.logger.info(f"Total articles: {run_stats.total_articles}")
+        self.logger.info(f"New articles: {run_stats.new_articles}")
+        self.logger.info(f"Cached articles: {run_stats.cached_articles}")
+        if run_stats.unsaved_articles:
+            self.logger.info(f"Unsaved articles: {run_stats.unsaved_articles}")
+        self.logger.info(f"Errors: {run_stats.errors}")
         
         return final_result
 
@@ -352,6 +546,8 @@ def interactive_mode():
         
         elif choice == '3':
             try:
+                from src.db_postgres import get_article_count_by_source
+                
                 counts = get_article_count_by_source(days_back=30)
                 print("\\nDatabase Statistics (last 30 days):")
                 for source, count in counts.items():
@@ -417,14 +613,10 @@ def main():
     else:
         sources = orchestrator.parse_sources_from_file(args.sources_file)
     
-    # Process all sources
-    result = orchestrator.process_all_sources(sources, args.days_back)
+    # Process all sources, streaming results to --output as they complete
+    result = orchestrator.process_all_sources(sources, args.days_back, output_path=args.output)
     
-    # Output results
     if args.output:
-        import json
-        with open(args.output, 'w') as f:
-            json.dump(result, f, indent=2, default=str)
         print(f"Results saved to: {args.output}")
     
     # Print summary
@@ -439,6 +631,8 @@ def main():
     
     if summary['failed_sources'] > 0:
         print(f"Failed sources: {summary['failed_sources']}")
+    if summary['unsaved_articles'] > 0:
+        print(f"Unsaved new articles: {summary['unsaved_articles']}")
     
     return result
 
@@ -1,41 +1,140 @@
+import asyncio
 import os
-import sys
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Request, Form, Depends
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, validator
 import uvicorn
 
-# Add current directory to path for imports
-sys.path.append(os.path.dirname(__file__))
-
-from get_data import DataOrchestrator
-from src.db_postgres import get_article_count_by_source, get_articles_for_processing
-from src.clustering import cluster_articles
-from src.summarizer import summarize_clusters
+from get_data import DataOrchestrator, split_sources
+from src.db_postgres import get_article_count_by_source_async, get_articles_for_processing_truncated_async
+from src.clustering import asummarize_and_cluster, generate_final_overview
+from src.content_filter import afilter_ai_relevant_articles, quick_ai_keyword_filter
+from src.scraper import get_http_session, close_http_session
+from src.summarizer import asummarize_clusters
 from utils.logger import get_logger
 
+def _memoize_callable_check(check):
+    """lru_cache a FastAPI callable-classification helper, bypassing unhashable callables."""
+    cached = lru_cache(maxsize=1024)(check)
+    
+    def memoized(call):
+        try:
+            return cached(call)
+        except TypeError:  # unhashable callable instance
+            return check(call)
+    
+    return memoized
+
+
+def _cache_fastapi_callable_checks():
+    """
+    Older FastAPI releases re-run inspect.iscoroutinefunction/isgeneratorfunction
+    on every dependency callable for every request (solve_dependencies). Newer
+    releases cache these classifications themselves; on older ones, memoize the
+    module-level helpers that solve_dependencies looks up at call time.
+    """
+    import fastapi.dependencies.models as dependency_models
+    import fastapi.dependencies.utils as dependency_utils
+    
+    if hasattr(dependency_models, "_is_coroutine_callable_cached"):
+        return  # cached upstream
+    
+    for name in ("is_coroutine_callable", "is_gen_callable", "is_async_gen_callable"):
+        check = getattr(dependency_utils, name, None)
+        if check is not None:
+            setattr(dependency_utils, name, _memoize_callable_check(check))
+
+
+_cache_fastapi_callable_checks()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="TrendMind Backend API",
     description="AI-powered trend analysis: Scrape → Cluster → Summarize → Results",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse  # orjson: faster encoding, native datetimes
 )
 
+class FastCORSMiddleware:
+    """
+    Minimal pure-ASGI CORS for an allow-everything policy.
+    
+    Equivalent to CORSMiddleware(allow_origins=["*"], allow_credentials=True,
+    allow_methods=["*"], allow_headers=["*"]) but with no per-request header
+    objects: requests without an Origin pass straight through, preflights are
+    answered inline, and other responses get the origin echoed back (required
+    instead of "*" when credentials are allowed).
+    """
+    
+    ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+    MAX_AGE = b"600"
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        cors_headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+        
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            cors_headers += [
+                (b"access-control-allow-methods", self.ALLOW_METHODS),
+                (b"access-control-max-age", self.MAX_AGE),
+                (b"content-length", b"2"),
+                (b"content-type", b"text/plain; charset=utf-8"),
+            ]
+            if request_headers is not None:
+                cors_headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 200, "headers": cors_headers})
+            await send({"type": "http.response.body", "body": b"OK"})
+            return
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+
 # Add CORS middleware for frontend access
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your frontend domain
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# In production, replace with CORSMiddleware restricted to your frontend domain
+app.add_middleware(FastCORSMiddleware)
+
+# Compress JSON bodies (article lists, cluster summaries); small responses
+# such as /health stay below the threshold and are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 logger = get_logger("main_api")
 
@@ -114,11 +213,47 @@ class AnalyzeResponse(BaseModel):
     processing_time: float
     timestamp: str
 
+class OverviewRequest(BaseModel):
+    """Request model for the final trend overview"""
+    clusters: List[ClusterSummary]
+    top_n: Optional[int] = 5
+
 # Dependency to get orchestrator instance
+@lru_cache(maxsize=1)
 def get_orchestrator():
-    """Dependency to provide DataOrchestrator instance"""
+    """Dependency to provide the shared DataOrchestrator instance (one per process)"""
     return DataOrchestrator()
 
+# Per-source article counts are the same for every client, so they are cached
+# per days_back for a short window. Concurrent misses share one in-flight query.
+STATS_CACHE_TTL = 30  # seconds
+_stats_cache: Dict[int, Tuple[float, Dict[str, int]]] = {}
+_stats_inflight: Dict[int, asyncio.Future] = {}
+
+async def get_article_counts_cached(days_back: int) -> Tuple[Dict[str, int], bool]:
+    """
+    Cached get_article_count_by_source.
+    
+    Returns:
+        (counts, cache_hit)
+    """
+    entry = _stats_cache.get(days_back)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1], True
+    
+    inflight = _stats_inflight.get(days_back)
+    if inflight is not None:
+        return await asyncio.shield(inflight), True
+    
+    future = asyncio.ensure_future(get_article_count_by_source_async(days_back))
+    _stats_inflight[days_back] = future
+    try:
+        counts = await asyncio.shield(future)
+        _stats_cache[days_back] = (time.monotonic() + STATS_CACHE_TTL, counts)
+        return counts, False
+    finally:
+        _stats_inflight.pop(days_back, None)
+
 # Main Analysis Endpoint
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_trends(
@@ -138,105 +273,122 @@ async def analyze_trends(
     
     Returns clustered and summarized trend analysis.
     """
-    import time
     start_time = time.time()
     
     try:
         max_clusters = 5  # Hardcoded value
-        logger.info(f"Starting trend analysis: {len(request.sources)} sources, {request.days_back} days, max {max_clusters} clusters")
-        
-        # Step 1: Scrape data
-        logger.info("Step 1: Scraping data from sources...")
-        scrape_result = orchestrator.process_all_sources(request.sources, request.days_back)
+        logger.info("Starting trend analysis: %d sources, %s days, max %d clusters", len(request.sources), request.days_back, max_clusters)
+        
+        async def prepare_articles(articles):
+            """Step 2 for one source's articles: keyword + LLM filter (LLM calls run concurrently)."""
+            # Quick keyword pre-filter (optional but faster)
+            keyword_filtered = quick_ai_keyword_filter(articles)
+            # LLM-based AI relevance filter
+            return await afilter_ai_relevant_articles(keyword_filtered)
+        
+        # Steps 1-2 are pipelined per source: every source is scraped concurrently,
+        # and as soon as one finishes its articles are filtered while the
+        # remaining sources are still being scraped.
+        logger.debug("Step 1: Scraping data from sources...")
+        scrape_tasks = [
+            asyncio.create_task(orchestrator.process_source_async(source, request.days_back))
+            for source in request.sources
+        ]
         
-        # Collect all articles
-        all_articles = []
-        for source_result in scrape_result['sources']:
+        total_articles = 0
+        prepare_tasks = []
+        for next_scraped in asyncio.as_completed(scrape_tasks):
+            source_result = await next_scraped
             # Filter out None or invalid articles
             valid_articles = [
                 article for article in source_result['articles'] 
                 if article and isinstance(article, dict)
             ]
-            all_articles.extend(valid_articles)
-        
-        if not all_articles:
-            return AnalyzeResponse(
-                success=True,
-                clusters=[],
-                total_articles=0,
-                processing_time=time.time() - start_time,
-                timestamp=datetime.utcnow().isoformat()
-            )
-        
-        logger.info(f"Collected {len(all_articles)} articles")
-        
-        # Step 2: Filter AI-relevant articles
-        logger.info("Step 2: Filtering AI-relevant articles...")
-        from src.content_filter import filter_ai_relevant_articles, quick_ai_keyword_filter
-        
-        # Quick keyword pre-filter (optional but faster)
-        keyword_filtered = quick_ai_keyword_filter(all_articles)
-        
-        # LLM-based AI relevance filter
-        ai_articles = filter_ai_relevant_articles(keyword_filtered)
+            if not valid_articles:
+                continue
+            
+            total_articles += len(valid_articles)
+            logger.debug("Step 2: Filtering %d articles from %s", len(valid_articles), source_result['source_url'])
+            prepare_tasks.append(asyncio.create_task(prepare_articles(valid_articles)))
+        
+        if not total_articles:
+            return ORJSONResponse({
+                'success': True,
+                'clusters': [],
+                'total_articles': 0,
+                'processing_time': time.time() - start_time,
+                'timestamp': datetime.utcnow().isoformat()
+            })
+        
+        logger.info("Collected %d articles", total_articles)
+        
+        ai_articles = [
+            article for batch in await asyncio.gather(*prepare_tasks) for article in batch
+        ]
         
         # # Optional: Generate test dataset for evaluation 
         # from backend.utils.test_dataset_generator import create_ai_filter_test_dataset
         # test_dataset_path = create_ai_filter_test_dataset(all_articles)
         # logger.info(f"Test dataset created: {test_dataset_path}")
         
-        # if not ai_articles:
-        #     logger.warning("No AI-relevant articles found after filtering")
-        #     return AnalyzeResponse(
-        #         success=True,
-        #         clusters=[],
-        #         total_articles=len(all_articles),
-        #         processing_time=time.time() - start_time,
-        #         timestamp=datetime.utcnow().isoformat()
-        #     )
-        
-        # logger.info(f"Filtered to {len(ai_articles)} AI-relevant articles ({len(ai_articles)/len(all_articles)*100:.1f}%)")
-        
-        # Step 3: Summarize individual articles
-        logger.info(f"Step 3: Summarizing {len(ai_articles)} individual articles...")
-        from src.clustering import summarize_articles_batch
-        summarized_articles = summarize_articles_batch(ai_articles)
-        
-        # Step 4: Cluster articles by topic using summaries
+        # Steps 3-4: Summarize articles and cluster them by topic (one combined
+        # LLM call for small batches, per-article summaries + clustering otherwise)
         # Adjust max_clusters based on article count to avoid empty clusters
-        dynamic_max_clusters = min(max_clusters, max(1, len(summarized_articles) // 2))  # At least 2 articles per cluster
-        logger.info(f"Step 4: Clustering articles by topic (max {dynamic_max_clusters} clusters for {len(summarized_articles)} articles)...")
-        clusters = cluster_articles(summarized_articles, max_clusters=dynamic_max_clusters)
+        dynamic_max_clusters = min(max_clusters, max(1, len(ai_articles) // 2))  # At least 2 articles per cluster
+        logger.debug("Steps 3-4: Summarizing and clustering articles by topic (max %d clusters for %d articles)...", dynamic_max_clusters, len(ai_articles))
+        _, clusters = await asummarize_and_cluster(ai_articles, dynamic_max_clusters)
         
-        # Step 5: Summarize each cluster
-        logger.info("Step 5: Generating cluster summaries...")
-        cluster_summaries = summarize_clusters(clusters)
+        # Step 5: Summarize each cluster (one async LLM call per cluster, run concurrently)
+        logger.debug("Step 5: Generating cluster summaries...")
+        cluster_summaries = await asummarize_clusters(clusters)
         
         # Step 6: Format response
-        response_clusters = []
-        for cluster_summary in cluster_summaries:
-            response_clusters.append(ClusterSummary(
-                topic_name=cluster_summary['topic_name'],
-                article_count=cluster_summary['article_count'],
-                summary=cluster_summary['summary'],
-                sources=cluster_summary['sources']
-            ))
+        response_clusters = [
+            {
+                'topic_name': cluster_summary['topic_name'],
+                'article_count': cluster_summary['article_count'],
+                'summary': cluster_summary['summary'],
+                'sources': cluster_summary['sources']
+            }
+            for cluster_summary in cluster_summaries
+        ]
         
         processing_time = time.time() - start_time
-        logger.info(f"Analysis completed in {processing_time:.2f}s: {len(cluster_summaries)} clusters (max {max_clusters})")
-        
-        return AnalyzeResponse(
-            success=True,
-            clusters=response_clusters,
-            total_articles=len(all_articles),
-            processing_time=processing_time,
-            timestamp=datetime.utcnow().isoformat()
-        )
+        logger.info("Analysis completed in %.2fs: %d clusters (max %d)", processing_time, len(cluster_summaries), max_clusters)
+        
+        return ORJSONResponse({
+            'success': True,
+            'clusters': response_clusters,
+            'total_articles': total_articles,
+            'processing_time': processing_time,
+            'timestamp': datetime.utcnow().isoformat()
+        })
         
     except Exception as e:
-        logger.error(f"Analysis error: {str(e)}")
+        logger.error("Analysis error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/overview")
+async def stream_overview(request: OverviewRequest):
+    """
+    Write an overview of the top trending topics from /analyze results.
+    
+    - **clusters**: Cluster summaries as returned by /analyze
+    - **top_n**: Number of top topics to include (default: 5)
+    
+    Returns the overview as plain text, streamed while the LLM generates it.
+    """
+    # Client-supplied clusters; generate_final_overview expects largest first
+    cluster_summaries = sorted(
+        (dict(cluster) for cluster in request.clusters),
+        key=lambda x: x['article_count'], reverse=True
+    )
+    # Sync generator: Starlette iterates it in the threadpool
+    return StreamingResponse(
+        generate_final_overview(cluster_summaries, request.top_n or 5),
+        media_type="text/plain; charset=utf-8"
+    )
+
 # Legacy API Routes (for backward compatibility)
 @app.post("/api/collect", response_model=CollectionResponse)
 async def collect_data(
@@ -252,33 +404,35 @@ async def collect_data(
     Returns detailed results including new articles, cached articles, and processing statistics.
     """
     try:
-        logger.info(f"API collect request: {len(request.sources)} sources, {request.days_back} days back")
+        logger.info("API collect request: %d sources, %s days back", len(request.sources), request.days_back)
         
-        result = orchestrator.process_all_sources(request.sources, request.days_back)
+        result = await run_in_threadpool(orchestrator.process_all_sources, request.sources, request.days_back)
         
-        # Convert to response model format
+        # Shape the result like CollectionResponse and return it as-is; the
+        # orchestrator output is trusted, so FastAPI's response_model
+        # validation pass (the main cost on large article lists) is skipped.
         sources_response = [
-            SourceResult(
-                source_url=s['source_url'],
-                source_type=s['source_type'],
-                articles=s['articles'],
-                new_count=s['new_count'],
-                cached_count=s['cached_count'],
-                error=s['error'],
-                processing_time=s['processing_time']
-            )
+            {
+                'source_url': s['source_url'],
+                'source_type': s['source_type'],
+                'articles': s['articles'],
+                'new_count': s['new_count'],
+                'cached_count': s['cached_count'],
+                'error': s['error'],
+                'processing_time': s['processing_time']
+            }
             for s in result['sources']
         ]
         
-        return CollectionResponse(
-            success=result['success'],
-            sources=sources_response,
-            summary=result['summary'],
-            timestamp=result['timestamp']
-        )
+        return ORJSONResponse({
+            'success': result['success'],
+            'sources': sources_response,
+            'summary': result['summary'],
+            'timestamp': result['timestamp']
+        })
         
     except Exception as e:
-        logger.error(f"API collect error: {str(e)}")
+        logger.error("API collect error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/stats", response_model=StatsResponse)
@@ -294,18 +448,21 @@ async def get_stats(days_back: int = 7):
         if days_back < 1 or days_back > 365:
             raise HTTPException(status_code=400, detail="days_back must be between 1 and 365")
         
-        stats = get_article_count_by_source(days_back)
-        
-        return StatsResponse(
-            success=True,
-            stats=stats,
-            total_articles=sum(stats.values()) if stats else 0,
-            source_count=len(stats) if stats else 0,
-            days_back=days_back
+        stats, cache_hit = await get_article_counts_cached(days_back)
+        
+        return ORJSONResponse(
+            {
+                'success': True,
+                'stats': stats,
+                'total_articles': sum(stats.values()) if stats else 0,
+                'source_count': len(stats) if stats else 0,
+                'days_back': days_back
+            },
+            headers={"X-Cache": "HIT" if cache_hit else "MISS"}
         )
         
     except Exception as e:
-        logger.error(f"API stats error: {str(e)}")
+        logger.error("API stats error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/collect/single")
@@ -329,7 +486,7 @@ async def collect_single_source(
         if days_back < 1 or days_back > 365:
             raise HTTPException(status_code=400, detail="days_back must be between 1 and 365")
         
-        result = orchestrator.process_source(source_url, days_back)
+        result = await run_in_threadpool(orchestrator.process_source, source_url, days_back)
         
         return {
             "success": True,
@@ -338,7 +495,7 @@ async def collect_single_source(
         }
         
     except Exception as e:
-        logger.error(f"API single source error: {str(e)}")
+        logger.error("API single source error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/recent-articles")
@@ -360,50 +517,39 @@ async def get_recent_articles(
         if limit < 1 or limit > 100:
             raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
             
-        # Get source list
+        # Get source list, limited to 20 sources to avoid large queries
+        headers = {}
         if sources:
-            source_list = [s.strip() for s in sources.split(',')]
+            source_list = split_sources(sources)[:20]
         else:
-            # Get all sources from stats
-            stats = get_article_count_by_source(days_back)
-            source_list = list(stats.keys())
+            # Top sources from stats; the counts are ordered by article count
+            # (ORDER BY count DESC), so the first keys are the largest sources
+            stats, cache_hit = await get_article_counts_cached(days_back)
+            headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+            source_list = list(islice(stats, 20))
         
         if not source_list:
-            return {
+            return ORJSONResponse({
                 "success": True,
                 "articles": [],
                 "count": 0
-            }
-        
-        # Limit to top sources to avoid large queries
-        source_list = source_list[:20]
+            }, headers=headers)
         
-        articles = get_articles_for_processing(source_list, days_back)
-        
-        # Limit results and format
-        limited_articles = articles[:limit]
+        # Rows come back already truncated, limited and in response shape;
+        # orjson serializes them (datetimes included) without a Python pass
+        articles, total_available = await get_articles_for_processing_truncated_async(
+            source_list, days_back, content_limit=500, limit=limit
+        )
         
-        return {
+        return ORJSONResponse({
             "success": True,
-            "articles": [
-                {
-                    "id": article["id"],
-                    "source_url": article["source_url"],
-                    "source_type": article["source_type"],
-                    "title": article["title"],
-                    "content": article["content"][:500] + "..." if len(article.get("content", "")) > 500 else article.get("content", ""),
-                    "link": article["link"],
-                    "published_date": article["published_date"].isoformat() if article.get("published_date") else None,
-                    "scraped_date": article["scraped_date"].isoformat() if article.get("scraped_date") else None
-                }
-                for article in limited_articles
-            ],
-            "count": len(limited_articles),
-            "total_available": len(articles)
-        }
+            "articles": articles,
+            "count": len(articles),
+            "total_available": total_available
+        }, headers=headers)
         
     except Exception as e:
-        logger.error(f"API recent articles error: {str(e)}")
+        logger.error("API recent articles error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Utility Endpoints
@@ -414,16 +560,39 @@ async def health_check():
     """Health check endpoint for monitoring"""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _now_iso or datetime.utcnow().isoformat(),
         "version": "1.0.0"
     }
 
+# Coarse wall-clock timestamp for /health, refreshed once per second so health
+# probes don't format a fresh datetime on every hit
+_now_iso: Optional[str] = None
+_clock_task: Optional[asyncio.Task] = None
+
+async def _tick_clock():
+    """Refresh _now_iso every second"""
+    global _now_iso
+    while True:
+        _now_iso = datetime.utcnow().isoformat()
+        await asyncio.sleep(1.0)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup"""
     logger.info("Starting TrendMind Backend API")
     logger.info("Workflow: Scrape → Cluster → Summarize → Results")
+    # One pooled HTTP session for every scrape in this worker
+    get_http_session()
+    global _clock_task
+    _clock_task = asyncio.create_task(_tick_clock())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown"""
+    if _clock_task is not None:
+        _clock_task.cancel()
+    close_http_session()
 
 if __name__ == "__main__":
     print("Starting TrendMind Backend API...")
@@ -432,10 +601,20 @@ if __name__ == "__main__":
     print("Main Endpoint: POST /analyze")
     print("Press Ctrl+C to stop")
     
+    # One worker process per core by default so CPU-bound work (clustering,
+    # JSON encoding) uses the whole machine. DEV=1 runs a single auto-reloading
+    # worker instead; API_WORKERS overrides the worker count either way.
+    dev = os.getenv("DEV", "").lower() in ("1", "true")
+    workers = int(os.getenv("API_WORKERS", "1" if dev else str(os.cpu_count() or 1)))
+    reload = dev and workers == 1
+    
     uvicorn.run(
         "main_api:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        reload=reload,
         log_level="info"
     )
\ No newline at end of file
@@ -1,23 +1,217 @@
+import asyncio
+import logging
 import os
-from openai import AzureOpenAI
-from langfuse import observe, Langfuse
-from typing import List, Dict, Any
-import json
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from langfuse import observe
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Tuple
+import orjson
+import numpy as np
 from utils.logger import get_logger, log_performance
-from dotenv import load_dotenv, find_dotenv
+from src.dedup import near_duplicate_groups
+from src.embed_cache import get_or_compute
+from src.llm_call import (
+    achat_completion, achat_completion_json, chat_completion, chat_completion_json, create_embeddings, json_response_format, squash_whitespace, truncate_tokens,
+)
+from src.llm_client import (
+    get_async_client, get_client, get_deployment, get_embedding_deployment, get_prompt,
+    get_small_deployment,
+)
+from utils.disk_cache import cache_load, cache_store, content_hash, disk_cached
 
-load_dotenv(find_dotenv())
+try:
+    from sklearn.cluster import AgglomerativeClustering, MiniBatchKMeans
+except ImportError:  # embedding clustering unavailable, cluster_articles uses the LLM path
+    AgglomerativeClustering = MiniBatchKMeans = None
 
-# Initialize clients
-from langfuse.openai import openai
+EMBEDDING_BATCH_SIZE = 512
 
-client = openai.AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-)
-langfuse = Langfuse()
-DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+# Static prompt scaffolding. System messages and instructions are constants
+# (and come before the per-run content) so the rendered prefix is identical
+# across calls, which also makes it eligible for provider-side prompt caching.
+SYSTEM_PROMPTS = {
+    "article_summary": "You are an expert at summarizing AI news articles concisely.",
+    "cluster_label": "You are an expert at naming topics of AI news.",
+    "clustering": "You are an expert at identifying topics and clustering related content.",
+    "summarize_and_cluster": "You are an expert at summarizing AI news articles and grouping them into topics.",
+    "cluster_report": "You are an expert AI news analyst who creates insightful, balanced summaries.",
+    "overview": "You are an expert at synthesizing AI news trends into clear, compelling narratives.",
+}
+
+CLUSTERING_INSTRUCTIONS = """Group AI news articles into topic clusters by theme.
+
+Return JSON: {"clusters":[{"n":"topic name, 2-5 words","d":"one-sentence description","ids":[article indices]}]}
+
+Rules:
+- Assign EVERY article index to exactly one cluster; the ids across clusters must cover all articles
+- If an article fits poorly, put it in the closest cluster
+- Prefer coherent, balanced clusters of 3+ articles
+- Common AI topics: Healthcare AI, AI Ethics/Regulation, AI Business/Investment, AI Tools/Products, AI Research/Models, AI Art/Entertainment, AI Security/Safety, AI Infrastructure
+"""
+
+
+@lru_cache(maxsize=8)
+def get_system_messages(kind: str) -> Tuple[Dict[str, str], ...]:
+    """System message(s) for a prompt kind (see SYSTEM_PROMPTS); built once, treat as read-only."""
+    return ({"role": "system", "content": SYSTEM_PROMPTS[kind]},)
+
+
+def _render_clustering_prompt(articles_lines: str, num_articles: int, max_clusters: int) -> str:
+    """Static clustering instructions followed by this run's articles."""
+    return f"""{CLUSTERING_INSTRUCTIONS}
+Make 2-{max_clusters} clusters covering all {num_articles} articles (indices 0 to {num_articles-1}).
+
+Articles, one per line as index|title|summary:
+{articles_lines}
+"""
+
+
+FUSED_INSTRUCTIONS = """Summarize each AI news article in 2-3 sentences (key AI concepts, developments or implications), then group the articles into topic clusters by theme.
+
+Return JSON: {"s":[{"id":article index,"s":"summary"}],"clusters":[{"n":"topic name, 2-5 words","d":"one-sentence description","ids":[article indices]}]}
+
+Rules:
+- Write one summary for EVERY article index
+- Assign EVERY article index to exactly one cluster; the ids across clusters must cover all articles
+- If an article fits poorly, put it in the closest cluster
+- Prefer coherent, balanced clusters of 3+ articles
+"""
+
+# summarize_and_cluster makes one combined call for batches up to this size;
+# larger batches use summarize_articles_batch + cluster_articles
+FUSED_MAX_ARTICLES = 30
+FUSED_CONTENT_TOKENS = 150
+FUSED_MAX_TOKENS = 3000  # ~60 tokens per summary plus the cluster listing
+
+# Output cap for the LLM clustering call (~30 clusters of short fields)
+CLUSTERING_MAX_TOKENS = 800
+
+# Strict structured output for LLM clustering; short keys keep output tokens low
+_CLUSTER_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "n": {"type": "string", "description": "Topic name, 2-5 words"},
+        "d": {"type": "string", "description": "One-sentence description of the topic"},
+        "ids": {"type": "array", "items": {"type": "integer"}, "description": "Article indices"}
+    },
+    "required": ["n", "d", "ids"],
+    "additionalProperties": False
+}
+
+CLUSTERING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "clusters": {"type": "array", "items": _CLUSTER_ITEM_SCHEMA}
+    },
+    "required": ["clusters"],
+    "additionalProperties": False
+}
+
+# Structured output of summarize_and_cluster's combined call
+FUSED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "s": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer", "description": "Article index"},
+                    "s": {"type": "string", "description": "2-3 sentence summary"}
+                },
+                "required": ["id", "s"],
+                "additionalProperties": False
+            }
+        },
+        "clusters": {"type": "array", "items": _CLUSTER_ITEM_SCHEMA}
+    },
+    "required": ["s", "clusters"],
+    "additionalProperties": False
+}
+
+# Concurrent article summaries in flight at once (bounded by Azure RPM/TPM quotas)
+ARTICLE_SUMMARY_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "16"))
+# Article content budgets (tokens) for the summary and cluster-report prompts
+ARTICLE_SUMMARY_CONTENT_TOKENS = 300
+CLUSTER_REPORT_CONTENT_TOKENS = 150
+# Bump to invalidate cached article summaries when the summary prompt changes
+ARTICLE_SUMMARY_CACHE_VERSION = 1
+# Likewise for cached cluster reports and final overviews
+CLUSTER_REPORT_CACHE_VERSION = 1
+FINAL_OVERVIEW_CACHE_VERSION = 1
+
+
+def _article_summary_prompt(title: str, content: str) -> str:
+    return f"""Summarize this AI-related article in 2-3 sentences. Focus on the key AI concepts, developments, or implications.
+
+Title: {title}
+Content: {content}
+
+Provide a concise summary that captures the main AI-related points."""
+
+
+def _article_summary_request(title: str, content: str) -> Dict[str, Any]:
+    """Chat completion arguments for one article summary (shared by the sync and async paths)."""
+    return {
+        "model": get_small_deployment(),
+        "messages": [
+            *get_system_messages("article_summary"),
+            {"role": "user", "content": _article_summary_prompt(title, content)}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 150  # Keep summaries short
+    }
+
+
+def _article_cache_key(title: str, content: str) -> List[Any]:
+    return [get_small_deployment(), ARTICLE_SUMMARY_CACHE_VERSION, title, content]
+
+
+def cluster_cache_key(cluster: Dict[str, Any], cluster_index: int = 0,
+                      version: int = CLUSTER_REPORT_CACHE_VERSION) -> List[Any]:
+    """
+    Cache key of an LLM result for a cluster (cluster reports and summarizer summaries).
+    
+    Args:
+        cluster: Cluster dictionary with 'topic_name', 'articles'
+        cluster_index: Index of the cluster, for its default topic name
+        version: Cache version of the prompt the result comes from
+        
+    Returns:
+        Deployment, version, topic name and the articles (source, title and
+        content hash; order-insensitive)
+    """
+    return [
+        get_small_deployment(),
+        version,
+        cluster.get('topic_name', f'Topic {cluster_index+1}'),
+        sorted(
+            content_hash([a.get('source_url') or '', a.get('title', ''), a.get('content') or ''])
+            for a in cluster.get('articles', [])
+        ),
+    ]
+
+
+@disk_cached("article_summaries", _article_cache_key)
+def _article_summary(title: str, content: str) -> str:
+    """LLM summary of one article, cached on disk by title, content and deployment; failures raise."""
+    response = chat_completion(get_client(), **_article_summary_request(title, content))
+    return response.choices[0].message.content.strip()
+
+
+@disk_cached("article_summaries", _article_cache_key)
+async def _aarticle_summary(title: str, content: str) -> str:
+    """Async version of _article_summary (shares its cache entries)."""
+    response = await achat_completion(get_async_client(), **_article_summary_request(title, content))
+    return response.choices[0].message.content.strip()
+
+
+def _fallback_article_summary(title: str, content: str) -> str:
+    """Title + first sentence of content, used when the LLM call fails."""
+    first_sentence = content.split('.')[0] if content else ""
+    return f"{title}. {first_sentence}" if first_sentence else title
 
 
 @observe()
@@ -38,73 +232,106 @@ def summarize_single_article(article: Dict[str, Any]) -> Dict[str, Any]:
     article_copy = article.copy()
     
     title = article.get('title', 'No Title')
-    content = article.get('content', '')[:1000]  # First 1000 chars
+    content = truncate_tokens(squash_whitespace(article.get('content') or ''), ARTICLE_SUMMARY_CONTENT_TOKENS)
     
     if not content:
         # If no content, just return article with title as summary
         article_copy['ai_summary'] = title
         return article_copy
     
-    prompt = f"""Summarize this AI-related article in 2-3 sentences. Focus on the key AI concepts, developments, or implications.
-
-Title: {title}
-Content: {content}
-
-Provide a concise summary that captures the main AI-related points."""
-
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT,
-            messages=[
-                {"role": "system", "content": "You are an expert at summarizing AI news articles concisely."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=150  # Keep summaries short
-        )
+        article_copy['ai_summary'] = _article_summary(title, content)
         
-        summary = response.choices[0].message.content.strip()
-        article_copy['ai_summary'] = summary
+        return article_copy
         
+    except Exception as e:
+        logger.warning(f"Failed to summarize article '{title[:50]}...': {str(e)}")
+        article_copy['ai_summary'] = _fallback_article_summary(title, content)
+        return article_copy
+
+
+@observe()
+async def asummarize_single_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async version of summarize_single_article using the async Azure OpenAI client.
+    
+    Args:
+        article: Article dictionary with 'title', 'content', etc.
+        
+    Returns:
+        Dictionary with original article data plus 'ai_summary' field
+    """
+    logger = get_logger("clustering")
+    
+    article_copy = article.copy()
+    
+    title = article.get('title', 'No Title')
+    content = truncate_tokens(squash_whitespace(article.get('content') or ''), ARTICLE_SUMMARY_CONTENT_TOKENS)
+    
+    if not content:
+        article_copy['ai_summary'] = title
+        return article_copy
+    
+    try:
+        article_copy['ai_summary'] = await _aarticle_summary(title, content)
         return article_copy
         
     except Exception as e:
         logger.warning(f"Failed to summarize article '{title[:50]}...': {str(e)}")
-        # Fallback to title + first sentence of content
-        first_sentence = content.split('.')[0] if content else ""
-        article_copy['ai_summary'] = f"{title}. {first_sentence}" if first_sentence else title
+        article_copy['ai_summary'] = _fallback_article_summary(title, content)
         return article_copy
 
 
 @observe()
 @log_performance
-def summarize_articles_batch(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+async def asummarize_articles_batch(articles: List[Dict[str, Any]],
+                                    concurrency: int = ARTICLE_SUMMARY_CONCURRENCY) -> List[Dict[str, Any]]:
     """
-    Summarize multiple articles, with each getting its own Langfuse trace.
+    Summarize multiple articles concurrently, at most ``concurrency`` LLM calls at a time.
+    
+    Only one article per near-duplicate group is sent to the LLM; its summary
+    is copied to the other members.
     
     Args:
         articles: List of article dictionaries
+        concurrency: Maximum number of in-flight summary requests
         
     Returns:
-        List of articles with 'ai_summary' field added
+        List of articles with 'ai_summary' field added, in input order
     """
     logger = get_logger("clustering")
-    logger.info(f"Summarizing {len(articles)} articles individually")
+    logger.info(f"Summarizing {len(articles)} articles (concurrency {concurrency})")
     
-    summarized_articles = []
-    for i, article in enumerate(articles):
-        try:
-            summarized_article = summarize_single_article(article)
-            summarized_articles.append(summarized_article)
-            
-            if (i + 1) % 10 == 0:  # Log progress every 10 articles
-                logger.info(f"Summarized {i + 1}/{len(articles)} articles")
-                
-        except Exception as e:
-            logger.error(f"Error summarizing article {i}: {str(e)}")
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def bounded(article):
+        async with semaphore:
+            return await asummarize_single_article(article)
+    
+    groups = near_duplicate_groups(articles)
+    if len(groups) < len(articles):
+        logger.info(f"Summarizing {len(groups)} unique articles ({len(articles) - len(groups)} near-duplicates reuse their summaries)")
+    
+    results = await asyncio.gather(*(bounded(articles[members[0]]) for members in groups), return_exceptions=True)
+    
+    return _fan_out_summaries(articles, groups, results)
+
+
+def _fan_out_summaries(articles: List[Dict[str, Any]], groups: List[List[int]],
+                       results: List[Any]) -> List[Dict[str, Any]]:
+    """Per-article results in input order from one result (or exception) per near-duplicate group."""
+    logger = get_logger("clustering")
+    
+    summarized_articles = [None] * len(articles)
+    for members, result in zip(groups, results):
+        representative = members[0]
+        if isinstance(result, Exception):
+            logger.error(f"Error summarizing article {representative}: {str(result)}")
             # Add article without summary
-            article['ai_summary'] = article.get('title', 'No Title')
-            summarized_articles.append(article)
+            result = {**articles[representative], 'ai_summary': articles[representative].get('title', 'No Title')}
+        summarized_articles[representative] = result
+        for i in members[1:]:
+            summarized_articles[i] = {**articles[i], 'ai_summary': result['ai_summary']}
     
     logger.info(f"Completed summarizing {len(summarized_articles)} articles")
     return summarized_articles
@@ -112,7 +339,352 @@ def summarize_articles_batch(articles: List[Dict[str, Any]]) -> List[Dict[str, A
 
 @observe()
 @log_performance
-def cluster_articles(articles: List[Dict[str, Any]], max_clusters: int = 2) -> List[Dict[str, Any]]:
+def summarize_articles_batch(articles: List[Dict[str, Any]],
+                             concurrency: int = ARTICLE_SUMMARY_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Synchronous version of asummarize_articles_batch, on a thread pool.
+    
+    The summary calls are I/O-bound, so ``concurrency`` threads sharing the
+    sync client's connection pool overlap them like the async version does
+    (see get_async_client for why this is not an asyncio.run wrapper).
+    
+    Args:
+        articles: List of article dictionaries
+        concurrency: Maximum number of in-flight summary requests
+        
+    Returns:
+        List of articles with 'ai_summary' field added, in input order
+    """
+    logger = get_logger("clustering")
+    logger.info(f"Summarizing {len(articles)} articles (concurrency {concurrency})")
+    
+    groups = near_duplicate_groups(articles)
+    if len(groups) < len(articles):
+        logger.info(f"Summarizing {len(groups)} unique articles ({len(articles) - len(groups)} near-duplicates reuse their summaries)")
+    if not groups:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(groups))) as executor:
+        futures = [executor.submit(summarize_single_article, articles[members[0]]) for members in groups]
+    results = [future.exception() or future.result() for future in futures]
+    
+    return _fan_out_summaries(articles, groups, results)
+
+
+def _split_duplicates(articles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]]]:
+    """
+    One representative per near-duplicate group (see src.dedup).
+    
+    Returns:
+        (representatives in input order, {id(representative): its duplicates})
+    """
+    groups = near_duplicate_groups(articles)
+    if len(groups) < len(articles):
+        get_logger("clustering").info(f"Collapsed {len(articles) - len(groups)} near-duplicate articles")
+    unique_articles = [articles[members[0]] for members in groups]
+    duplicates = {id(articles[members[0]]): [articles[i] for i in members[1:]] for members in groups if len(members) > 1}
+    return unique_articles, duplicates
+
+
+def _restore_duplicates(clusters: List[Dict[str, Any]],
+                        duplicates: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Put each representative's duplicates back next to it and re-sort clusters largest first."""
+    if duplicates:
+        for cluster in clusters:
+            cluster['articles'] = [
+                member for article in cluster['articles']
+                for member in [article, *duplicates.get(id(article), ())]
+            ]
+            cluster['article_count'] = len(cluster['articles'])
+        clusters.sort(key=lambda x: x['article_count'], reverse=True)
+    return clusters
+
+
+def _embed(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts with the Azure OpenAI embedding deployment, in batches.
+    
+    Returns:
+        (len(texts), dim) array of L2-normalized embeddings
+    """
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        response = create_embeddings(
+            get_client(),
+            model=get_embedding_deployment(),
+            input=texts[start:start + EMBEDDING_BATCH_SIZE]
+        )
+        vectors.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+    
+    embeddings = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def _label_cluster(titles: List[str]) -> Dict[str, str]:
+    """
+    Ask the LLM for a short topic name and description for a group of articles.
+    
+    Args:
+        titles: Representative article titles (closest to the cluster centroid)
+        
+    Returns:
+        Dictionary with 'topic_name' and 'description'
+    """
+    logger = get_logger("clustering")
+    titles_text = "\n".join(f"- {title}" for title in titles)
+    prompt = f"""These AI news articles belong to the same topic:
+{titles_text}
+
+Return a JSON object: {{"topic_name": "Brief topic name (2-5 words)", "description": "One sentence describing this topic"}}"""
+    
+    try:
+        response = chat_completion(
+            get_client(),
+            model=get_small_deployment(),
+            messages=[
+                *get_system_messages("cluster_label"),
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=100,
+            response_format={"type": "json_object"}
+        )
+        label = orjson.loads(response.choices[0].message.content)
+        return {
+            "topic_name": label.get("topic_name") or "Unknown Topic",
+            "description": label.get("description", "")
+        }
+    except Exception as e:
+        logger.warning(f"Failed to label cluster: {str(e)}")
+        return {"topic_name": titles[0] if titles else "Unknown Topic", "description": ""}
+
+
+@log_performance
+def _cluster_articles_embeddings(articles: List[Dict[str, Any]], max_clusters: int) -> List[Dict[str, Any]]:
+    """
+    Cluster articles locally on summary embeddings, then label each cluster with the LLM.
+    
+    Token usage is one embedding pass plus one short labeling prompt per
+    cluster, instead of every summary in a single clustering prompt.
+    """
+    logger = get_logger("clustering")
+    
+    texts = [article.get('ai_summary') or article.get('title') or 'No Title' for article in articles]
+    embeddings = get_or_compute(texts, get_embedding_deployment(), _embed)
+    
+    n_clusters = max(1, min(max_clusters, len(articles)))
+    if n_clusters == 1:
+        labels = np.zeros(len(articles), dtype=int)
+    else:
+        labels = AgglomerativeClustering(
+            n_clusters=n_clusters, metric="cosine", linkage="average"
+        ).fit_predict(embeddings)
+    
+    # Representative titles: the three articles closest to each centroid
+    groups = []
+    for label in np.unique(labels):
+        member_ids = np.flatnonzero(labels == label)
+        centroid = embeddings[member_ids].mean(axis=0)
+        closest = member_ids[np.argsort(embeddings[member_ids] @ centroid)[::-1][:3]]
+        titles = [articles[i].get('title', 'No Title') for i in closest]
+        groups.append((member_ids, titles))
+    
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        cluster_labels = list(executor.map(_label_cluster, [titles for _, titles in groups]))
+    
+    clusters = []
+    for (member_ids, _), label in zip(groups, cluster_labels):
+        cluster_articles = [articles[i] for i in member_ids]
+        clusters.append({
+            "topic_name": label["topic_name"],
+            "description": label["description"],
+            "articles": cluster_articles,
+            "article_count": len(cluster_articles)
+        })
+        logger.info(f"Cluster '{label['topic_name']}': {len(cluster_articles)} articles")
+    
+    # Sort by article count (most articles first)
+    clusters.sort(key=lambda x: x['article_count'], reverse=True)
+    return clusters
+
+
+@observe()
+@log_performance
+def cluster_articles(articles: List[Dict[str, Any]], max_clusters: int = 2,
+                     use_llm_clustering: bool = False) -> List[Dict[str, Any]]:
+    """
+    Cluster articles by topic using their AI summaries.
+    
+    By default summaries are embedded and clustered locally, and the LLM only
+    names each cluster. With use_llm_clustering=True (or when scikit-learn is
+    not installed, or embedding fails) the whole set is clustered by a
+    single LLM prompt.
+    
+    Args:
+        articles: List of article dictionaries with 'ai_summary' field (from summarize_articles_batch)
+        max_clusters: Maximum number of clusters to create
+        use_llm_clustering: Cluster with one LLM prompt instead of embeddings
+        
+    Returns:
+        List of cluster dictionaries sorted by article_count, largest first
+        (generate_final_overview relies on this order), each containing:
+            - topic_name: Name of the topic
+            - articles: List of articles in this cluster
+            - article_count: Number of articles
+    """
+    logger = get_logger("clustering")
+    
+    # Cluster one representative per near-duplicate group, then put the
+    # duplicates back into their representative's cluster
+    unique_articles, duplicates = _split_duplicates(articles)
+    
+    clusters = None
+    if unique_articles and not use_llm_clustering and AgglomerativeClustering is not None:
+        try:
+            logger.info(f"Starting embedding clustering of {len(unique_articles)} articles")
+            clusters = _cluster_articles_embeddings(unique_articles, max_clusters)
+        except Exception as e:
+            logger.warning(f"Embedding clustering failed, falling back to LLM clustering: {str(e)}")
+    if clusters is None:
+        clusters = _cluster_articles_llm(unique_articles, max_clusters)
+    
+    return _restore_duplicates(clusters, duplicates)
+
+
+def _kmeans_fallback_clusters(articles: List[Dict[str, Any]], max_clusters: int) -> List[Dict[str, Any]]:
+    """
+    Deterministic, LLM-free clustering used when LLM clustering fails.
+    
+    Articles are grouped with MiniBatchKMeans on their (cached) summary
+    embeddings and each cluster is named after the most frequent capitalized
+    words in its titles.
+    """
+    texts = [article.get('ai_summary') or article.get('title') or 'No Title' for article in articles]
+    embeddings = get_or_compute(texts, get_embedding_deployment(), _embed)
+    
+    kmeans = MiniBatchKMeans(
+        n_clusters=max(1, min(max_clusters, len(articles))),
+        batch_size=256,
+        n_init=3,
+        random_state=0
+    )
+    labels = kmeans.fit_predict(embeddings)
+    
+    clusters = []
+    for label in np.unique(labels):
+        cluster_articles = [articles[i] for i in np.flatnonzero(labels == label)]
+        words = Counter(
+            word
+            for article in cluster_articles
+            for word in re.findall(r"[A-Z][a-z]+", article.get('title') or '')
+        )
+        topic_name = " ".join(word for word, _ in words.most_common(2)) or "AI News & Trends"
+        clusters.append({
+            "topic_name": topic_name,
+            "description": "",
+            "articles": cluster_articles,
+            "article_count": len(cluster_articles)
+        })
+    
+    clusters.sort(key=lambda x: x['article_count'], reverse=True)
+    return clusters
+
+
+def _create_clustering_completion(prompt: str) -> str:
+    """
+    Run the clustering chat completion with strict JSON schema output.
+    
+    API versions before structured outputs reject json_schema; the first such
+    rejection switches this process to plain json_object mode (see llm_call).
+    
+    Returns:
+        Reply text (a JSON object)
+    """
+    return chat_completion_json(
+        get_client(),
+        model=get_small_deployment(),
+        messages=[
+            *get_system_messages("clustering"),
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,  # Lower temperature for more consistent clustering
+        max_tokens=CLUSTERING_MAX_TOKENS,
+        response_format=json_response_format("clusters", CLUSTERING_SCHEMA)
+    )
+
+
+def _assemble_llm_clusters(clusters_data: List[Dict[str, Any]], articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn an LLM cluster listing into cluster objects over ``articles``.
+    
+    Args:
+        clusters_data: Parsed "clusters" entries (short n/d/ids or long key names)
+        articles: The articles the ids index into
+        
+    Returns:
+        Cluster dictionaries sorted by article_count, largest first; articles
+        the LLM left out form an extra 'Other AI Topics' cluster
+    """
+    logger = get_logger("clustering")
+    
+    # Build cluster objects in one pass over the LLM output. Each article
+    # goes to the first cluster that lists it; out-of-range and repeated
+    # IDs are dropped.
+    n = len(articles)
+    assigned = [False] * n
+    clusters = []
+    
+    for info in clusters_data:
+        # The fallback prompt asks for short keys (n/d/ids); accept the long names too
+        topic_name = info.get("topic_name", info.get("n", "Unknown Topic"))
+        article_ids = info.get("article_ids", info.get("ids", []))
+        ids = []
+        for i in article_ids:
+            if isinstance(i, int) and 0 <= i < n and not assigned[i]:
+                assigned[i] = True
+                ids.append(i)
+        
+        if len(ids) < len(article_ids):
+            logger.warning(f"Ignored {len(article_ids) - len(ids)} invalid or repeated article IDs in cluster '{topic_name}'")
+        if not ids:
+            continue
+        
+        cluster_articles = [articles[i] for i in ids]
+        clusters.append({
+            "topic_name": topic_name,
+            "description": info.get("description", info.get("d", "")),
+            "articles": cluster_articles,
+            "article_count": len(cluster_articles)
+        })
+        logger.info(f"Cluster '{topic_name}': {len(cluster_articles)} articles (IDs: {ids})")
+    
+    # Articles the LLM left out are kept together rather than dropped
+    missed_ids = [i for i in range(n) if not assigned[i]]
+    if missed_ids:
+        logger.warning(f"LLM missed {len(missed_ids)} articles (IDs: {missed_ids}); grouping them as 'Other AI Topics'")
+        missed_articles = [articles[i] for i in missed_ids]
+        clusters.append({
+            "topic_name": "Other AI Topics",
+            "description": "Articles that did not fit the other topics",
+            "articles": missed_articles,
+            "article_count": len(missed_articles)
+        })
+    
+    # Final verification
+    total_clustered = sum(cluster['article_count'] for cluster in clusters)
+    if total_clustered != len(articles):
+        logger.error(f"CLUSTERING VALIDATION FAILED: {total_clustered} clustered != {len(articles)} input articles")
+    else:
+        logger.info(f"CLUSTERING VALIDATION PASSED: All {len(articles)} articles successfully clustered")
+    
+    # Sort by article count (most articles first)
+    clusters.sort(key=lambda x: x['article_count'], reverse=True)
+    
+    return clusters
+
+
+def _cluster_articles_llm(articles: List[Dict[str, Any]], max_clusters: int = 2) -> List[Dict[str, Any]]:
     """
     Use LLM to cluster articles by topic using their AI summaries.
     
@@ -129,210 +701,74 @@ def cluster_articles(articles: List[Dict[str, Any]], max_clusters: int = 2) -> L
     logger = get_logger("clustering")
     logger.info(f"Starting clustering of {len(articles)} articles using AI summaries")
     
-    # Prepare article summaries for clustering using the AI summaries
+    # Prepare article summaries for clustering using the AI summaries. Only the
+    # index, a short title and a summary snippet are sent: the source URL does
+    # not inform the clustering and long fields mostly cost tokens.
     article_summaries = []
+    lines = []
+    articles_with_summary = 0
     for i, article in enumerate(articles):
-        summary = {
-            "array_index": i,
-            "title": article.get('title', 'No Title'),
-            "ai_summary": article.get('ai_summary', 'No summary available'),
-            "source": article.get('link') or article.get('source_url', 'Unknown')
-        }
-        article_summaries.append(summary)
+        get = article.get
+        title = squash_whitespace(get('title') or 'No Title')[:80]
+        ai_summary = get('ai_summary')
+        if ai_summary:
+            articles_with_summary += 1
+        ai_summary = squash_whitespace(ai_summary or 'No summary available')[:120]
+        article_summaries.append({"array_index": i, "title": title, "ai_summary": ai_summary})
+        lines.append(f"{i}|{title}|{ai_summary}")
+    articles_lines = "\n".join(lines)
     
     logger.info(f"Prepared {len(article_summaries)} article summaries for clustering")
-    logger.debug(f"Articles JSON length: {len(json.dumps(article_summaries, indent=1))} characters")
-    
-    # Debug: Check if articles have ai_summary
-    articles_with_summary = sum(1 for a in articles if a.get('ai_summary'))
+    logger.debug(f"Articles prompt length: {len(articles_lines)} characters")
     logger.info(f"Articles with ai_summary: {articles_with_summary}/{len(articles)}")
     
-    # Debug: Log first few summaries
-    for i in range(min(3, len(article_summaries))):
-        summary_preview = article_summaries[i]['ai_summary'][:100] + "..." if len(article_summaries[i]['ai_summary']) > 100 else article_summaries[i]['ai_summary']
-        logger.debug(f"Article {i} summary: {summary_preview}")
+    if logger.isEnabledFor(logging.DEBUG):
+        for s in article_summaries[:3]:
+            logger.debug(f"Article {s['array_index']} summary: {s['ai_summary'][:100]}")
     
     # Get prompt from Langfuse with enhanced fallback
     try:
-        prompt_template = langfuse.get_prompt("trendmind-clustering-prompt", label="latest")  # Latest version
+        prompt_template = get_prompt("trendmind-clustering-prompt")
         prompt = prompt_template.compile(
             num_articles=len(articles),
             max_clusters=max_clusters,
-            articles_json=json.dumps(article_summaries, indent=2)
+            articles_json=orjson.dumps(article_summaries).decode()
         )
         logger.debug(f"Using Langfuse prompt version: {prompt_template.version}")
         
-        # ENHANCED: Add validation reminder to any Langfuse prompt
-        prompt += f"""
-
-MANDATORY VALIDATION REMINDER:
-- You have {len(articles)} articles (array_index 0 to {len(articles)-1})
-- EVERY article must be assigned to a cluster
-- Count your article_ids before responding to ensure they total {len(articles)}
-- Missing articles will cause the clustering to fail validation
-"""
+        # The response schema fixes the structure; coverage still needs stating
+        prompt += f"\n\nAssign every one of the {len(articles)} articles (indices 0 to {len(articles)-1}) to exactly one cluster.\n"
         
     except Exception as e:
         logger.warning(f"Failed to fetch Langfuse prompt, using enhanced fallback: {e}")
                 # Fallback to hardcoded prompt
-        prompt = f"""You are analyzing AI news articles. Group these {len(articles)} articles into 2-{max_clusters} meaningful topic clusters based on their AI summaries and themes.
-
-Articles to cluster (MUST analyze ALL {len(articles)} articles):
-{json.dumps(article_summaries, indent=1)}
-
-Return a JSON object with this structure:
-{{
-  "clusters": [
-    {{
-      "topic_name": "Brief topic name",
-      "description": "One sentence describing this topic",
-      "article_ids": [0, 5, 12]  // Use ONLY the "array_index" values (0 to {len(articles)-1})
-    }},
-    {{
-      "topic_name": "Another topic",
-      "description": "One sentence describing this other topic", 
-      "article_ids": [1, 3, 7]  // Different array_index values
-    }}
-  ]
-}}
-
-MANDATORY REQUIREMENTS - FAILURE TO FOLLOW WILL BE REJECTED:
-1. EVERY SINGLE ARTICLE MUST BE ASSIGNED: You have {len(articles)} articles with array_index from 0 to {len(articles)-1}
-2. COMPLETE COVERAGE: Your article_ids across all clusters must include EVERY number from 0 to {len(articles)-1}
-3. NO MISSING ARTICLES: If any article_ids are missing, the clustering is INVALID
-4. VERIFICATION STEP: Before responding, count your article_ids to ensure they total exactly {len(articles)} and cover 0 to {len(articles)-1}
-
-CLUSTERING STRATEGY:
-- Start by reviewing ALL {len(articles)} summaries carefully
-- Identify 2-{max_clusters} main themes/topics across the summaries  
-- Assign EVERY article to the most appropriate cluster
-- If an article doesn't fit well, put it in the closest thematic match
-- Common AI topics: Healthcare AI, AI Ethics/Regulation, AI Business/Investment, AI Tools/Products, AI Research/Models, AI Art/Entertainment, AI Security/Safety, AI Infrastructure
-
-QUALITY CHECKS:
-- Each cluster should have meaningful thematic coherence
-- Topic names should be concise (2-5 words)
-- Each cluster should ideally have 3+ articles (but assign all articles regardless)
-- Balance cluster sizes when possible
-
-FINAL VERIFICATION BEFORE RESPONDING:
-1. Count total article_ids across all clusters = {len(articles)} ✓
-2. Check all numbers 0 to {len(articles)-1} are included ✓
-3. No article appears in multiple clusters ✓
-4. All clusters have meaningful topic names ✓
-
-If verification fails, revise your clustering until all {len(articles)} articles are properly assigned.
-"""
+        prompt = _render_clustering_prompt(articles_lines, len(articles), max_clusters)
 
     try:
         logger.debug("Sending clustering request to LLM")
         
-        response = client.chat.completions.create(
-            model=DEPLOYMENT,
-            messages=[
-                {"role": "system", "content": "You are an expert at identifying topics and clustering related content."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,  # Lower temperature for more consistent clustering
-            response_format={"type": "json_object"}
-        )
+        content = _create_clustering_completion(prompt)
         
-        result = json.loads(response.choices[0].message.content)
+        result = orjson.loads(content)
         clusters_data = result.get("clusters", [])
         
         logger.info(f"LLM identified {len(clusters_data)} clusters")
-        logger.info(f"Full LLM response: {response.choices[0].message.content}")  # Log full response to debug
+        logger.info(f"Full LLM response: {content}")  # Log full response to debug
         
-        # Build cluster objects with actual articles
-        clusters = []
-        total_clustered_articles = 0
-        
-        for cluster_info in clusters_data:
-            article_ids = cluster_info.get("article_ids", [])
-            logger.info(f"Cluster '{cluster_info.get('topic_name', 'Unknown')}' has article IDs: {article_ids}")
-            
-            # Validate article IDs and get valid articles
-            valid_article_ids = [i for i in article_ids if isinstance(i, int) and 0 <= i < len(articles)]
-            invalid_ids = [i for i in article_ids if not (isinstance(i, int) and 0 <= i < len(articles))]
-            
-            if invalid_ids:
-                logger.warning(f"Invalid article IDs found in cluster '{cluster_info.get('topic_name')}': {invalid_ids}")
-            
-            cluster_articles = [articles[i] for i in valid_article_ids]
-            total_clustered_articles += len(cluster_articles)
-            
-            cluster = {
-                "topic_name": cluster_info.get("topic_name", "Unknown Topic"),
-                "description": cluster_info.get("description", ""),
-                "articles": cluster_articles,
-                "article_count": len(cluster_articles)
-            }
-            clusters.append(cluster)
-            
-            logger.info(f"Cluster '{cluster['topic_name']}': {cluster['article_count']} articles (IDs: {valid_article_ids})")
-        
-        logger.info(f"Total articles clustered: {total_clustered_articles} out of {len(articles)} input articles")
-        
-        # ENHANCED: Check for missed articles and redistribute them
-        all_clustered_ids = set()
-        for cluster_info in clusters_data:
-            article_ids = cluster_info.get("article_ids", [])
-            all_clustered_ids.update([i for i in article_ids if isinstance(i, int) and 0 <= i < len(articles)])
-        
-        missed_ids = set(range(len(articles))) - all_clustered_ids
-        if missed_ids:
-            logger.warning(f"LLM missed {len(missed_ids)} articles (IDs: {sorted(missed_ids)}). Redistributing intelligently...")
-            
-            # Strategy: Distribute missed articles to existing clusters based on similarity
-            if clusters and len(missed_ids) <= len(articles) // 2:  # If not too many missed
-                # Distribute evenly across existing clusters
-                missed_list = list(missed_ids)
-                for i, missed_id in enumerate(missed_list):
-                    target_cluster = i % len(clusters_data)
-                    clusters_data[target_cluster]["article_ids"].append(missed_id)
-                    logger.debug(f"Added missed article {missed_id} to cluster '{clusters_data[target_cluster]['topic_name']}'")
-                
-                # Rebuild clusters with redistributed articles
-                clusters = []
-                for cluster_info in clusters_data:
-                    article_ids = cluster_info.get("article_ids", [])
-                    valid_article_ids = [i for i in article_ids if isinstance(i, int) and 0 <= i < len(articles)]
-                    cluster_articles = [articles[i] for i in valid_article_ids]
-                    
-                    cluster = {
-                        "topic_name": cluster_info.get("topic_name", "Unknown Topic"),
-                        "description": cluster_info.get("description", ""),
-                        "articles": cluster_articles,
-                        "article_count": len(cluster_articles)
-                    }
-                    clusters.append(cluster)
-                    logger.info(f"Redistributed cluster '{cluster['topic_name']}': {cluster['article_count']} articles")
-                
-            else:
-                # Too many missed articles - create separate cluster
-                missed_articles = [articles[i] for i in missed_ids]
-                clusters.append({
-                    "topic_name": "Additional AI Topics",
-                    "description": "Additional articles that required separate clustering",
-                    "articles": missed_articles,
-                    "article_count": len(missed_articles)
-                })
-                logger.info(f"Created 'Additional AI Topics' cluster with {len(missed_articles)} missed articles")
-        
-        # Final verification
-        total_clustered = sum(cluster['article_count'] for cluster in clusters)
-        if total_clustered != len(articles):
-            logger.error(f"CLUSTERING VALIDATION FAILED: {total_clustered} clustered != {len(articles)} input articles")
-        else:
-            logger.info(f"CLUSTERING VALIDATION PASSED: All {len(articles)} articles successfully clustered")
-        
-        # Sort by article count (most articles first)
-        clusters.sort(key=lambda x: x['article_count'], reverse=True)
+        clusters = _assemble_llm_clusters(clusters_data, articles)
         
         return clusters
         
     except Exception as e:
         logger.error(f"Clustering failed: {str(e)}")
+        
+        if MiniBatchKMeans is not None and len(articles) > 1:
+            try:
+                logger.warning("Using fallback: KMeans on cached embeddings")
+                return _kmeans_fallback_clusters(articles, max_clusters)
+            except Exception as fallback_error:
+                logger.error(f"KMeans fallback failed: {str(fallback_error)}")
+        
         # Fallback: create one cluster with all articles
         logger.warning("Using fallback: single cluster with all articles")
         return [{
@@ -343,35 +779,121 @@ If verification fails, revise your clustering until all {len(articles)} articles
         }]
 
 
+def _fused_request(articles: List[Dict[str, Any]], max_clusters: int) -> Dict[str, Any]:
+    """Chat completion arguments for summarize_and_cluster's combined call."""
+    lines = "\n".join(
+        f"{i}|{squash_whitespace(article.get('title') or 'No Title')[:80]}|"
+        f"{truncate_tokens(squash_whitespace(article.get('content') or ''), FUSED_CONTENT_TOKENS)}"
+        for i, article in enumerate(articles)
+    )
+    prompt = f"""{FUSED_INSTRUCTIONS}
+Make 2-{max_clusters} clusters covering all {len(articles)} articles (indices 0 to {len(articles)-1}).
+
+Articles, one per line as index|title|content:
+{lines}
+"""
+    return {
+        "model": get_small_deployment(),
+        "messages": [
+            *get_system_messages("summarize_and_cluster"),
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": FUSED_MAX_TOKENS,
+        "response_format": json_response_format("summarize_and_cluster", FUSED_SCHEMA)
+    }
+
+
+def _fused_result(content: str, articles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Summarized article copies and clusters from a summarize_and_cluster reply."""
+    logger = get_logger("clustering")
+    result = orjson.loads(content)
+    
+    summaries = {}
+    for entry in result.get("s", []):
+        if isinstance(entry, dict) and isinstance(entry.get("id"), int) and entry.get("s"):
+            summaries[entry["id"]] = str(entry["s"]).strip()
+    if len(summaries) < len(articles):
+        logger.warning(f"Combined call summarized {len(summaries)}/{len(articles)} articles; using fallbacks for the rest")
+    
+    summarized_articles = []
+    for i, article in enumerate(articles):
+        summary = summaries.get(i)
+        if summary is None:
+            title = article.get('title', 'No Title')
+            summary = _fallback_article_summary(title, squash_whitespace(article.get('content') or '')[:1000])
+        summarized_articles.append({**article, 'ai_summary': summary})
+    
+    return summarized_articles, _assemble_llm_clusters(result.get("clusters", []), summarized_articles)
+
+
 @observe()
 @log_performance
-def summarize_cluster(cluster: Dict[str, Any]) -> Dict[str, Any]:
+async def asummarize_and_cluster(articles: List[Dict[str, Any]],
+                                 max_clusters: int = 2) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
-    Generate a detailed summary for a single topic cluster.
+    Summarize and cluster articles, in a single LLM call when the batch is small.
+    
+    Up to FUSED_MAX_ARTICLES unique articles (near-duplicates collapsed) are
+    summarized and clustered by one structured prompt, saving the per-article summary round-trips. Larger
+    batches, or a failed combined call, go through asummarize_articles_batch
+    and cluster_articles instead.
     
     Args:
-        cluster: Cluster dictionary with 'topic_name', 'articles'
+        articles: List of article dictionaries
+        max_clusters: Maximum number of clusters to create
         
     Returns:
-        Dictionary with:
-            - topic_name: Topic name
-            - article_count: Number of articles
-            - summary: Generated summary text
-            - key_sources: List of main sources
+        (articles with 'ai_summary' added, clusters sorted by article_count, largest first)
     """
     logger = get_logger("clustering")
-    logger.info(f"Summarizing cluster: {cluster['topic_name']} ({cluster['article_count']} articles)")
     
+    unique_articles, duplicates = _split_duplicates(articles)
+    if 1 < len(unique_articles) <= FUSED_MAX_ARTICLES:
+        try:
+            logger.info(f"Summarizing and clustering {len(unique_articles)} articles in one call")
+            content = await achat_completion_json(get_async_client(), **_fused_request(unique_articles, max_clusters))
+            summarized, clusters = _fused_result(content, unique_articles)
+            
+            # Near-duplicates share their representative's summary and cluster
+            summarized_by_id = {}
+            summarized_duplicates = {}
+            for article, summarized_article in zip(unique_articles, summarized):
+                summarized_by_id[id(article)] = summarized_article
+                copies = [{**d, 'ai_summary': summarized_article['ai_summary']} for d in duplicates.get(id(article), ())]
+                if copies:
+                    summarized_duplicates[id(summarized_article)] = copies
+                    summarized_by_id.update(zip(map(id, duplicates[id(article)]), copies))
+            return ([summarized_by_id[id(article)] for article in articles],
+                    _restore_duplicates(clusters, summarized_duplicates))
+        except Exception as e:
+            logger.warning(f"Combined summarize+cluster call failed, using the two-stage pipeline: {str(e)}")
+    
+    summarized_articles = await asummarize_articles_batch(articles)
+    # cluster_articles blocks on embedding/LLM calls, keep it off the event loop
+    clusters = await asyncio.to_thread(cluster_articles, summarized_articles, max_clusters)
+    return summarized_articles, clusters
+
+
+def _is_cluster_report_cacheable(result: Dict[str, Any]) -> bool:
+    return not result['summary'].startswith("Summary unavailable.")
+
+
+def _cluster_report_request(cluster: Dict[str, Any]) -> Dict[str, Any]:
+    """Chat completion arguments for one cluster report."""
     topic_name = cluster['topic_name']
-    articles = cluster['articles']
     
     # Combine article content (limit to avoid token limits)
-    combined_content = "\n\n---\n\n".join([
-        f"Source: {a.get('link') or a.get('source_url', 'Unknown')}\n"
-        f"Title: {a.get('title', 'No Title')}\n"
-        f"Content: {a.get('content', '')[:500]}"  # Limit each article
-        for a in articles[:10]  # Max 10 articles per cluster
-    ])
+    parts = []
+    append = parts.append
+    for a in cluster['articles'][:10]:  # Max 10 articles per cluster
+        get = a.get
+        append(
+            f"Source: {get('link') or get('source_url', 'Unknown')}\n"
+            f"Title: {get('title', 'No Title')}\n"
+            f"Content: {truncate_tokens(squash_whitespace(get('content') or ''), CLUSTER_REPORT_CONTENT_TOKENS)}"  # Limit each article
+        )
+    combined_content = "\n\n---\n\n".join(parts)
     
     prompt = f"""Summarize the following articles about "{topic_name}".
 
@@ -384,121 +906,188 @@ Create a 3-paragraph summary that:
 
 Keep it concise but informative."""
 
-    try:
-        logger.debug(f"Generating summary for {topic_name}")
-        
-        response = client.chat.completions.create(
-            model=DEPLOYMENT,
-            messages=[
-                {"role": "system", "content": "You are an expert AI news analyst who creates insightful, balanced summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        summary_text = response.choices[0].message.content
-        
-        # Extract unique sources - prefer 'link' over 'source_url'
-        sources = list(set(a.get('link') or a.get('source_url', 'Unknown') for a in articles))
-        
-        logger.info(f"Generated summary for {topic_name}: {len(summary_text)} chars")
-        
-        return {
-            "topic_name": topic_name,
-            "article_count": cluster['article_count'],
-            "summary": summary_text,
-            "key_sources": sources[:5]  # Top 5 sources
-        }
+    return {
+        "model": get_small_deployment(),
+        "messages": [
+            *get_system_messages("cluster_report"),
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 500
+    }
+
+
+def _cluster_report(cluster: Dict[str, Any], summary_text: str) -> Dict[str, Any]:
+    """Report dictionary for a cluster and its generated summary."""
+    # First 5 unique sources in article order - prefer 'link' over 'source_url'
+    sources = []
+    seen = set()
+    for a in cluster['articles']:
+        source = a.get('link') or a.get('source_url', 'Unknown')
+        if source not in seen:
+            seen.add(source)
+            sources.append(source)
+            if len(sources) == 5:
+                break
+    
+    get_logger("clustering").info(f"Generated summary for {cluster['topic_name']}: {len(summary_text)} chars")
+    
+    return {
+        "topic_name": cluster['topic_name'],
+        "article_count": cluster['article_count'],
+        "summary": summary_text,
+        "key_sources": sources
+    }
+
+
+def _failed_cluster_report(cluster: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    topic_name = cluster['topic_name']
+    get_logger("clustering").error(f"Failed to summarize cluster {topic_name}: {str(error)}")
+    return {
+        "topic_name": topic_name,
+        "article_count": cluster['article_count'],
+        "summary": f"Summary unavailable. This cluster contains {cluster['article_count']} articles about {topic_name}.",
+        "key_sources": []
+    }
+
+
+@disk_cached("cluster_reports", cluster_cache_key, _is_cluster_report_cacheable)
+@observe()
+@log_performance
+def summarize_cluster(cluster: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate a detailed summary for a single topic cluster.
+    
+    Args:
+        cluster: Cluster dictionary with 'topic_name', 'articles'
         
+    Returns:
+        Dictionary with:
+            - topic_name: Topic name
+            - article_count: Number of articles
+            - summary: Generated summary text
+            - key_sources: List of main sources
+    """
+    logger = get_logger("clustering")
+    logger.info(f"Summarizing cluster: {cluster['topic_name']} ({cluster['article_count']} articles)")
+    
+    try:
+        logger.debug(f"Generating summary for {cluster['topic_name']}")
+        response = chat_completion(get_client(), **_cluster_report_request(cluster))
+        return _cluster_report(cluster, response.choices[0].message.content)
     except Exception as e:
-        logger.error(f"Failed to summarize cluster {topic_name}: {str(e)}")
-        return {
-            "topic_name": topic_name,
-            "article_count": cluster['article_count'],
-            "summary": f"Summary unavailable. This cluster contains {cluster['article_count']} articles about {topic_name}.",
-            "key_sources": []
-        }
+        return _failed_cluster_report(cluster, e)
 
 
-# @observe()
-# @log_performance
-# def generate_final_overview(cluster_summaries: List[Dict[str, Any]], top_n: int = 5) -> str:
-#     """
-#     Generate final overview of top N trending topics.
+def generate_final_overview(cluster_summaries: List[Dict[str, Any]], top_n: int = 5) -> Iterator[str]:
+    """
+    Generate final overview of top N trending topics, streamed as it is written.
     
-#     Args:
-#         cluster_summaries: List of cluster summary dictionaries
-#         top_n: Number of top topics to include
+    The completion is requested with stream=True and text chunks are yielded
+    as they arrive, so callers can render the overview incrementally. A
+    finished overview is cached by the ranked clusters' content; unchanged
+    inputs replay it without an LLM call.
+    
+    Args:
+        cluster_summaries: List of cluster summary dictionaries, sorted by
+            article_count descending (the order cluster_articles returns)
+        top_n: Number of top topics to include
         
-#     Returns:
-#         Formatted string with top trending topics
-#     """
-#     logger = get_logger("clustering")
-#     logger.info(f"Generating final overview of top {top_n} topics from {len(cluster_summaries)} clusters")
+    Yields:
+        Chunks of the formatted overview text
+    """
+    logger = get_logger("clustering")
+    logger.info(f"Generating final overview of top {top_n} topics from {len(cluster_summaries)} clusters")
     
-#     # Sort by article count to get top trending
-#     sorted_clusters = sorted(cluster_summaries, key=lambda x: x['article_count'], reverse=True)
-#     top_clusters = sorted_clusters[:top_n]
+    # Already ordered by article count (most articles first), so the top
+    # trending topics are the first top_n
+    assert all(
+        a['article_count'] >= b['article_count'] for a, b in zip(cluster_summaries, cluster_summaries[1:])
+    ), "cluster_summaries must be sorted by article_count descending"
+    top_clusters = cluster_summaries[:top_n]
     
-#     # Prepare input for LLM
-#     cluster_info = []
-#     for i, cluster in enumerate(top_clusters):
-#         cluster_info.append({
-#             "rank": i + 1,
-#             "topic": cluster['topic_name'],
-#             "articles": cluster['article_count'],
-#             "summary": cluster['summary'],
-#             "sources": cluster.get('key_sources', [])[:3]
-#         })
+    cache_key = content_hash([get_deployment(), FINAL_OVERVIEW_CACHE_VERSION] + [
+        (cluster['topic_name'], cluster['article_count'], content_hash(cluster['summary']))
+        for cluster in top_clusters
+    ])
+    cached = cache_load("final_overviews", cache_key)
+    if cached is not None:
+        logger.info("Using cached final overview")
+        yield cached
+        return
     
-#     prompt = f"""Create a final overview of the top {top_n} trending AI topics based on the following cluster summaries:
+    # Prepare input for LLM: compact records (t=topic, n=article count,
+    # s=summary cut to 80 words, src=sources), listed in rank order
+    cluster_info = [
+        {
+            "t": cluster['topic_name'],
+            "n": cluster['article_count'],
+            "s": " ".join(cluster['summary'].split()[:80]),
+            "src": (cluster.get('key_sources') or cluster.get('sources') or [])[:3]
+        }
+        for cluster in top_clusters
+    ]
+    
+    prompt = f"""Create a final overview of the top {top_n} trending AI topics based on the following cluster summaries, listed by rank (t=topic, n=article count, s=summary, src=sources):
 
-# {json.dumps(cluster_info, indent=2)}
+{orjson.dumps(cluster_info).decode()}
 
-# Format the output as:
+Format the output as:
 
-# **Overview**
-# [2-3 sentence overview of the overall landscape]
+**Overview**
+[2-3 sentence overview of the overall landscape]
 
-# **Top {top_n} Trending Topics:**
+**Top {top_n} Trending Topics:**
 
-# 1. **[Topic Name]** ({len} articles)
-#    [3-4 sentence summary]
+1. **[Topic Name]** ([N] articles)
+   [3-4 sentence summary]
    
-#    Key sources: [list sources]
+   Key sources: [list sources]
 
-# 2. **[Topic Name]** ({len} articles)
-#    ...
+2. **[Topic Name]** ([N] articles)
+   ...
 
-# Make it engaging and insightful. Highlight connections between topics if relevant."""
+Make it engaging and insightful. Highlight connections between topics if relevant."""
 
-#     try:
-#         logger.debug("Generating final overview")
-        
-#         response = client.chat.completions.create(
-#             model=DEPLOYMENT,
-#             messages=[
-#                 {"role": "system", "content": "You are an expert at synthesizing AI news trends into clear, compelling narratives."},
-#                 {"role": "user", "content": prompt}
-#             ],
-#             temperature=0.7,
-#             max_tokens=1500
-#         )
+    parts = []
+    try:
+        logger.debug("Generating final overview")
         
-#         overview = response.choices[0].message.content
+        response = chat_completion(
+            get_client(),
+            model=get_deployment(),
+            messages=[
+                *get_system_messages("overview"),
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=1500,
+            stream=True
+        )
         
-#         logger.info(f"Generated final overview: {len(overview)} chars")
+        for chunk in response:
+            # Azure sends a leading chunk with content filter results and no choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
         
-#         return overview
+        overview = "".join(parts)
+        logger.info(f"Generated final overview: {len(overview)} chars")
+        cache_store("final_overviews", cache_key, overview)
         
-#     except Exception as e:
-#         logger.error(f"Failed to generate final overview: {str(e)}")
+    except Exception as e:
+        logger.error(f"Failed to generate final overview: {str(e)}")
+        if parts:
+            # Part of the overview was already sent; stop there
+            return
         
-#         # Fallback: simple formatting
-#         fallback = f"**Top {top_n} Trending AI Topics**\n\n"
-#         for i, cluster in enumerate(top_clusters):
-#             fallback += f"{i+1}. **{cluster['topic_name']}** ({cluster['article_count']} articles)\n"
-#             fallback += f"   {cluster['summary'][:200]}...\n\n"
+        # Fallback: simple formatting
+        fallback = f"**Top {top_n} Trending AI Topics**\n\n"
+        for i, cluster in enumerate(top_clusters):
+            fallback += f"{i+1}. **{cluster['topic_name']}** ({cluster['article_count']} articles)\n"
+            fallback += f"   {cluster['summary'][:200]}...\n\n"
         
-#         return fallback
\ No newline at end of file
+        yield fallback
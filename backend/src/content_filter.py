@@ -1,21 +1,215 @@
+import asyncio
+import logging
 import os
-from openai import AzureOpenAI
-from langfuse import observe, Langfuse
-from typing import List, Dict, Any
-import json
+import re
+from langfuse import observe
+from typing import List, Dict, Any, Tuple
+import orjson
 from utils.logger import get_logger, log_performance
-from dotenv import load_dotenv, find_dotenv
+from src.dedup import near_duplicate_groups
+from src.llm_call import (
+    achat_completion_json, chat_completion_json, estimate_tokens, json_response_format, squash_whitespace,
+    truncate_tokens,
+)
+from src.llm_client import get_async_client, get_client, get_deployment, get_prompt
+from utils.disk_cache import disk_cached
 
-load_dotenv(find_dotenv())
+try:
+    import ahocorasick
+except ImportError:  # the keyword pre-filter uses a compiled regex instead
+    ahocorasick = None
+
+try:
+    import re2  # google-re2: linear-time DFA matching for the regex fallback
+except ImportError:
+    re2 = None
+
+
+# Static part of the fallback filter prompt. It comes first and the per-chunk
+# articles last, so the prefix is identical across calls (prompt caching).
+AI_FILTER_INSTRUCTIONS = """You are an expert at identifying AI-related content. Review the articles below and determine which ones are relevant to artificial intelligence, machine learning, automation, or related technologies.
+
+Return JSON: {"ai_relevant_ids": [ids of the AI-related articles]}
+
+AI-related topics include:
+- Artificial Intelligence, Machine Learning, Deep Learning
+- AI applications (healthcare AI, autonomous vehicles, etc.)
+- AI ethics, regulation, governance
+- AI companies, startups, funding
+- AI research, models, algorithms
+- Automation and robotics
+- Natural language processing, computer vision
+- AI tools and platforms
+
+Exclude articles about:
+- General technology without AI focus
+- Politics/economics unless directly about AI policy
+- Entertainment unless about AI in media/gaming
+- Sports, lifestyle, travel, etc.
+"""
+
+AI_FILTER_SYSTEM_PROMPT = "You are an expert at identifying AI-related content. Be precise and only include articles that genuinely discuss AI technologies."
+
+# Bump to invalidate cached relevance decisions when the filter prompt changes
+AI_FILTER_CACHE_VERSION = 3
+
+# Strict structured output for the filter reply
+AI_FILTER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ai_relevant_ids": {"type": "array", "items": {"type": "integer"}}
+    },
+    "required": ["ai_relevant_ids"],
+    "additionalProperties": False
+}
+
+# Articles are packed into chunks by snippet tokens rather than a fixed count,
+# so the static instruction prefix is amortized over as many articles as fit
+AI_FILTER_CHUNK_TOKENS = 6000
+AI_FILTER_MAX_CHUNK = 100  # keeps the id list in the response short
+AI_FILTER_SNIPPET_TOKENS = 80
+
+# Concurrent filter requests in flight at once (bounded by Azure RPM/TPM quotas)
+AI_FILTER_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "16"))
+
+
+def _filter_cache_key(article_summaries: List[Dict[str, Any]]) -> List[Any]:
+    return [get_deployment(), AI_FILTER_CACHE_VERSION, article_summaries]
+
+
+def _filter_prompt(article_summaries: List[Dict[str, Any]]) -> str:
+    """Langfuse AI filter prompt for one chunk, or the hardcoded fallback."""
+    logger = get_logger("content_filter")
+    articles_json = orjson.dumps(article_summaries).decode()
+
+    # Get prompt from Langfuse with fallback
+    try:
+        prompt_template = get_prompt("trendmind-ai-filter-prompt")
+        prompt = prompt_template.compile(
+            articles_json=articles_json
+        )
+        logger.debug(f"Using Langfuse AI filter prompt version: {prompt_template.version}")
+    except Exception as e:
+        logger.warning(f"Failed to fetch Langfuse AI filter prompt, using fallback: {e}")
+        # Fallback to hardcoded prompt
+        prompt = f"""{AI_FILTER_INSTRUCTIONS}
+Articles to evaluate:
+{articles_json}
+"""
+    return prompt
+
+
+def _filter_request(prompt: str) -> Dict[str, Any]:
+    """Chat completion arguments for one filter chunk (shared by the sync and async paths)."""
+    return {
+        "model": get_deployment(),
+        "messages": [
+            {"role": "system", "content": AI_FILTER_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.1,  # Low temperature for consistent classification
+        "response_format": json_response_format("ai_filter", AI_FILTER_SCHEMA)
+    }
+
+
+def _relevant_ids(content: str) -> List[int]:
+    result = orjson.loads(content)
+    return sorted(set(result.get("ai_relevant_ids", [])))
+
+
+@disk_cached("ai_filter", _filter_cache_key)
+def _classify_chunk(article_summaries: List[Dict[str, Any]]) -> List[int]:
+    """
+    Ask the LLM which articles of one chunk are AI-related.
+
+    Decisions are cached on disk by chunk content, so re-runs over the same
+    articles skip the call. Failures raise and are not cached.
+
+    Args:
+        article_summaries: Chunk entries with 'id' (index within the chunk), 'title', 'snippet'
+
+    Returns:
+        Sorted ids of the AI-relevant articles
+    """
+    prompt = _filter_prompt(article_summaries)
+    get_logger("content_filter").debug("Sending AI filtering request to LLM")
+    return _relevant_ids(chat_completion_json(get_client(), **_filter_request(prompt)))
+
+
+@disk_cached("ai_filter", _filter_cache_key)
+async def _aclassify_chunk(article_summaries: List[Dict[str, Any]]) -> List[int]:
+    """Async version of _classify_chunk (shares its cache entries)."""
+    # The Langfuse prompt fetch is blocking, keep it off the event loop
+    prompt = await asyncio.to_thread(_filter_prompt, article_summaries)
+    get_logger("content_filter").debug("Sending AI filtering request to LLM")
+    return _relevant_ids(await achat_completion_json(get_async_client(), **_filter_request(prompt)))
+
+
+def _pack_chunks(articles: List[Dict[str, Any]]) -> List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """
+    Split articles into filter chunks of at most AI_FILTER_CHUNK_TOKENS snippet tokens.
+
+    Args:
+        articles: List of article dictionaries
+
+    Returns:
+        (chunk articles, chunk summaries) pairs in input order; summary ids are
+        chunk-local so cached decisions don't depend on the chunk's position in the run
+    """
+    chunks = []
+    chunk, summaries, chunk_tokens = [], [], 0
+    for article in articles:
+        summary = {
+            "id": len(chunk),
+            "title": article.get('title', 'No Title'),
+            "snippet": truncate_tokens(squash_whitespace(article.get('content') or ''), AI_FILTER_SNIPPET_TOKENS)
+        }
+        tokens = estimate_tokens(orjson.dumps(summary).decode())
+        if chunk and (chunk_tokens + tokens > AI_FILTER_CHUNK_TOKENS or len(chunk) >= AI_FILTER_MAX_CHUNK):
+            chunks.append((chunk, summaries))
+            chunk, summaries, chunk_tokens = [], [], 0
+            summary["id"] = 0
+        chunk.append(article)
+        summaries.append(summary)
+        chunk_tokens += tokens
+    if chunk:
+        chunks.append((chunk, summaries))
+    return chunks
+
+
+def _keep_relevant(chunk: List[Dict[str, Any]], relevant_ids: List[int]) -> List[Dict[str, Any]]:
+    """Articles of a chunk whose chunk-local ids were classified as AI-related."""
+    logger = get_logger("content_filter")
+    relevant_ids = set(relevant_ids)
+    logger.debug(f"LLM identified {len(relevant_ids)} AI-relevant articles out of {len(chunk)}")
+
+    kept = []
+    for idx, article in enumerate(chunk):
+        if idx in relevant_ids:
+            kept.append(article)
+            logger.debug(f"Kept article: {article.get('title', 'No Title')[:50]}...")
+        else:
+            logger.debug(f"Filtered out: {article.get('title', 'No Title')[:50]}...")
+    return kept
 
-# Initialize clients
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-)
-langfuse = Langfuse()
-DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+
+def _with_duplicates(articles: List[Dict[str, Any]], groups: List[List[int]],
+                     kept_representatives: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Articles (in input order) whose near-duplicate group representative was kept."""
+    kept = {id(article) for article in kept_representatives}
+    keep = [False] * len(articles)
+    for members in groups:
+        if id(articles[members[0]]) in kept:
+            for i in members:
+                keep[i] = True
+    return [article for article, keep_it in zip(articles, keep) if keep_it]
+
+
+def _log_filter_result(filtered_articles: List[Dict[str, Any]], articles: List[Dict[str, Any]]) -> None:
+    get_logger("content_filter").info(
+        f"AI relevance filtering complete: {len(filtered_articles)} relevant articles out of {len(articles)} total "
+        f"({len(filtered_articles)/len(articles)*100:.1f}%)"
+    )
 
 
 @observe()
@@ -37,98 +231,114 @@ def filter_ai_relevant_articles(articles: List[Dict[str, Any]]) -> List[Dict[str
     if not articles:
         return articles
     
-    # Prepare articles for batch processing (process in chunks to avoid token limits)
-    chunk_size = 20  # Process 20 articles at a time
+    # Only one article per near-duplicate group is classified
+    groups = near_duplicate_groups(articles)
     filtered_articles = []
     
-    for i in range(0, len(articles), chunk_size):
-        chunk = articles[i:i + chunk_size]
-        logger.debug(f"Processing chunk {i//chunk_size + 1}: articles {i+1}-{min(i+chunk_size, len(articles))}")
-        
-        # Prepare article summaries for filtering
-        article_summaries = []
-        for idx, article in enumerate(chunk):
-            summary = {
-                "id": i + idx,
-                "title": article.get('title', 'No Title'),
-                "snippet": article.get('content', '')[:300]  # First 300 chars
-            }
-            article_summaries.append(summary)
-        
-        # Get prompt from Langfuse with fallback
+    for n, (chunk, article_summaries) in enumerate(_pack_chunks([articles[g[0]] for g in groups]), start=1):
+        logger.debug(f"Processing chunk {n}: {len(chunk)} articles")
         try:
-            prompt_template = langfuse.get_prompt("trendmind-ai-filter-prompt", label="latest")
-            prompt = prompt_template.compile(
-                articles_json=json.dumps(article_summaries, indent=2)
-            )
-            logger.debug(f"Using Langfuse AI filter prompt version: {prompt_template.version}")
+            filtered_articles.extend(_keep_relevant(chunk, _classify_chunk(article_summaries)))
         except Exception as e:
-            logger.warning(f"Failed to fetch Langfuse AI filter prompt, using fallback: {e}")
-            # Fallback to hardcoded prompt
-            prompt = f"""You are an expert at identifying AI-related content. Review these articles and determine which ones are relevant to artificial intelligence, machine learning, automation, or related technologies.
-
-Articles to evaluate:
-{json.dumps(article_summaries, indent=2)}
-
-Return a JSON object with ONLY the IDs of articles that are AI-related:
-{{
-  "ai_relevant_ids": [0, 2, 5, 7]
-}}
-
-AI-related topics include:
-- Artificial Intelligence, Machine Learning, Deep Learning
-- AI applications (healthcare AI, autonomous vehicles, etc.)
-- AI ethics, regulation, governance
-- AI companies, startups, funding
-- AI research, models, algorithms
-- Automation and robotics
-- Natural language processing, computer vision
-- AI tools and platforms
+            logger.error(f"AI filtering failed for chunk {n}: {str(e)}")
+            logger.warning("Using fallback: keeping all articles in this chunk")
+            filtered_articles.extend(chunk)
+    
+    filtered_articles = _with_duplicates(articles, groups, filtered_articles)
+    _log_filter_result(filtered_articles, articles)
+    return filtered_articles
 
-Exclude articles about:
-- General technology without AI focus
-- Politics/economics unless directly about AI policy
-- Entertainment unless about AI in media/gaming
-- Sports, lifestyle, travel, etc.
-"""
 
-        try:
-            logger.debug("Sending AI filtering request to LLM")
-            
-            response = client.chat.completions.create(
-                model=DEPLOYMENT,
-                messages=[
-                    {"role": "system", "content": "You are an expert at identifying AI-related content. Be precise and only include articles that genuinely discuss AI technologies."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Low temperature for consistent classification
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            relevant_ids = set(result.get("ai_relevant_ids", []))
-            
-            logger.debug(f"LLM identified {len(relevant_ids)} AI-relevant articles out of {len(chunk)}")
-            
-            # Add relevant articles from this chunk
-            for idx, article in enumerate(chunk):
-                global_idx = i + idx
-                if global_idx in relevant_ids:
-                    filtered_articles.append(article)
-                    logger.debug(f"Kept article: {article.get('title', 'No Title')[:50]}...")
-                else:
-                    logger.debug(f"Filtered out: {article.get('title', 'No Title')[:50]}...")
-            
-        except Exception as e:
-            logger.error(f"AI filtering failed for chunk {i//chunk_size + 1}: {str(e)}")
+@observe()
+@log_performance
+async def afilter_ai_relevant_articles(articles: List[Dict[str, Any]],
+                                      concurrency: int = AI_FILTER_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Async version of filter_ai_relevant_articles: all chunks are classified
+    concurrently, at most ``concurrency`` LLM calls at a time.
+    
+    Args:
+        articles: List of article dictionaries with 'title', 'content', 'source_url'
+        concurrency: Maximum number of in-flight filter requests
+        
+    Returns:
+        List of filtered articles that are AI-relevant, in input order
+    """
+    logger = get_logger("content_filter")
+    logger.info(f"Starting AI relevance filtering for {len(articles)} articles")
+    
+    if not articles:
+        return articles
+    
+    # Only one article per near-duplicate group is classified
+    groups = near_duplicate_groups(articles)
+    chunks = _pack_chunks([articles[g[0]] for g in groups])
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def bounded(article_summaries):
+        async with semaphore:
+            return await _aclassify_chunk(article_summaries)
+    
+    results = await asyncio.gather(
+        *(bounded(article_summaries) for _, article_summaries in chunks), return_exceptions=True
+    )
+    
+    filtered_articles = []
+    for n, ((chunk, _), result) in enumerate(zip(chunks, results), start=1):
+        if isinstance(result, Exception):
+            logger.error(f"AI filtering failed for chunk {n}: {str(result)}")
             logger.warning("Using fallback: keeping all articles in this chunk")
             filtered_articles.extend(chunk)
+        else:
+            filtered_articles.extend(_keep_relevant(chunk, result))
     
-    logger.info(f"AI relevance filtering complete: {len(filtered_articles)} relevant articles out of {len(articles)} total ({len(filtered_articles)/len(articles)*100:.1f}%)")
-    
+    filtered_articles = _with_duplicates(articles, groups, filtered_articles)
+    _log_filter_result(filtered_articles, articles)
     return filtered_articles
 
 
+# AI-related keywords for quick_ai_keyword_filter (matched as lowercase substrings)
+AI_KEYWORDS = (
+    'artificial intelligence', 'machine learning', 'deep learning', 'neural network',
+    'ai', 'ml', 'llm', 'gpt', 'chatgpt', 'openai', 'anthropic', 'claude',
+    'automation', 'algorithm', 'model', 'training', 'inference', 'embedding',
+    'computer vision', 'nlp', 'natural language', 'robotics', 'autonomous',
+    'generative', 'transformer', 'diffusion', 'stable diffusion', 'midjourney',
+    'langchain', 'hugging face', 'tensorflow', 'pytorch', 'scikit-learn',
+    'recommendation system', 'predictive', 'classification', 'regression',
+    'supervised', 'unsupervised', 'reinforcement learning', 'gan', 'vae'
+)
+
+
+# Only the start of the content is scanned; AI articles name their subject early
+KEYWORD_SCAN_CHARS = 4000
+
+
+def _build_keyword_matcher():
+    """
+    Single-pass matcher for AI_KEYWORDS: an Aho-Corasick automaton, else a
+    regex alternation compiled with re2 (DFA) or, failing that, re.
+    """
+    # Only whether any keyword occurs matters, so keywords containing a shorter
+    # one ('openai' -> 'ai', 'chatgpt' -> 'gpt') can never change the outcome
+    keywords = [
+        keyword for keyword in dict.fromkeys(AI_KEYWORDS)
+        if not any(other != keyword and other in keyword for other in AI_KEYWORDS)
+    ]
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text), None) is not None
+    regex = re2 if re2 is not None else re
+    pattern = regex.compile("|".join(regex.escape(keyword) for keyword in keywords))
+    return lambda text: pattern.search(text) is not None
+
+
+_has_ai_keyword = _build_keyword_matcher()
+
+
 @observe()
 @log_performance  
 def quick_ai_keyword_filter(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -145,40 +355,33 @@ def quick_ai_keyword_filter(articles: List[Dict[str, Any]]) -> List[Dict[str, An
     logger = get_logger("content_filter")
     logger.info(f"Starting keyword pre-filtering for {len(articles)} articles")
     
-    # AI-related keywords (case insensitive)
-    ai_keywords = {
-        'artificial intelligence', 'machine learning', 'deep learning', 'neural network',
-        'ai', 'ml', 'llm', 'gpt', 'chatgpt', 'openai', 'anthropic', 'claude',
-        'automation', 'algorithm', 'model', 'training', 'inference', 'embedding',
-        'computer vision', 'nlp', 'natural language', 'robotics', 'autonomous',
-        'generative', 'transformer', 'diffusion', 'stable diffusion', 'midjourney',
-        'langchain', 'hugging face', 'tensorflow', 'pytorch', 'scikit-learn',
-        'recommendation system', 'predictive', 'classification', 'regression',
-        'supervised', 'unsupervised', 'reinforcement learning', 'gan', 'vae'
-    }
+    if not articles:
+        return []
     
+    # Per-article debug lines are only formatted when debug logging is on;
+    # otherwise the loop is one keyword scan per field
+    debug = logger.isEnabledFor(logging.DEBUG)
+    has_ai_keyword = _has_ai_keyword
     filtered_articles = []
+    append = filtered_articles.append
     
     for i, article in enumerate(articles):
         # Skip None articles or articles without required structure
         if not article or not isinstance(article, dict):
             logger.warning(f"Skipping invalid article at index {i}: {type(article)}")
             continue
-            
-        title = (article.get('title') or '').lower()
-        content = (article.get('content') or '').lower()
-        combined_text = f"{title} {content}"
         
-        # Check if any AI keyword is present
-        has_ai_keyword = any(keyword in combined_text for keyword in ai_keywords)
-        
-        if has_ai_keyword:
-            filtered_articles.append(article)
-            # Handle tweets (no title) vs articles (with title)
-            display_text = article.get('title') or article.get('content', 'No Content')
-            logger.debug(f"Keyword match: {display_text[:50]}...")
-        else:
-            display_text = article.get('title') or article.get('content', 'No Content')
+        get = article.get
+        # Check if any AI keyword is present (title first, content only if needed)
+        if (has_ai_keyword((get('title') or '').lower())
+                or has_ai_keyword((get('content') or '')[:KEYWORD_SCAN_CHARS].lower())):
+            append(article)
+            if debug:
+                # Handle tweets (no title) vs articles (with title)
+                display_text = get('title') or get('content', 'No Content')
+                logger.debug(f"Keyword match: {display_text[:50]}...")
+        elif debug:
+            display_text = get('title') or get('content', 'No Content')
             logger.debug(f"No AI keywords: {display_text[:50]}...")
     
     logger.info(f"Keyword filtering complete: {len(filtered_articles)} articles passed out of {len(articles)} total ({len(filtered_articles)/len(articles)*100:.1f}%)")
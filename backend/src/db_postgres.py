@@ -1,33 +1,87 @@
+import asyncio
+import csv
+import io
+import threading
+import weakref
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
 import time
+from itertools import islice
 from dotenv import load_dotenv
 from utils.logger import get_logger, log_performance, log_database_metrics
 
 load_dotenv()
 
+# Rows per multi-row INSERT statement in insert_posts
+INSERT_PAGE_SIZE = 500
+# insert_posts loads batches at least this large with COPY (see _copy_rows)
+COPY_MIN_ROWS = 1000
+
+# Process-wide connection pool used by the helpers below (see get_conn)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises when exhausted; callers wait for a free slot instead
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+
+# Statements PREPAREd once per connection (session) and then EXECUTEd by name,
+# so repeated per-row calls skip parsing and planning
+PREPARED_STATEMENTS = {
+    # source_url is stripped on insert, so the column is compared as-is and
+    # the (source_url, published_date) unique index can serve the lookup
+    "article_exists": """
+        SELECT EXISTS(
+            SELECT 1 FROM articles
+            WHERE source_url = TRIM($1)
+            AND published_date = $2
+        )
+    """,
+    "insert_article": """
+        INSERT INTO articles (
+            source_type, source_url, title, content, link, published_date
+        )
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (source_url, published_date) DO NOTHING
+    """,
+}
+_prepared: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def _connection_params() -> Dict[str, Any]:
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": os.getenv("DB_PORT", "5432"),
+        "database": os.getenv("DB_NAME", "ai_news_tracker"),
+        "user": os.getenv("DB_USER", "postgres"),
+        "password": os.getenv("DB_PASSWORD"),
+        "cursor_factory": RealDictCursor,
+    }
+
+
 @log_performance
 def connect_postgres():
-    """Establish connection to PostgreSQL database."""
-    logger = get_logger("database")
+    """
+    Establish a dedicated (unpooled) connection to PostgreSQL.
     
-    db_host = os.getenv("DB_HOST", "localhost")
-    db_name = os.getenv("DB_NAME", "ai_news_tracker")
-    db_user = os.getenv("DB_USER", "postgres")
+    The helpers in this module use get_conn(); this is for scripts that
+    manage a connection's lifetime themselves.
+    """
+    logger = get_logger("database")
+    params = _connection_params()
     
-    logger.info(f"Connecting to PostgreSQL: {db_user}@{db_host}/{db_name}")
+    logger.info(f"Connecting to PostgreSQL: {params['user']}@{params['host']}/{params['database']}")
     
     try:
-        conn = psycopg2.connect(
-            host=db_host,
-            database=db_name,
-            user=db_user,
-            password=os.getenv("DB_PASSWORD"),
-            cursor_factory=RealDictCursor
-        )
+        conn = psycopg2.connect(**params)
         logger.info("Successfully connected to PostgreSQL database")
         return conn
         
@@ -36,6 +90,54 @@ def connect_postgres():
         raise
 
 
+def _get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                params = _connection_params()
+                get_logger("database").info(
+                    f"Creating PostgreSQL connection pool ({DB_POOL_MIN}-{DB_POOL_MAX}): "
+                    f"{params['user']}@{params['host']}/{params['database']}"
+                )
+                _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **params)
+    return _pool
+
+
+def _execute_prepared(cursor, name: str, params: Tuple) -> None:
+    """EXECUTE a PREPARED_STATEMENTS entry on cursor, preparing it first if this connection hasn't."""
+    with _prepared_lock:
+        prepared = _prepared.setdefault(cursor.connection, set())
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+        prepared.add(name)
+    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+
+@contextmanager
+def get_conn() -> Iterator[psycopg2.extensions.connection]:
+    """
+    Borrow a connection from the process-wide pool.
+    
+    The transaction is committed when the block exits normally and rolled
+    back on an exception; the connection then goes back to the pool (or is
+    discarded if it was closed by a server or network error). Blocks while
+    all DB_POOL_MAX connections are in use.
+    """
+    with _pool_slots:
+        pool = _get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+
+
 @log_performance
 def get_existing_articles(source_url: str, 
                           start_date: datetime, 
@@ -57,30 +159,26 @@ def get_existing_articles(source_url: str,
     start_time = time.time()
     
     try:
-        conn = connect_postgres()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT 
-                id,
-                source_type,
-                source_url,
-                title,
-                content,
-                link,
-                published_date,
-                scraped_date
-            FROM articles
-            WHERE source_url = %s
-            AND published_date BETWEEN %s AND %s
-            ORDER BY published_date DESC
-        """
-        
-        cursor.execute(query, (source_url, start_date, end_date))
-        results = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with get_conn() as conn, conn.cursor() as cursor:
+        
+            query = """
+                SELECT 
+                    id,
+                    source_type,
+                    source_url,
+                    title,
+                    content,
+                    link,
+                    published_date,
+                    scraped_date
+                FROM articles
+                WHERE source_url = %s
+                AND published_date BETWEEN %s AND %s
+                ORDER BY published_date DESC
+            """
+        
+            cursor.execute(query, (source_url.strip(), start_date, end_date))
+            results = cursor.fetchall()
         
         execution_time = time.time() - start_time
         logger.info(f"Found {len(results)} existing articles in {execution_time:.2f}s")
@@ -93,6 +191,64 @@ def get_existing_articles(source_url: str,
         logger.error(f"Failed to fetch existing articles after {execution_time:.2f}s: {str(e)}")
         raise
 
+@log_performance
+def get_existing_articles_many(source_urls: List[str],
+                               start_date: datetime,
+                               end_date: datetime) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch existing articles for several sources in a single query.
+    
+    Args:
+        source_urls: Source URLs/handles to fetch
+        start_date: Start of date range
+        end_date: End of date range
+        
+    Returns:
+        Dictionary mapping each requested source_url to its articles
+        (newest first); sources without articles map to an empty list
+    """
+    logger = get_logger("database")
+    logger.info(f"Fetching existing articles for {len(source_urls)} sources from {start_date} to {end_date}")
+    
+    start_time = time.time()
+    
+    try:
+        with get_conn() as conn, conn.cursor() as cursor:
+        
+            query = """
+                SELECT 
+                    id,
+                    source_type,
+                    source_url,
+                    title,
+                    content,
+                    link,
+                    published_date,
+                    scraped_date
+                FROM articles
+                WHERE source_url = ANY(%s)
+                AND published_date BETWEEN %s AND %s
+                ORDER BY published_date DESC
+            """
+        
+            cursor.execute(query, ([source_url.strip() for source_url in source_urls], start_date, end_date))
+            results = cursor.fetchall()
+        
+        by_source = {}
+        for row in results:
+            by_source.setdefault(row['source_url'], []).append(dict(row))
+        grouped = {source_url: by_source.get(source_url.strip(), []) for source_url in source_urls}
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Found {len(results)} existing articles across {len(source_urls)} sources in {execution_time:.2f}s")
+        
+        return grouped
+        
+    except Exception as e:
+        execution_time = time.time() - start_time
+        logger.error(f"Failed to fetch existing articles after {execution_time:.2f}s: {str(e)}")
+        raise
+
 @log_performance
 def article_exists(cursor, source_url: str, published_date: Optional[datetime]) -> bool:
     """
@@ -102,14 +258,7 @@ def article_exists(cursor, source_url: str, published_date: Optional[datetime])
     logger.debug(f"Checking article existence for {source_url} at {published_date}")
     
     try:
-        query = """
-            SELECT EXISTS(
-                SELECT 1 FROM articles
-                WHERE TRIM(source_url) = TRIM(%s)
-                AND published_date = %s
-            )
-        """
-        cursor.execute(query, (source_url, published_date))
+        _execute_prepared(cursor, "article_exists", (source_url, published_date))
         row = cursor.fetchone()
 
         if not row:
@@ -134,80 +283,193 @@ def article_exists(cursor, source_url: str, published_date: Optional[datetime])
         return False
 
 
-@log_performance
-def insert_posts(
-    articles: List[Dict[str, Any]],
-    cursor: Optional[psycopg2.extensions.cursor] = None,
-    conn: Optional[psycopg2.extensions.connection] = None
-) -> int:
+def _naive_utc(value: Any) -> Any:
     """
-    Insert multiple articles into the database.
+    Aware datetimes as naive UTC, the form published_date is stored and compared in.
+    
+    Postgres would otherwise convert them to the session TimeZone on INSERT
+    but drop the offset on COPY into the TIMESTAMP column.
+    """
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
-    Args:
-        articles: List of article dicts with keys:
-            - source_type, source_url, title, content, link, published_date
-        cursor: Optional existing DB cursor
-        conn: Optional existing DB connection
 
+def _copy_rows(cursor, rows: List[Tuple]) -> int:
+    """
+    COPY rows into a temporary staging table and merge them into ``articles``.
+    
+    COPY streams the rows as CSV instead of parsing per-row VALUES, and the
+    merge's ON CONFLICT DO NOTHING dedupes in the same round trip. Runs on
+    cursor without committing.
+    
+    Args:
+        cursor: DB cursor
+        rows: (source_type, source_url, title, content, link, published_date) tuples
+        
     Returns:
-        Number of articles inserted
+        Number of rows inserted
     """
-    logger = get_logger("database")
-    if not articles:
-        logger.info("No articles to insert")
-        return 0
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    
+    cursor.execute("""
+        CREATE TEMP TABLE articles_staging (
+            source_type VARCHAR(50),
+            source_url VARCHAR(500),
+            title TEXT,
+            content TEXT,
+            link VARCHAR(500),
+            published_date TIMESTAMP
+        ) ON COMMIT DROP
+    """)
+    # Unquoted empty fields load as NULL, except content which is NOT NULL
+    cursor.copy_expert(
+        """
+        COPY articles_staging (source_type, source_url, title, content, link, published_date)
+        FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (content))
+        """,
+        buf
+    )
+    cursor.execute("""
+        INSERT INTO articles (
+            source_type, source_url, title, content, link, published_date
+        )
+        SELECT source_type, source_url, title, content, link, published_date
+        FROM articles_staging
+        ON CONFLICT (source_url, published_date) DO NOTHING
+    """)
+    inserted = cursor.rowcount
+    # Dropped now rather than at commit, so the transaction can stage another batch
+    cursor.execute("DROP TABLE articles_staging")
+    return inserted
 
-    logger.info(f"Starting bulk insert of {len(articles)} articles")
-    start_time = time.time()
 
-    # Open connection if not provided
-    own_connection = False
-    if cursor is None or conn is None:
-        conn = connect_postgres()
-        cursor = conn.cursor()
-        own_connection = True
+def _insert_rows(cursor, articles: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Multi-row INSERT of articles on cursor, without committing.
+    
+    Returns:
+        (inserted, errors)
+    """
+    logger = get_logger("database")
 
+    # Rows already stored are filtered out by NOT EXISTS (an index probe on
+    # unique_article) before the insert, so they don't take a speculative
+    # insert or burn a sequence value; ON CONFLICT still covers duplicates
+    # within the batch and concurrent writers
     query = """
+        WITH input (source_type, source_url, title, content, link, published_date) AS (
+            VALUES %s
+        )
         INSERT INTO articles (
             source_type, source_url, title, content, link, published_date
         )
-        VALUES (%s, %s, %s, %s, %s, %s)
+        SELECT * FROM input
+        WHERE NOT EXISTS (
+            SELECT 1 FROM articles a
+            WHERE a.source_url = input.source_url
+              AND a.published_date = input.published_date
+        )
         ON CONFLICT (source_url, published_date) DO NOTHING
+        RETURNING id
     """
+    template = "(%s, %s, %s, %s, %s, %s::timestamp)"
 
-    inserted = 0
+    # Rows missing a required field are counted as errors instead of failing the batch
+    rows = []
     errors = 0
-
     for i, article in enumerate(articles):
         try:
             # Strip source_url to avoid whitespace issues
             source_url = article['source_url'].strip() if article.get('source_url') else None
-
-            cursor.execute(query, (
+            rows.append((
                 article['source_type'],
                 source_url,
                 article.get('title'),
                 article['content'],
                 article.get('link'),
-                article['published_date']
+                _naive_utc(article['published_date'])
             ))
-            if cursor.rowcount > 0:
-                inserted += 1
-                logger.debug(f"Inserted article {i+1}: {article.get('title', 'No title')}")
-            else:
-                logger.debug(f"Duplicate article skipped {i+1}: {article.get('title', 'No title')}")
-
-        except Exception as e:
+        except (KeyError, AttributeError) as e:
             errors += 1
-            logger.error(f"Error inserting article {i+1}: {e}")
-            conn.rollback()
-            continue
+            logger.error(f"Error inserting article {i+1}: missing or invalid field {e}")
+
+    # Large batches go through COPY; if that fails they take the INSERT path below
+    if len(rows) >= COPY_MIN_ROWS:
+        cursor.execute("SAVEPOINT copy_posts")
+        try:
+            inserted = _copy_rows(cursor, rows)
+            cursor.execute("RELEASE SAVEPOINT copy_posts")
+            return inserted, errors
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT copy_posts")
+            logger.warning(f"COPY of {len(rows)} rows failed, using multi-row INSERT: {str(e)}")
+
+    # One multi-row INSERT per INSERT_PAGE_SIZE rows, inside a savepoint so a
+    # failure doesn't abort the caller's transaction; a failed batch is
+    # retried row by row to isolate the bad rows
+    inserted = 0
+    cursor.execute("SAVEPOINT insert_posts")
+    try:
+        inserted = len(execute_values(
+            cursor, query, rows, template=template, page_size=INSERT_PAGE_SIZE, fetch=True
+        ))
+        cursor.execute("RELEASE SAVEPOINT insert_posts")
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT insert_posts")
+        logger.warning(f"Multi-row insert failed, retrying row by row: {str(e)}")
+        for i, row in enumerate(rows):
+            cursor.execute("SAVEPOINT insert_post")
+            try:
+                _execute_prepared(cursor, "insert_article", row)
+                inserted += cursor.rowcount
+            except psycopg2.Error as row_error:
+                errors += 1
+                logger.error(f"Error inserting row {i+1}: {row_error}")
+                cursor.execute("ROLLBACK TO SAVEPOINT insert_post")
+            cursor.execute("RELEASE SAVEPOINT insert_post")
+        cursor.execute("RELEASE SAVEPOINT insert_posts")
+
+    return inserted, errors
 
-    # Commit only if we opened the connection
-    if own_connection:
-        conn.commit()
-        cursor.close()
-        conn.close()
+
+@log_performance
+def insert_posts(
+    articles: List[Dict[str, Any]],
+    cursor: Optional[psycopg2.extensions.cursor] = None,
+    conn: Optional[psycopg2.extensions.connection] = None
+) -> int:
+    """
+    Insert multiple articles into the database.
+
+    Batches of COPY_MIN_ROWS or more are loaded with COPY (see _copy_rows),
+    smaller ones with multi-row INSERTs; duplicates are skipped either way.
+
+    Args:
+        articles: List of article dicts with keys:
+            - source_type, source_url, title, content, link, published_date
+        cursor: Optional existing DB cursor
+        conn: Optional existing DB connection
+
+    Returns:
+        Number of articles inserted
+    """
+    logger = get_logger("database")
+    if not articles:
+        logger.info("No articles to insert")
+        return 0
+
+    logger.info(f"Starting bulk insert of {len(articles)} articles")
+    start_time = time.time()
+
+    # Use a pooled connection if none is provided (committed on success)
+    if cursor is None or conn is None:
+        with get_conn() as conn, conn.cursor() as cursor:
+            inserted, errors = _insert_rows(cursor, articles)
+    else:
+        inserted, errors = _insert_rows(cursor, articles)
 
     execution_time = time.time() - start_time
     duplicates = len(articles) - inserted - errors
@@ -224,12 +486,72 @@ def insert_posts(
 
     return inserted
 
+@log_performance
+def bulk_copy_posts(articles: List[Dict[str, Any]]) -> int:
+    """
+    Bulk-load articles with COPY in a single transaction.
+    
+    Rows are streamed as CSV into a temporary staging table and then merged
+    into ``articles`` with ON CONFLICT DO NOTHING, so duplicates are skipped
+    exactly as in insert_posts.
+    
+    Args:
+        articles: List of article dicts with keys:
+            - source_type, source_url, title, content, link, published_date
+        
+    Returns:
+        Number of articles inserted
+    """
+    logger = get_logger("database")
+    if not articles:
+        logger.info("No articles to copy")
+        return 0
+    
+    logger.info(f"Starting COPY of {len(articles)} articles")
+    start_time = time.time()
+    
+    rows = []
+    for article in articles:
+        source_url = article.get('source_url')
+        rows.append((
+            article['source_type'],
+            source_url.strip() if source_url else None,
+            article.get('title'),
+            article.get('content') or '',
+            article.get('link'),
+            _naive_utc(article.get('published_date'))
+        ))
+    
+    try:
+        with get_conn() as conn, conn.cursor() as cursor:
+            inserted = _copy_rows(cursor, rows)
+        
+    except Exception as e:
+        execution_time = time.time() - start_time
+        logger.error(f"COPY of articles failed after {execution_time:.2f}s: {str(e)}")
+        raise
+    
+    execution_time = time.time() - start_time
+    logger.info(f"COPY completed: {inserted} inserted, {len(articles) - inserted} duplicates in {execution_time:.2f}s")
+    
+    log_database_metrics(
+        operation="copy_articles",
+        records_processed=len(articles),
+        records_successful=inserted,
+        execution_time=execution_time
+    )
+    
+    return inserted
+
 @log_performance
 def get_articles_for_processing(source_urls: List[str], 
                                 days_back: int = 7) -> List[Dict[str, Any]]:
     """
     Get all articles from specified sources for processing (clustering/summarization).
     
+    The whole result is loaded at once; iter_articles_for_processing streams
+    it in batches for large windows.
+    
     Args:
         source_urls: List of source URLs to fetch
         days_back: How many days back to fetch
@@ -243,14 +565,79 @@ def get_articles_for_processing(source_urls: List[str],
     start_time = time.time()
     
     try:
-        conn = connect_postgres()
-        cursor = conn.cursor()
+        with get_conn() as conn, conn.cursor() as cursor:
+        
+            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+            logger.debug(f"Using cutoff date: {cutoff_date}")
+        
+            # Use ANY for matching multiple source URLs
+            query = """
+                SELECT 
+                    id,
+                    source_type,
+                    source_url,
+                    title,
+                    content,
+                    link,
+                    published_date,
+                    scraped_date
+                FROM articles
+                WHERE source_url = ANY(%s)
+                AND published_date >= %s
+                ORDER BY published_date DESC
+            """
+        
+            cursor.execute(query, (source_urls, cutoff_date))
+            results = cursor.fetchall()
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-        logger.debug(f"Using cutoff date: {cutoff_date}")
+        execution_time = time.time() - start_time
+        logger.info(f"Retrieved {len(results)} articles for processing in {execution_time:.2f}s")
         
-        # Use ANY for matching multiple source URLs
-        query = """
+        # Log breakdown by source
+        if results:
+            source_counts = {}
+            for row in results:
+                source = row['source_url']
+                source_counts[source] = source_counts.get(source, 0) + 1
+            
+            logger.debug("Articles per source:")
+            for source, count in source_counts.items():
+                logger.debug(f"  {source}: {count} articles")
+        
+        return [dict(row) for row in results]
+        
+    except Exception as e:
+        execution_time = time.time() - start_time
+        logger.error(f"Failed to fetch articles for processing after {execution_time:.2f}s: {str(e)}")
+        raise
+
+
+def iter_articles_for_processing(source_urls: List[str],
+                                 days_back: int = 7,
+                                 batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream the rows of get_articles_for_processing in batches.
+    
+    A named (server-side) cursor keeps at most ``batch_size`` rows, content
+    included, in memory at a time instead of the whole result set. The
+    pooled connection is held until the generator is exhausted or closed.
+    
+    Args:
+        source_urls: List of source URLs to fetch
+        days_back: How many days back to fetch
+        batch_size: Rows fetched from the server per batch
+        
+    Yields:
+        Lists of up to batch_size article dictionaries, newest first
+    """
+    logger = get_logger("database")
+    logger.info(f"Streaming articles for processing from {len(source_urls)} sources (last {days_back} days)")
+    
+    cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+    total = 0
+    with get_conn() as conn, conn.cursor(name="articles_for_processing") as cursor:
+        cursor.itersize = batch_size
+        cursor.execute("""
             SELECT 
                 id,
                 source_type,
@@ -264,33 +651,93 @@ def get_articles_for_processing(source_urls: List[str],
             WHERE source_url = ANY(%s)
             AND published_date >= %s
             ORDER BY published_date DESC
-        """
-        
-        cursor.execute(query, (source_urls, cutoff_date))
-        results = cursor.fetchall()
+        """, (source_urls, cutoff_date))
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            total += len(rows)
+            yield rows
+    
+    logger.info(f"Streamed {total} articles for processing")
+
+
+@log_performance
+def get_articles_for_processing_truncated(source_urls: List[str],
+                                          days_back: int = 7,
+                                          content_limit: int = 500,
+                                          limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Get recent articles with content truncated in SQL, for previews.
+    
+    Only the first ``content_limit`` characters of each article's content are
+    sent over the wire (with "..." appended when cut), and ``limit`` is applied
+    in the query. Rows come back in the API's article shape, ready to serialize.
+    
+    Args:
+        source_urls: List of source URLs to fetch
+        days_back: How many days back to fetch
+        content_limit: Maximum content characters per article
+        limit: Maximum number of articles to return (None for all)
         
-        cursor.close()
-        conn.close()
+    Returns:
+        (articles, total_available): newest-first articles, each with a
+        'content_truncated' flag, and the number of matching rows before
+        the limit was applied
+    """
+    logger = get_logger("database")
+    logger.info(f"Fetching up to {limit} article previews from {len(source_urls)} sources (last {days_back} days)")
+    
+    start_time = time.time()
+    
+    try:
+        with get_conn() as conn, conn.cursor() as cursor:
+        
+            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        
+            query = """
+                SELECT 
+                    id,
+                    source_url,
+                    source_type,
+                    title,
+                    CASE WHEN length(content) > %(content_limit)s
+                         THEN LEFT(content, %(content_limit)s) || '...'
+                         ELSE content END AS content,
+                    length(content) > %(content_limit)s AS content_truncated,
+                    link,
+                    published_date,
+                    scraped_date,
+                    COUNT(*) OVER () AS total_available
+                FROM articles
+                WHERE source_url = ANY(%(source_urls)s)
+                AND published_date >= %(cutoff_date)s
+                ORDER BY published_date DESC
+                LIMIT %(limit)s
+            """
+        
+            cursor.execute(query, {
+                'source_urls': source_urls,
+                'cutoff_date': cutoff_date,
+                'content_limit': content_limit,
+                'limit': limit
+            })
+            results = cursor.fetchall()
+        
+        total_available = results[0]['total_available'] if results else 0
+        for row in results:
+            del row['total_available']
+        articles = results
         
         execution_time = time.time() - start_time
-        logger.info(f"Retrieved {len(results)} articles for processing in {execution_time:.2f}s")
-        
-        # Log breakdown by source
-        if results:
-            source_counts = {}
-            for row in results:
-                source = row['source_url']
-                source_counts[source] = source_counts.get(source, 0) + 1
-            
-            logger.debug("Articles per source:")
-            for source, count in source_counts.items():
-                logger.debug(f"  {source}: {count} articles")
+        logger.info(f"Retrieved {len(articles)} of {total_available} article previews in {execution_time:.2f}s")
         
-        return [dict(row) for row in results]
+        return articles, total_available
         
     except Exception as e:
         execution_time = time.time() - start_time
-        logger.error(f"Failed to fetch articles for processing after {execution_time:.2f}s: {str(e)}")
+        logger.error(f"Failed to fetch article previews after {execution_time:.2f}s: {str(e)}")
         raise
 
 
@@ -309,24 +756,20 @@ def get_article_count_by_source(days_back: int = 7) -> Dict[str, int]:
     start_time = time.time()
     
     try:
-        conn = connect_postgres()
-        cursor = conn.cursor()
-        
-        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        with get_conn() as conn, conn.cursor() as cursor:
         
-        query = """
-            SELECT source_url, COUNT(*) as count
-            FROM articles
-            WHERE published_date >= %s
-            GROUP BY source_url
-            ORDER BY count DESC
-        """
+            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
         
-        cursor.execute(query, (cutoff_date,))
-        results = cursor.fetchall()
+            query = """
+                SELECT source_url, COUNT(*) as count
+                FROM articles
+                WHERE published_date >= %s
+                GROUP BY source_url
+                ORDER BY count DESC
+            """
         
-        cursor.close()
-        conn.close()
+            cursor.execute(query, (cutoff_date,))
+            results = cursor.fetchall()
         
         execution_time = time.time() - start_time
         counts_dict = {row['source_url']: row['count'] for row in results}
@@ -336,7 +779,7 @@ def get_article_count_by_source(days_back: int = 7) -> Dict[str, int]:
         # Log top sources
         if counts_dict:
             logger.debug("Top sources by article count:")
-            for source, count in list(counts_dict.items())[:5]:
+            for source, count in islice(counts_dict.items(), 5):
                 logger.debug(f"  {source}: {count} articles")
         
         return counts_dict
@@ -347,6 +790,132 @@ def get_article_count_by_source(days_back: int = 7) -> Dict[str, int]:
         raise
 
 
+@log_performance
+def get_article_count_by_source_multi(windows: List[int]) -> List[Dict[str, int]]:
+    """
+    Get per-source article counts for several time windows in one query.
+    
+    The table is scanned once over the widest window and each narrower window
+    is counted with a FILTER clause, so e.g. 7- and 30-day stats cost a single
+    round trip instead of one get_article_count_by_source call per window.
+    
+    Args:
+        windows: Window sizes in days, e.g. [7, 30]
+        
+    Returns:
+        One dictionary per window (in the given order) mapping source_url to
+        article count, ordered by count descending like get_article_count_by_source
+    """
+    logger = get_logger("database")
+    logger.info(f"Getting article counts by source for windows {windows} (days)")
+    
+    if not windows:
+        return []
+    
+    start_time = time.time()
+    
+    try:
+        with get_conn() as conn, conn.cursor() as cursor:
+        
+            now = datetime.utcnow()
+            cutoffs = [now - timedelta(days=days) for days in windows]
+        
+            count_columns = ",\n                ".join(
+                f"COUNT(*) FILTER (WHERE published_date >= %s) AS c{i}"
+                for i in range(len(windows))
+            )
+            query = f"""
+                SELECT source_url,
+                    {count_columns}
+                FROM articles
+                WHERE published_date >= %s
+                GROUP BY source_url
+            """
+        
+            cursor.execute(query, (*cutoffs, min(cutoffs)))
+            results = cursor.fetchall()
+        
+        counts = []
+        for i in range(len(windows)):
+            column = f"c{i}"
+            rows = sorted(
+                ((row['source_url'], row[column]) for row in results if row[column]),
+                key=lambda item: item[1],
+                reverse=True
+            )
+            counts.append(dict(rows))
+        
+        execution_time = time.time() - start_time
+        logger.info(f"Retrieved article counts for {len(results)} sources across {len(windows)} windows in {execution_time:.2f}s")
+        
+        return counts
+        
+    except Exception as e:
+        execution_time = time.time() - start_time
+        logger.error(f"Failed to get article counts after {execution_time:.2f}s: {str(e)}")
+        raise
+
+
+def get_feed_validators(source_url: str, days_back: int) -> Tuple[Optional[str], Optional[str]]:
+    """
+    HTTP validators (ETag, Last-Modified) stored for a feed by store_feed_validators.
+    
+    Validators stored for a narrower scrape window are ignored: a 304 would
+    skip the older entries that window never fetched.
+    
+    Args:
+        source_url: Feed URL
+        days_back: Scrape window of the upcoming download
+        
+    Returns:
+        (etag, modified), each None if unknown; (None, None) if the lookup
+        fails (e.g. feed_cache has not been created yet)
+    """
+    try:
+        with get_conn() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT etag, modified FROM feed_cache WHERE source_url = %s AND days_back >= %s",
+                (source_url.strip(), days_back)
+            )
+            row = cursor.fetchone()
+    except psycopg2.Error as e:
+        get_logger("database").warning(f"Failed to read feed validators for {source_url}: {str(e)}")
+        return None, None
+    return (row['etag'], row['modified']) if row else (None, None)
+
+
+def store_feed_validators(source_url: str, etag: Optional[str], modified: Optional[str],
+                          days_back: int) -> None:
+    """Remember a feed's ETag / Last-Modified and scrape window for the next conditional GET; failures are logged."""
+    try:
+        with get_conn() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO feed_cache (source_url, etag, modified, days_back, checked_at)
+                VALUES (%s, %s, %s, %s, NOW())
+                ON CONFLICT (source_url) DO UPDATE
+                SET etag = EXCLUDED.etag, modified = EXCLUDED.modified,
+                    days_back = EXCLUDED.days_back, checked_at = NOW()
+            """, (source_url.strip(), etag, modified, days_back))
+    except psycopg2.Error as e:
+        get_logger("database").warning(f"Failed to store feed validators for {source_url}: {str(e)}")
+
+
+# Async wrappers for the read helpers used by the API. psycopg2 is blocking,
+# so the query runs in a worker thread and the event loop stays free.
+
+async def get_articles_for_processing_truncated_async(source_urls: List[str],
+                                                     days_back: int = 7,
+                                                     content_limit: int = 500,
+                                                     limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Awaitable get_articles_for_processing_truncated (runs in a worker thread)."""
+    return await asyncio.to_thread(get_articles_for_processing_truncated, source_urls, days_back, content_limit, limit)
+
+
+async def get_article_count_by_source_async(days_back: int = 7) -> Dict[str, int]:
+    """Awaitable get_article_count_by_source (runs in a worker thread)."""
+    return await asyncio.to_thread(get_article_count_by_source, days_back)
+
+
 @log_performance
 def cleanup_old_articles(days_to_keep: int = 90):
     """
@@ -365,37 +934,30 @@ def cleanup_old_articles(days_to_keep: int = 90):
     start_time = time.time()
     
     try:
-        conn = connect_postgres()
-        cursor = conn.cursor()
+        with get_conn() as conn, conn.cursor() as cursor:
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
-        logger.info(f"Deleting articles published before: {cutoff_date}")
+            cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+            logger.info(f"Deleting articles published before: {cutoff_date}")
         
-        # First, count how many will be deleted
-        count_query = "SELECT COUNT(*) FROM articles WHERE published_date < %s"
-        cursor.execute(count_query, (cutoff_date,))
-        count_to_delete = cursor.fetchone()[0]
+            # First, count how many will be deleted
+            count_query = "SELECT COUNT(*) AS count FROM articles WHERE published_date < %s"
+            cursor.execute(count_query, (cutoff_date,))
+            count_to_delete = cursor.fetchone()['count']
         
-        if count_to_delete == 0:
-            logger.info("No old articles found to delete")
-            cursor.close()
-            conn.close()
-            return 0
+            if count_to_delete == 0:
+                logger.info("No old articles found to delete")
+                return 0
         
-        logger.info(f"Found {count_to_delete} articles to delete")
-        
-        # Perform the deletion
-        delete_query = """
-            DELETE FROM articles
-            WHERE published_date < %s
-        """
+            logger.info(f"Found {count_to_delete} articles to delete")
         
-        cursor.execute(delete_query, (cutoff_date,))
-        deleted = cursor.rowcount
+            # Perform the deletion
+            delete_query = """
+                DELETE FROM articles
+                WHERE published_date < %s
+            """
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+            cursor.execute(delete_query, (cutoff_date,))
+            deleted = cursor.rowcount
         
         execution_time = time.time() - start_time
         logger.info(f"Cleanup completed: {deleted} articles deleted in {execution_time:.2f}s")
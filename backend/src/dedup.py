@@ -0,0 +1,71 @@
+"""
+Near-duplicate article detection (the same story syndicated across outlets).
+
+Articles are compared with MinHash LSH over word shingles of their title and
+the start of their content. The pipeline stages that pay per article (AI
+filter, summaries, clustering) run on one representative per group and fan
+the result out to the duplicates.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:  # near-duplicate collapsing is skipped
+    MinHash = MinHashLSH = None
+
+DEDUP_THRESHOLD = 0.85
+DEDUP_NUM_PERM = 128
+DEDUP_SHINGLE_WORDS = 5
+DEDUP_CONTENT_CHARS = 500
+
+
+def _shingles(text: str) -> set:
+    """Word shingles of a text (the whole text if it is shorter than one shingle)."""
+    words = text.lower().split()
+    if len(words) <= DEDUP_SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + DEDUP_SHINGLE_WORDS]) for i in range(len(words) - DEDUP_SHINGLE_WORDS + 1)}
+
+
+@lru_cache(maxsize=4096)
+def _minhash(text: str):
+    """MinHash of a text; memoized since the filter, summary and clustering stages see the same articles."""
+    minhash = MinHash(num_perm=DEDUP_NUM_PERM)
+    minhash.update_batch([shingle.encode("utf-8") for shingle in _shingles(text)])
+    return minhash
+
+
+def near_duplicate_groups(articles: List[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Group near-duplicate articles with MinHash LSH on title + content[:DEDUP_CONTENT_CHARS].
+
+    Args:
+        articles: List of article dictionaries
+
+    Returns:
+        Groups of article indices, in order of first appearance; the first
+        index of each group is its representative (the article with the
+        longest content). Every article is its own group when datasketch is
+        not installed.
+    """
+    if MinHash is None or len(articles) < 2:
+        return [[i] for i in range(len(articles))]
+
+    lsh = MinHashLSH(threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM)
+    groups: Dict[int, List[int]] = {}
+    for i, article in enumerate(articles):
+        minhash = _minhash(f"{article.get('title', '')} {(article.get('content') or '')[:DEDUP_CONTENT_CHARS]}")
+
+        matches = lsh.query(minhash)
+        if matches:
+            groups[matches[0]].append(i)
+        else:
+            lsh.insert(i, minhash)
+            groups[i] = [i]
+
+    return [
+        sorted(members, key=lambda i: len(articles[i].get('content') or ''), reverse=True)
+        for members in groups.values()
+    ]
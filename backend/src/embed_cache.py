@@ -0,0 +1,107 @@
+"""
+Persistent embedding cache.
+
+Embeddings are stored in a local SQLite file keyed by the SHA-256 of the
+embedded text and the embedding model, so re-runs over overlapping article
+sets only send new texts to the embedding API.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from utils.disk_cache import CACHE_DIR
+from utils.logger import get_logger
+
+# Next to the disk_cache entries (~/.cache/trendmind by default), outside the repo
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", str(CACHE_DIR / "embed_cache.sqlite"))
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating the table on first use."""
+    global _initialized
+    conn = sqlite3.connect(EMBED_CACHE_PATH, timeout=30)
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "hash TEXT NOT NULL, model TEXT NOT NULL, dim INTEGER NOT NULL, vec BLOB NOT NULL, "
+                    "PRIMARY KEY (hash, model))"
+                )
+                conn.commit()
+                _initialized = True
+    return conn
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_or_compute(texts: List[str],
+                   model: str,
+                   compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+    """
+    Return embeddings for texts, computing only the ones not cached yet.
+
+    Args:
+        texts: Texts to embed
+        model: Embedding model/deployment name (part of the cache key)
+        compute: Embeds a list of texts, returning a (len(texts), dim) array;
+            called at most once, with the cache misses only
+
+    Returns:
+        (len(texts), dim) float32 array, rows in the order of ``texts``
+    """
+    logger = get_logger("embed_cache")
+
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    hashes = [_text_hash(text) for text in texts]
+    unique_hashes = list(dict.fromkeys(hashes))
+
+    Path(EMBED_CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = _connect()
+    try:
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(unique_hashes), _LOOKUP_CHUNK):
+            chunk = unique_hashes[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT hash, dim, vec FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                (model, *chunk)
+            )
+            for text_hash, dim, vec in rows:
+                found[text_hash] = np.frombuffer(vec, dtype=np.float32, count=dim)
+
+        first_index = {}
+        for i, text_hash in enumerate(hashes):
+            first_index.setdefault(text_hash, i)
+        missing = [h for h in unique_hashes if h not in found]
+
+        logger.info(f"Embedding cache: {len(unique_hashes) - len(missing)} hits, {len(missing)} misses")
+
+        if missing:
+            computed = np.asarray(compute([texts[first_index[h]] for h in missing]), dtype=np.float32)
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, dim, vec) VALUES (?, ?, ?, ?)",
+                [(h, model, vector.shape[0], vector.tobytes()) for h, vector in zip(missing, computed)]
+            )
+            conn.commit()
+            found.update(zip(missing, computed))
+
+        return np.stack([found[h] for h in hashes])
+    finally:
+        conn.close()
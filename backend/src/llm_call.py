@@ -0,0 +1,434 @@
+"""
+Retrying wrappers for Azure OpenAI calls.
+
+Transient failures (rate limits, connection errors, timeouts, 5xx) are retried
+with exponential backoff and jitter instead of dropping straight to the
+callers' degraded fallbacks. On 429 the server's Retry-After is honored.
+
+Chat completions are also throttled client-side when LLM_RPM_LIMIT /
+LLM_TPM_LIMIT are set: a token bucket per deployment delays requests before
+they would exceed the quota, so concurrent callers saturate it steadily
+instead of bursting into 429s and backing off. They also log token usage,
+including how much of the prompt was served from the provider's prompt cache.
+
+chat_completion_json / achat_completion_json stream JSON-mode replies and
+stop reading shortly after the top-level object closes, so a reply that
+trails off into whitespace (a known JSON-mode failure) doesn't run to
+max_tokens. They request the stream's usage chunk, so their token usage is
+logged too unless the reply was cut off before it arrived.
+Given a json_response_format(), the reply is constrained to a strict JSON
+schema; API versions without structured outputs fall back to json_object.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import openai
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+from utils.logger import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # token counts are estimated from the text length
+    tiktoken = None
+
+MAX_ATTEMPTS = 5
+MAX_RETRY_AFTER = 60  # seconds; longer server hints are capped
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.InternalServerError,
+)
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+# Per-deployment quotas (requests / tokens per minute); 0 disables throttling
+RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "0"))
+TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "0"))
+
+# Set when the deployment/API version rejects json_schema; json_object is used instead
+_json_schema_unsupported = False
+
+# Set when the API version rejects stream_options; streamed usage is not logged then
+_stream_usage_unsupported = False
+
+# Chunks read after a streamed JSON object closes, waiting for the usage chunk
+JSON_TRAILING_CHUNKS = 8
+
+# Process-wide prompt token totals, for the running prompt-cache hit rate
+_usage_lock = threading.Lock()
+_prompt_tokens_total = 0
+_cached_tokens_total = 0
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        return tiktoken.get_encoding("o200k_base") if tiktoken is not None else None
+    except Exception:  # encoding files unavailable (e.g. offline)
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Prompt tokens in text: exact with tiktoken (gpt-4o encoding), else ~4 characters per token."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``per_minute / 60`` per second.
+
+    reserve() takes the tokens immediately (the level may go negative) and
+    returns how long the caller must wait before using them, so sync and
+    async callers can sleep outside the lock and are served in order.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            # A single request larger than the bucket waits for a full bucket, not forever
+            self.level -= min(amount, self.capacity)
+            return -self.level / self.rate if self.level < 0 else 0.0
+
+
+_buckets: Dict[str, Tuple[Optional[_TokenBucket], Optional[_TokenBucket]]] = {}
+_buckets_lock = threading.Lock()
+
+
+def _request_tokens(kwargs: Dict[str, Any]) -> int:
+    """Tokens a request counts against TPM: estimated prompt plus the max_tokens cap."""
+    prompt = "".join(
+        message.get("content") or "" for message in kwargs.get("messages", []) if isinstance(message, dict)
+    )
+    return estimate_tokens(prompt) + (kwargs.get("max_tokens") or 0)
+
+
+def _throttle_delay(kwargs: Dict[str, Any]) -> float:
+    """Reserve RPM/TPM capacity for a request; returns the seconds to wait before sending it."""
+    if not RPM_LIMIT and not TPM_LIMIT:
+        return 0.0
+    model = kwargs.get("model") or ""
+    with _buckets_lock:
+        if model not in _buckets:
+            _buckets[model] = (_TokenBucket(RPM_LIMIT) if RPM_LIMIT else None,
+                               _TokenBucket(TPM_LIMIT) if TPM_LIMIT else None)
+        requests_bucket, tokens_bucket = _buckets[model]
+    delay = requests_bucket.reserve(1) if requests_bucket else 0.0
+    if tokens_bucket:
+        delay = max(delay, tokens_bucket.reserve(_request_tokens(kwargs)))
+    if delay > 0:
+        get_logger("llm_call").debug(f"Throttling {model} request for {delay:.2f}s")
+    return delay
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    First max_tokens tokens of text (gpt-4o encoding), or ~4 characters per token without tiktoken.
+
+    Memoized, since the same article text is truncated again by the filter,
+    summary and cluster-report prompts. The cache is keyed on the text's
+    first max_tokens * 8 characters, so its memory is bounded by the token
+    budget rather than by article length.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        text if it fits, else its truncated prefix
+    """
+    # A token is rarely longer than 8 characters, so longer text can't add to the prefix
+    limit = max_tokens * 8
+    return _truncate_prefix(text[:limit], max_tokens, len(text) > limit)
+
+
+@lru_cache(maxsize=4096)
+def _truncate_prefix(prefix: str, max_tokens: int, cut: bool) -> str:
+    """truncate_tokens of a text whose first max_tokens * 8 characters are prefix (cut: the text was longer)."""
+    encoding = _encoding()
+    if encoding is None:
+        return prefix[:max_tokens * 4]
+    ids = encoding.encode(prefix, disallowed_special=())
+    if len(ids) <= max_tokens and not cut:
+        return prefix
+    return encoding.decode(ids[:max_tokens])
+
+
+def squash_whitespace(text: str) -> str:
+    """Collapse runs of whitespace/newlines into single spaces (they cost prompt tokens, add no signal)."""
+    return " ".join(text.split())
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Seconds requested by the server's retry-after(-ms) header, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _wait(retry_state) -> float:
+    error = retry_state.outcome.exception()
+    if isinstance(error, openai.RateLimitError):
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+    return _backoff(retry_state)
+
+
+_llm_retry = retry(
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    wait=_wait,
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    before_sleep=before_sleep_log(get_logger("llm_call"), logging.WARNING),
+    reraise=True,
+)
+
+
+def _log_usage(response: Any) -> None:
+    """Log prompt/cached/completion tokens of a chat completion (no-op if usage is missing)."""
+    global _prompt_tokens_total, _cached_tokens_total
+    usage = getattr(response, "usage", None)
+    if usage is None or not usage.prompt_tokens:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    with _usage_lock:
+        _prompt_tokens_total += usage.prompt_tokens
+        _cached_tokens_total += cached
+        hit_rate = _cached_tokens_total / _prompt_tokens_total
+    get_logger("llm_call").debug(
+        f"Token usage: {usage.prompt_tokens} prompt ({cached} cached), "
+        f"{usage.completion_tokens} completion; prompt cache hit rate so far {hit_rate:.1%}"
+    )
+
+
+@_llm_retry
+def chat_completion(client, **kwargs) -> Any:
+    """client.chat.completions.create with client-side throttling and retries."""
+    delay = _throttle_delay(kwargs)
+    if delay:
+        time.sleep(delay)
+    response = client.chat.completions.create(**kwargs)
+    if not kwargs.get("stream"):
+        _log_usage(response)
+    return response
+
+
+@_llm_retry
+async def achat_completion(client, **kwargs) -> Any:
+    """Async client.chat.completions.create with client-side throttling and retries."""
+    delay = _throttle_delay(kwargs)
+    if delay:
+        await asyncio.sleep(delay)
+    response = await client.chat.completions.create(**kwargs)
+    if not kwargs.get("stream"):
+        _log_usage(response)
+    return response
+
+
+def json_response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strict structured-output response_format for chat_completion_json.
+
+    Args:
+        name: Schema name reported to the API
+        schema: JSON schema of the reply (strict mode: every property required,
+            no additional properties)
+
+    Returns:
+        json_schema response_format, or json_object once the API has rejected json_schema
+    """
+    if _json_schema_unsupported:
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def _json_schema_rejected(error: openai.BadRequestError, kwargs: Dict[str, Any]) -> bool:
+    """Whether error is the API rejecting kwargs' json_schema; if so json_object is used from now on."""
+    global _json_schema_unsupported
+    if (kwargs.get("response_format") or {}).get("type") != "json_schema":
+        return False
+    if "response_format" not in str(error) and "json_schema" not in str(error):
+        return False
+    get_logger("llm_call").warning(f"json_schema output not supported, using json_object: {str(error)}")
+    _json_schema_unsupported = True
+    kwargs["response_format"] = {"type": "json_object"}
+    return True
+
+
+def _option_rejected(error: openai.BadRequestError, kwargs: Dict[str, Any]) -> bool:
+    """Whether error rejects an optional feature of a JSON request; if so it is dropped from kwargs (and from now on)."""
+    global _stream_usage_unsupported
+    if "stream_options" in kwargs and "stream_options" in str(error):
+        get_logger("llm_call").warning(f"stream_options not supported, streamed usage won't be logged: {str(error)}")
+        _stream_usage_unsupported = True
+        del kwargs["stream_options"]
+        return True
+    return _json_schema_rejected(error, kwargs)
+
+
+class _JsonObjectEnd:
+    """Incrementally finds where the first top-level JSON object in a stream of text ends."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> int:
+        """Index in text just past the closing brace, or -1 if the object isn't closed yet."""
+        for i, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return -1
+
+
+def _delta_text(chunk: Any) -> str:
+    return (chunk.choices[0].delta.content or "") if chunk.choices else ""
+
+
+class _JsonStreamReader:
+    """
+    Collects a streamed reply up to the end of its top-level JSON object.
+
+    After the object closes, up to JSON_TRAILING_CHUNKS more chunks are read
+    while they carry no text, so the final usage chunk can still be logged.
+    """
+
+    def __init__(self, want_usage: bool):
+        self.want_usage = want_usage
+        self.detector = _JsonObjectEnd()
+        self.parts = []
+        self.closed = False
+        self.trailing = 0
+
+    def feed(self, chunk: Any) -> bool:
+        """Add a chunk; returns True once the rest of the stream should be dropped."""
+        if getattr(chunk, "usage", None) is not None:
+            _log_usage(chunk)
+            return True
+        text = _delta_text(chunk)
+        if self.closed:
+            self.trailing += 1
+            return bool(text.strip()) or self.trailing >= JSON_TRAILING_CHUNKS
+        end = self.detector.feed(text)
+        if end < 0:
+            self.parts.append(text)
+            return False
+        self.parts.append(text[:end])
+        self.closed = True
+        return not self.want_usage
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+@_llm_retry
+def chat_completion_json(client, **kwargs) -> str:
+    """
+    Streamed JSON-mode chat completion, with throttling and retries.
+
+    Returns:
+        The reply text up to the end of its top-level JSON object (the whole
+        reply if it never closes); the stream is closed early once it does
+    """
+    delay = _throttle_delay(kwargs)
+    if delay:
+        time.sleep(delay)
+    if not _stream_usage_unsupported:
+        kwargs["stream_options"] = {"include_usage": True}
+    while True:
+        try:
+            stream = client.chat.completions.create(stream=True, **kwargs)
+            break
+        except openai.BadRequestError as e:
+            if not _option_rejected(e, kwargs):
+                raise
+    reader = _JsonStreamReader(want_usage="stream_options" in kwargs)
+    for chunk in stream:
+        if reader.feed(chunk):
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            break
+    return reader.text()
+
+
+@_llm_retry
+async def achat_completion_json(client, **kwargs) -> str:
+    """Async version of chat_completion_json."""
+    delay = _throttle_delay(kwargs)
+    if delay:
+        await asyncio.sleep(delay)
+    if not _stream_usage_unsupported:
+        kwargs["stream_options"] = {"include_usage": True}
+    while True:
+        try:
+            stream = await client.chat.completions.create(stream=True, **kwargs)
+            break
+        except openai.BadRequestError as e:
+            if not _option_rejected(e, kwargs):
+                raise
+    reader = _JsonStreamReader(want_usage="stream_options" in kwargs)
+    async for chunk in stream:
+        if reader.feed(chunk):
+            close = getattr(stream, "close", None)
+            if close is not None:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            break
+    return reader.text()
+
+
+@_llm_retry
+def create_embeddings(client, **kwargs) -> Any:
+    """client.embeddings.create with retries."""
+    return client.embeddings.create(**kwargs)
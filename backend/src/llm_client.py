@@ -0,0 +1,121 @@
+"""
+Lazily constructed Azure OpenAI / Langfuse clients and deployment names.
+
+Nothing here runs at import time: .env is loaded and the clients are built on
+first use, once per process, so importing the pipeline modules stays cheap
+and does not require the Azure settings to be present.
+
+The sync and async clients each own one keep-alive httpx pool that every
+module shares, sized for the concurrent summary/filter calls, with a 60s
+timeout instead of the SDK's 600s so a stalled request is retried (see
+llm_call) rather than holding a worker for ten minutes.
+"""
+
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import httpx
+from dotenv import load_dotenv, find_dotenv
+
+HTTP_LIMITS = httpx.Limits(max_connections=128, max_keepalive_connections=64)
+HTTP_TIMEOUT = 60.0  # seconds
+
+# Langfuse prompt templates are re-fetched at most this often per (name, label)
+PROMPT_CACHE_TTL = 300  # seconds
+_prompt_cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+_prompt_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    load_dotenv(find_dotenv())
+
+
+def _azure_settings() -> dict:
+    _load_env()
+    return {
+        "azure_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "api_version": os.getenv("AZURE_OPENAI_API_VERSION"),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    """Shared (Langfuse-instrumented) AzureOpenAI client."""
+    from langfuse.openai import openai
+    http_client = openai.DefaultHttpxClient(limits=HTTP_LIMITS)
+    return openai.AzureOpenAI(http_client=http_client, timeout=HTTP_TIMEOUT, **_azure_settings())
+
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    """
+    Shared (Langfuse-instrumented) AsyncAzureOpenAI client.
+
+    Its connection pool is bound to the event loop of its first request, so
+    it must only be used from one long-lived loop (the API server's). Sync
+    entry points run the sync client on a thread pool instead of wrapping
+    the async code in asyncio.run, whose second call would reuse the client
+    on a new loop and fail with "Event loop is closed".
+    """
+    from langfuse.openai import openai
+    http_client = openai.DefaultAsyncHttpxClient(limits=HTTP_LIMITS)
+    return openai.AsyncAzureOpenAI(http_client=http_client, timeout=HTTP_TIMEOUT, **_azure_settings())
+
+
+@lru_cache(maxsize=1)
+def get_langfuse():
+    """Shared Langfuse client (prompt management)."""
+    _load_env()
+    from langfuse import Langfuse
+    return Langfuse()
+
+
+def get_prompt(name: str, label: str = "latest") -> Any:
+    """
+    Langfuse prompt template, memoized for PROMPT_CACHE_TTL seconds.
+
+    Fetch errors are raised (and not cached), so callers' hardcoded fallbacks
+    still apply.
+
+    Args:
+        name: Langfuse prompt name
+        label: Prompt label to resolve
+
+    Returns:
+        Langfuse prompt client (use .compile(...) and .version)
+    """
+    key = (name, label)
+    with _prompt_cache_lock:
+        entry = _prompt_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    prompt = get_langfuse().get_prompt(name, label=label)
+    with _prompt_cache_lock:
+        _prompt_cache[key] = (time.monotonic() + PROMPT_CACHE_TTL, prompt)
+    return prompt
+
+
+@lru_cache(maxsize=1)
+def get_deployment() -> str:
+    """Main chat deployment (final overview, content filter)."""
+    _load_env()
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT")
+
+
+@lru_cache(maxsize=1)
+def get_small_deployment() -> str:
+    """Cheaper deployment for the high-volume calls; defaults to get_deployment()."""
+    _load_env()
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_SMALL", get_deployment())
+
+
+@lru_cache(maxsize=1)
+def get_embedding_deployment() -> str:
+    """Embedding deployment used for clustering."""
+    _load_env()
+    return os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
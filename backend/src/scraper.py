@@ -2,21 +2,72 @@ import feedparser
 from newspaper import Article
 from datetime import datetime, timedelta, timezone
 import re
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv, find_dotenv
-from src.db_postgres import connect_postgres, insert_posts, get_existing_articles, article_exists
+from src.db_postgres import (
+    insert_posts, get_existing_articles, get_existing_articles_many,
+    get_feed_validators, store_feed_validators
+)
 from pathlib import Path
 from utils.logger import get_logger, log_performance, log_scraping_metrics
 import logging
-from typing import Dict, Any, List, Tuple
-from bs4 import BeautifulSoup
+from typing import Dict, Any, List, Optional, Tuple
+from lxml import html as lxml_html
 
 load_dotenv(find_dotenv())
 BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN")
 
+# Pooled connections per host; above the orchestrator's MAX_WORKERS threads
+HTTP_POOL_SIZE = 32
+
+# Concurrent entry-page fetches per feed (on top of the orchestrator's per-source threads)
+ENTRY_FETCH_WORKERS = 8
+
+SUBSTACK_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/127.0.0.1 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Shared HTTP session for all scrapers in this process.
+    
+    Keep-alive connections are pooled per host, so repeated requests to the
+    same site (posts on one Substack, Twitter API calls) skip the TCP/TLS
+    handshake. Safe to use from the orchestrator's worker threads.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def close_http_session() -> None:
+    """Close the shared HTTP session (e.g. on application shutdown)."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
 def check_and_scrape(source_url: str, source_type: str, days_back: int) -> Tuple[List[Dict], bool]:
     """
     Check if we have sufficient data in DB. Returns (existing_articles, needs_scraping).
@@ -32,6 +83,31 @@ def check_and_scrape(source_url: str, source_type: str, days_back: int) -> Tuple
     # Get existing articles from DB
     existing = get_existing_articles(source_url, cutoff_date, datetime.utcnow())
     
+    return _needs_scraping(source_url, existing, logger)
+
+
+def check_and_scrape_many(source_urls: List[str], days_back: int) -> Dict[str, Tuple[List[Dict], bool]]:
+    """
+    Batch variant of check_and_scrape: one DB round-trip for all sources.
+    
+    Returns:
+        Dictionary mapping each source URL to (existing_articles, needs_scraping)
+    """
+    logger = get_logger("scraper")
+    
+    now = datetime.utcnow()
+    cutoff_date = now - timedelta(days=days_back)
+    
+    existing_by_source = get_existing_articles_many(source_urls, cutoff_date, now)
+    
+    return {
+        source_url: _needs_scraping(source_url, existing_by_source.get(source_url, []), logger)
+        for source_url in source_urls
+    }
+
+
+def _needs_scraping(source_url: str, existing: List[Dict], logger) -> Tuple[List[Dict], bool]:
+    """Decide whether cached articles for a source are fresh enough to reuse."""
     if not existing:
         logger.info(f"No cached data for {source_url}, will scrape")
         return [], True
@@ -48,9 +124,145 @@ def check_and_scrape(source_url: str, source_type: str, days_back: int) -> Tuple
     return existing, False
 
 
+def _stored_dates(existing: List[Dict]) -> set:
+    """
+    published_date of a source's already-stored articles in the scrape window.
+    
+    Entries with these dates are skipped before fetching their pages; the
+    insert's ON CONFLICT (source_url, published_date) stays the authoritative
+    dedupe, so no per-entry existence query is needed. Scrapers add the dates
+    they queue, so an entry repeated within a feed is fetched only once.
+    """
+    return {article.get('published_date') for article in existing}
+
+
+def _parse_feed(url: str, existing: List[Dict], days_back: int):
+    """
+    feedparser.parse with a conditional GET when the feed's articles are stored.
+    
+    Validators are only sent when existing articles are at hand, so a 304
+    never leaves a source with nothing to return, and only if they were
+    stored for a window at least days_back wide. The new feed's validators
+    are not stored here (see _feed_validators).
+    
+    Returns:
+        The parsed feed, or None if the server answered 304 Not Modified
+    """
+    etag, modified = get_feed_validators(url, days_back) if existing else (None, None)
+    feed = feedparser.parse(url, etag=etag, modified=modified)
+    if feed.get("status") == 304:
+        return None
+    return feed
+
+
+def _feed_validators(url: str, feed, days_back: int) -> Optional[Tuple[str, Optional[str], Optional[str], int]]:
+    """
+    (url, etag, modified, days_back) of a downloaded feed, for store_feed_validators.
+    
+    They may only be stored once the feed's new entries are saved: a later
+    304 returns just the stored articles, so anything not saved by then
+    would be skipped until the feed changes.
+    
+    Returns:
+        The validators, or None if the server sent neither header
+    """
+    if not (feed.get("etag") or feed.get("modified")):
+        return None
+    return url, feed.get("etag"), feed.get("modified"), days_back
+
+
+def _fetch_entries(fetch, entries: List[Tuple]) -> Tuple[List[Dict], List[str]]:
+    """
+    Run fetch(*entry) for every entry on up to ENTRY_FETCH_WORKERS threads.
+    
+    Page downloads are network-bound, so fetching a feed's new entries
+    concurrently over the shared session overlaps their latencies.
+    
+    Returns:
+        (articles in entry order, error messages)
+    """
+    if not entries:
+        return [], []
+    
+    def attempt(entry):
+        try:
+            return fetch(*entry), None
+        except Exception as e:
+            return None, f"Error processing entry {entry[0]}: {e}"
+    
+    with ThreadPoolExecutor(max_workers=min(ENTRY_FETCH_WORKERS, len(entries))) as executor:
+        outcomes = list(executor.map(attempt, entries))
+    
+    logger = get_logger("scraper")
+    articles, errors = [], []
+    for article, error in outcomes:
+        if error is None:
+            articles.append(article)
+        else:
+            logger.error(error)
+            errors.append(error)
+    return articles, errors
+
+
+def _fetch_rss_entry(link: str, url: str, published: datetime) -> Dict[str, Any]:
+    """Download and parse one RSS entry's page into an article row."""
+    article = Article(link)
+    page = get_http_session().get(link, timeout=15)
+    page.raise_for_status()
+    article.download(input_html=page.text)
+    article.parse()
+    
+    return {
+        "source_type": "rss",
+        "source_url": url,
+        "title": article.title,
+        "content": article.text,
+        "link": link,
+        "published_date": published
+    }
+
+
+def _fetch_substack_post(link: str, url: str, published: datetime, entry) -> Dict[str, Any]:
+    """Download one Substack post and extract its paragraphs into an article row."""
+    response = get_http_session().get(link, headers=SUBSTACK_HEADERS, timeout=15)
+    response.raise_for_status()
+
+    # Raw bytes let lxml read the page's declared charset instead of requests
+    # guessing it; the post body is picked out with XPath on the C tree,
+    # without building a BeautifulSoup object tree
+    article_tags = []
+    if response.content:
+        tree = lxml_html.fromstring(response.content)
+        article_tags = tree.xpath("(//article)[1]") or tree.xpath("(//div[@role='main'])[1]")
+    if article_tags:
+        paragraphs = [p.text_content().strip() for p in article_tags[0].iter("p")]
+        full_content = "\n".join(paragraphs).strip()
+    else:
+        full_content = entry.get("summary", "")
+
+    return {
+        "source_type": "substack",
+        "source_url": url,
+        "title": entry.title,
+        "content": full_content,
+        "link": link,
+        "published_date": published
+    }
+
+
 @log_performance
-def scrape_blog_or_rss(url: str, days_back: int = 30) -> Dict[str, Any]:
-    """Scrape RSS/blog content and save to database."""
+def scrape_blog_or_rss(url: str, days_back: int = 30, persist: bool = True,
+                       prefetched: Optional[Tuple[List[Dict], bool]] = None) -> Dict[str, Any]:
+    """
+    Scrape RSS/blog content and save to database.
+    
+    With persist=False nothing is inserted; new articles are returned under
+    "pending" so the caller can bulk-load them (see bulk_copy_posts), and
+    the feed's HTTP validators under "feed_validators", to be stored with
+    store_feed_validators once that load has succeeded.
+    prefetched is a check_and_scrape result the caller already has for this
+    URL; it saves loading the source's stored articles a second time.
+    """
     logger = get_logger("scraper")
     
     # Strip URL to avoid whitespace issues
@@ -58,7 +270,10 @@ def scrape_blog_or_rss(url: str, days_back: int = 30) -> Dict[str, Any]:
     logger.info(f"Starting RSS/blog scraping for: {url}")
     
     # Check database first
-    existing_articles, needs_scraping = check_and_scrape(url, 'rss', days_back)
+    if prefetched is not None:
+        existing_articles, needs_scraping = prefetched
+    else:
+        existing_articles, needs_scraping = check_and_scrape(url, 'rss', days_back)
     if not needs_scraping:
         logger.info(f"✓ Using {len(existing_articles)} cached articles from DB")
         return {"results": existing_articles, "from_cache": True}
@@ -67,7 +282,10 @@ def scrape_blog_or_rss(url: str, days_back: int = 30) -> Dict[str, Any]:
     logger.info(f"🕷️ Scraping fresh data from {url}")
     cutoff = datetime.utcnow() - timedelta(days=days_back)
     
-    feed = feedparser.parse(url)
+    feed = _parse_feed(url, existing_articles, days_back)
+    if feed is None:
+        logger.info(f"✓ Feed not modified, using {len(existing_articles)} cached articles from DB")
+        return {"results": existing_articles, "from_cache": True}
     if not feed.entries:
         error_msg = "No entries found in feed"
         logger.warning(f"{error_msg} for {url}")
@@ -75,13 +293,10 @@ def scrape_blog_or_rss(url: str, days_back: int = 30) -> Dict[str, Any]:
 
     logger.info(f"Found {len(feed.entries)} entries in feed")
     
-    new_articles = []
     errors = []
+    stored_dates = _stored_dates(existing_articles)
 
-    # Open DB connection once
-    conn = connect_postgres()
-    cursor = conn.cursor()
-
+    to_fetch = []
     for entry in feed.entries:
         try:
             published = datetime(*entry.get("published_parsed", (0,0,0,0,0,0))[:6])
@@ -89,39 +304,32 @@ def scrape_blog_or_rss(url: str, days_back: int = 30) -> Dict[str, Any]:
                 continue
             
             # Skip if article exists
-            if article_exists(cursor, url, published):
+            if published in stored_dates:
                 logger.debug(f"Article already in DB: {entry.get('title', 'No Title')}")
                 continue
             
             logger.debug(f"Processing new entry: {entry.get('title', 'No Title')}")
-            
-            article = Article(entry.get("link", ""))
-            article.download()
-            article.parse()
-            
-            article_data = {
-                "source_type": "rss",
-                "source_url": url,
-                "title": article.title,
-                "content": article.text,
-                "link": entry.get("link", ""),
-                "published_date": published
-            }
-            new_articles.append(article_data)
+            to_fetch.append((entry.get("link", ""), url, published))
+            stored_dates.add(published)
             
         except Exception as e:
             error_msg = f"Error processing entry {entry.get('link', 'Unknown')}: {e}"
             logger.error(error_msg)
             errors.append(error_msg)
 
+    new_articles, fetch_errors = _fetch_entries(_fetch_rss_entry, to_fetch)
+    errors.extend(fetch_errors)
+
     # Insert new articles to database
-    if new_articles:
-        insert_posts(new_articles, cursor=cursor, conn=conn)
-        conn.commit()
+    if new_articles and persist:
+        insert_posts(new_articles)
         logger.info(f"✓ Inserted {len(new_articles)} new articles to DB")
     
-    cursor.close()
-    conn.close()
+    # Validators are kept only when every entry was fetched; with persist=False
+    # the caller stores them after its bulk load
+    validators = _feed_validators(url, feed, days_back) if not errors else None
+    if validators and persist:
+        store_feed_validators(*validators)
     
     all_articles = existing_articles + new_articles
     log_scraping_metrics(url, new_articles, errors)
@@ -130,14 +338,27 @@ def scrape_blog_or_rss(url: str, days_back: int = 30) -> Dict[str, Any]:
         "results": all_articles,
         "new_count": len(new_articles),
         "cached_count": len(existing_articles),
-        "from_cache": False
+        "from_cache": False,
+        "pending": [] if persist else new_articles,
+        "feed_validators": [validators] if validators and not persist else []
     }
 
 
 @log_performance
 def scrape_substack_research(urls: List[str] = None,
-                             days_back: int = 30) -> Dict[str, Any]:
-    """Scrape Substack research posts and save to database."""
+                             days_back: int = 30,
+                             persist: bool = True,
+                             prefetched: Optional[Dict[str, Tuple[List[Dict], bool]]] = None) -> Dict[str, Any]:
+    """
+    Scrape Substack research posts and save to database.
+    
+    With persist=False nothing is inserted; new posts are returned under
+    "pending" so the caller can bulk-load them (see bulk_copy_posts), and
+    the feeds' HTTP validators under "feed_validators", to be stored with
+    store_feed_validators once that load has succeeded.
+    prefetched maps URLs to check_and_scrape results the caller already has;
+    those URLs skip loading their stored articles a second time.
+    """
     logger = get_logger("scraper")
 
     if urls is None:
@@ -149,23 +370,19 @@ def scrape_substack_research(urls: List[str] = None,
     logger.info(f"Starting Substack scraping for: {urls}")
     
     all_results = []
+    pending = []
+    feed_validators = []
     total_new = 0
     total_cached = 0
     errors = []
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/127.0.0.1 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-
-    # Open DB connection once for all URLs
-    conn = connect_postgres()
-    cursor = conn.cursor()
-
     for url in urls:
-        existing_articles, needs_scraping = check_and_scrape(url, 'substack', days_back)
+        # Strip URL to avoid whitespace issues (stored source_urls are stripped)
+        url = url.strip()
+        if prefetched and url in prefetched:
+            existing_articles, needs_scraping = prefetched[url]
+        else:
+            existing_articles, needs_scraping = check_and_scrape(url, 'substack', days_back)
         
         if not needs_scraping:
             logger.info(f"✓ Using {len(existing_articles)} cached articles from DB for {url}")
@@ -176,11 +393,19 @@ def scrape_substack_research(urls: List[str] = None,
         logger.info(f"🕷️ Scraping fresh data from {url}")
         cutoff = datetime.utcnow() - timedelta(days=days_back)
         new_articles = []
+        stored_dates = _stored_dates(existing_articles)
 
+        errors_before = len(errors)
         try:
-            feed = feedparser.parse(url)
+            feed = _parse_feed(url, existing_articles, days_back)
+            if feed is None:
+                logger.info(f"✓ Feed not modified, using {len(existing_articles)} cached articles from DB for {url}")
+                all_results.extend(existing_articles)
+                total_cached += len(existing_articles)
+                continue
             logger.info(f"Fetched feed: {url} with {len(feed.entries)} entries")
 
+            to_fetch = []
             for entry in feed.entries:
                 try:
                     published = None
@@ -189,50 +414,41 @@ def scrape_substack_research(urls: List[str] = None,
                     if published and published < cutoff:
                         continue
 
-                    # Check if article already exists using existing cursor
-                    if article_exists(cursor, url, published):
+                    # Skip if article exists
+                    if published in stored_dates:
                         logger.debug(f"Article already in DB: {entry.title}")
                         continue
 
-                    link = entry.link
-                    title = entry.title
-
-                    # Fetch full post content
-                    response = requests.get(link, headers=headers, timeout=15)
-                    response.raise_for_status()
-
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    article_tag = soup.find("article") or soup.find("div", {"role": "main"})
-                    if article_tag:
-                        paragraphs = [p.get_text(strip=True) for p in article_tag.find_all("p")]
-                        full_content = "\n".join(paragraphs).strip()
-                    else:
-                        full_content = entry.get("summary", "")
-
-                    article_data = {
-                        "source_type": "substack",
-                        "source_url": url,
-                        "title": title,
-                        "content": full_content,
-                        "link": link,
-                        "published_date": published
-                    }
-
-                    new_articles.append(article_data)
-                    logger.debug(f"Added new post: {title}")
+                    to_fetch.append((entry.link, url, published, entry))
+                    if published:
+                        stored_dates.add(published)
 
                 except Exception as e:
                     err_msg = f"Error processing entry {entry.get('link')}: {e}"
                     logger.error(err_msg)
                     errors.append(err_msg)
 
+            new_articles, fetch_errors = _fetch_entries(_fetch_substack_post, to_fetch)
+            errors.extend(fetch_errors)
+            for article_data in new_articles:
+                logger.debug(f"Added new post: {article_data['title']}")
+
             # Insert new articles to DB
             if new_articles:
-                insert_posts(new_articles, cursor=cursor, conn=conn)
-                conn.commit()
-                logger.info(f"✓ Inserted {len(new_articles)} new articles to DB")
+                if persist:
+                    insert_posts(new_articles)
+                    logger.info(f"✓ Inserted {len(new_articles)} new articles to DB")
+                else:
+                    pending.extend(new_articles)
                 total_new += len(new_articles)
 
+            validators = _feed_validators(url, feed, days_back) if len(errors) == errors_before else None
+            if validators:
+                if persist:
+                    store_feed_validators(*validators)
+                else:
+                    feed_validators.append(validators)
+
             # Combine existing + new
             all_results.extend(existing_articles + new_articles)
 
@@ -241,10 +457,6 @@ def scrape_substack_research(urls: List[str] = None,
             logger.error(err_msg)
             errors.append(err_msg)
 
-    # Close connection at the very end
-    cursor.close()
-    conn.close()
-
     logger.info(f"Scraping complete. New: {total_new}, Cached: {total_cached}, Total: {len(all_results)}")
     log_scraping_metrics(", ".join(urls), [a for a in all_results if a.get('is_new')], errors)
 
@@ -252,14 +464,21 @@ def scrape_substack_research(urls: List[str] = None,
         "results": all_results,
         "new_count": total_new,
         "cached_count": total_cached,
-        "errors": errors
+        "errors": errors,
+        "pending": pending,
+        "feed_validators": feed_validators
     }
 
 
 
 @log_performance
-def scrape_twitter(handle: str, days_back: int = 7) -> Dict[str, Any]:
-    """Scrape tweets from a public Twitter handle and save to database."""
+def scrape_twitter(handle: str, days_back: int = 7, persist: bool = True) -> Dict[str, Any]:
+    """
+    Scrape tweets from a public Twitter handle and save to database.
+    
+    With persist=False nothing is inserted; new tweets are returned under
+    "pending" so the caller can bulk-load them (see bulk_copy_posts).
+    """
     logger = get_logger("scraper")
     
     # Clean handle and construct source URL
@@ -291,7 +510,7 @@ def scrape_twitter(handle: str, days_back: int = 7) -> Dict[str, Any]:
 
     try:
         logger.debug("Making API request to Twitter")
-        response = requests.get(url, headers=headers, params=params)
+        response = get_http_session().get(url, headers=headers, params=params)
 
         # Handle rate limit
         if response.status_code == 429:
@@ -299,15 +518,14 @@ def scrape_twitter(handle: str, days_back: int = 7) -> Dict[str, Any]:
             wait_seconds = max(reset_time - int(time.time()), 1)
             logger.warning(f"Rate limit hit. Waiting {wait_seconds} seconds...")
             time.sleep(wait_seconds)
-            response = requests.get(url, headers=headers, params=params)
+            response = get_http_session().get(url, headers=headers, params=params)
 
         response.raise_for_status()
         tweets_data = response.json().get("data", [])
         logger.info(f"Received {len(tweets_data)} tweets from API")
 
-        # Open DB connection once
-        conn = connect_postgres()
-        cursor = conn.cursor()
+        # Stored dates are naive UTC (TIMESTAMP column)
+        stored_dates = _stored_dates(existing_tweets)
 
         for tweet in tweets_data:
             try:
@@ -318,10 +536,11 @@ def scrape_twitter(handle: str, days_back: int = 7) -> Dict[str, Any]:
 
                 clean_text = re.sub(r"http\S+", "", tweet["text"]).strip()
 
-                # Check only source + timestamp using existing cursor
-                if article_exists(cursor, source_url, tweet_date):
+                # Check only source + timestamp
+                if tweet_date.replace(tzinfo=None) in stored_dates:
                     logger.debug("Tweet already in DB, skipping")
                     continue
+                stored_dates.add(tweet_date.replace(tzinfo=None))
 
                 new_tweets.append({
                     "source_type": "twitter",
@@ -338,13 +557,10 @@ def scrape_twitter(handle: str, days_back: int = 7) -> Dict[str, Any]:
                 errors.append(error_msg)
 
         # Insert all new tweets in one go
-        if new_tweets:
-            insert_posts(new_tweets, cursor=cursor, conn=conn)  # Pass cursor/conn to reuse
+        if new_tweets and persist:
+            insert_posts(new_tweets)
             logger.info(f"✓ Inserted {len(new_tweets)} new tweets to DB")
 
-        cursor.close()
-        conn.close()
-
     except requests.RequestException as e:
         error_msg = f"Error fetching tweets: {e}"
         logger.error(error_msg)
@@ -358,7 +574,8 @@ def scrape_twitter(handle: str, days_back: int = 7) -> Dict[str, Any]:
         "new_count": len(new_tweets),
         "cached_count": len(existing_tweets),
         "from_cache": False,
-        "errors": errors
+        "errors": errors,
+        "pending": [] if persist else new_tweets
     }
 
 @log_performance
@@ -1,19 +1,140 @@
-import os
-from openai import AzureOpenAI
-from langfuse import observe, Langfuse
+import asyncio
+import io
+import orjson
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langfuse import observe
 from utils.logger import get_logger, log_performance, log_summary_metrics
-from typing import List, Dict, Any
+from utils.disk_cache import disk_cached
+from src.llm_call import achat_completion, chat_completion, squash_whitespace, truncate_tokens
+from src.llm_client import get_async_client, get_client, get_prompt, get_small_deployment
+from src.clustering import cluster_cache_key
+from typing import List, Dict, Any, Tuple
 
-# Initialize clients
-from langfuse.openai import openai
+SYSTEM_PROMPT = "You are an expert AI trend analyst. Provide clear, concise summaries."
 
-client = openai.AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION")
+# Per-article content budget (tokens) in the cluster summary prompt
+CLUSTER_CONTENT_TOKENS = 150
+
+# Concurrent cluster summaries in flight at once (bounded by Azure TPM quotas)
+SUMMARY_CONCURRENCY = 4
+
+# Batch API settings (mode="batch"): results arrive within the completion
+# window at roughly half the online token price
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 30  # seconds
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Bump to invalidate cached cluster summaries when the summary prompt changes
+CLUSTER_SUMMARY_CACHE_VERSION = 1
+
+# Fallback summaries are never cached, so the next run retries the LLM
+FAILED_SUMMARIES = (
+    "Summary generation failed.",
+    "Summary not available due to content policy restrictions.",
 )
-langfuse = Langfuse()
 
+
+def _cluster_cache_key(cluster: Dict[str, Any], cluster_index: int = 0) -> List[Any]:
+    return cluster_cache_key(cluster, cluster_index, CLUSTER_SUMMARY_CACHE_VERSION)
+
+
+def _is_cacheable(cluster_summary: Dict[str, Any]) -> bool:
+    return cluster_summary.get('summary') not in FAILED_SUMMARIES
+
+
+def _prepare_cluster(cluster: Dict[str, Any], cluster_index: int) -> Tuple[str, str, List[str]]:
+    """
+    Build the summary prompt for a cluster.
+    
+    Args:
+        cluster: Single cluster dictionary from clustering.py
+        cluster_index: Index of the cluster (for naming/logging)
+        
+    Returns:
+        (topic_name, prompt, sources)
+    """
+    logger = get_logger("summarizer")
+    topic_name = cluster.get('topic_name', f'Topic {cluster_index+1}')
+    
+    # Prepare content from cluster articles
+    articles_text = []
+    sources = {}  # insertion-ordered set: sources in article order
+    
+    for article in cluster.get('articles', []):
+        get = article.get
+        # Only the first 10 articles with content go into the prompt
+        if len(articles_text) < 10 and get('content'):
+            articles_text.append(f"Title: {get('title', 'No title')}\nContent: {truncate_tokens(squash_whitespace(article['content']), CLUSTER_CONTENT_TOKENS)}")
+        # Prefer 'link' over 'source_url' when available
+        source = get('link') or get('source_url')
+        if source:
+            sources[source] = None
+    
+    combined_text = "\n\n".join(articles_text)
+    
+    # Get prompt from Langfuse with fallback
+    try:
+        prompt_template = get_prompt("trendmind-cluster-summary-prompt")
+        prompt = prompt_template.compile(
+            topic_name=topic_name,
+            combined_text=combined_text[:8000]
+        )
+        logger.debug(f"Using Langfuse cluster summary prompt version: {prompt_template.version}")
+    except Exception as e:
+        logger.warning(f"Failed to fetch Langfuse cluster summary prompt, using fallback: {e}")
+        # Fallback to hardcoded prompt
+        prompt = f"""
+        Analyze the following articles about "{topic_name}" and provide a concise summary in bullet points.
+        
+        Articles:
+        {combined_text[:8000]}
+        
+        Format your response as 3-4 bullet points that highlight:
+        • Main themes and developments
+        • Key insights or findings  
+        • Important trends or implications
+        • Notable companies, products, or technologies mentioned
+        
+        Use clear, informative bullet points that capture the essence of these articles.
+        """
+    
+    return topic_name, prompt, list(sources)
+
+
+def _summary_request(prompt: str) -> Dict[str, Any]:
+    """Chat completion arguments for a cluster summary prompt."""
+    return {
+        'model': get_small_deployment(),
+        'messages': [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        'max_tokens': 800,
+        'temperature': 0.3
+    }
+
+
+def _failed_summary(cluster: Dict[str, Any], cluster_index: int, topic_name: str,
+                    sources: List[str], error: Exception) -> Dict[str, Any]:
+    """Cluster summary returned when the LLM call fails."""
+    logger = get_logger("summarizer")
+    logger.error(f"Error summarizing cluster {cluster_index+1}: {str(error)}")
+    # Check for Azure OpenAI content filter error
+    if "ResponsibleAIPolicyViolation" in str(error):
+        summary = "Summary not available due to content policy restrictions."
+    else:
+        summary = "Summary generation failed."
+    
+    return {
+        'topic_name': topic_name,
+        'article_count': len(cluster.get('articles', [])),
+        'summary': summary,
+        'sources': sources
+    }
+
+
+@disk_cached("cluster_summaries", _cluster_cache_key, _is_cacheable)
 @observe()
 @log_performance
 def summarize_single_cluster(cluster: Dict[str, Any], cluster_index: int) -> Dict[str, Any]:
@@ -30,109 +151,218 @@ def summarize_single_cluster(cluster: Dict[str, Any], cluster_index: int) -> Dic
     """
     logger = get_logger("summarizer")
     topic_name = cluster.get('topic_name', f'Topic {cluster_index+1}')
+    sources = []
     logger.info(f"Summarizing cluster {cluster_index+1}: {topic_name}")
     
     try:
-        # Prepare content from cluster articles
-        articles_text = []
-        sources = set()
-        
-        for article in cluster.get('articles', []):
-            if article.get('content'):
-                articles_text.append(f"Title: {article.get('title', 'No title')}\nContent: {article['content'][:500]}")
-            # Prefer 'link' over 'source_url' when available
-            source = article.get('link') or article.get('source_url')
-            if source:
-                sources.add(source)
-        
-        combined_text = "\n\n".join(articles_text[:10])  # Limit to 10 articles per cluster
-        
-        # Get prompt from Langfuse with fallback
-        try:
-            prompt_template = langfuse.get_prompt("trendmind-cluster-summary-prompt", label="latest")
-            prompt = prompt_template.compile(
-                topic_name=topic_name,
-                combined_text=combined_text[:8000]
-            )
-            logger.debug(f"Using Langfuse cluster summary prompt version: {prompt_template.version}")
-        except Exception as e:
-            logger.warning(f"Failed to fetch Langfuse cluster summary prompt, using fallback: {e}")
-            # Fallback to hardcoded prompt
-            prompt = f"""
-            Analyze the following articles about "{topic_name}" and provide a concise summary in bullet points.
-            
-            Articles:
-            {combined_text[:8000]}
-            
-            Format your response as 3-4 bullet points that highlight:
-            • Main themes and developments
-            • Key insights or findings  
-            • Important trends or implications
-            • Notable companies, products, or technologies mentioned
-            
-            Use clear, informative bullet points that capture the essence of these articles.
-            """
-        
-        response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-            messages=[
-                {"role": "system", "content": "You are an expert AI trend analyst. Provide clear, concise summaries."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=800,
-            temperature=0.3
-        )
+        topic_name, prompt, sources = _prepare_cluster(cluster, cluster_index)
+        
+        response = chat_completion(get_client(), **_summary_request(prompt))
         
         content = response.choices[0].message.content
         summary = content.strip() if content else "Summary not available"
         
-        cluster_summary = {
+        logger.info(f"Generated summary for cluster: {topic_name}")
+        return {
             'topic_name': topic_name,
             'article_count': len(cluster.get('articles', [])),
             'summary': summary,
-            'sources': list(sources)
+            'sources': sources
         }
         
-        logger.info(f"Generated summary for cluster: {topic_name}")
-        return cluster_summary
-        
     except Exception as e:
-        logger.error(f"Error summarizing cluster {cluster_index+1}: {str(e)}")
-        # Check for Azure OpenAI content filter error
-        if "ResponsibleAIPolicyViolation" in str(e):
-            summary = "Summary not available due to content policy restrictions."
-        else:
-            summary = "Summary generation failed."
+        return _failed_summary(cluster, cluster_index, topic_name, sources, e)
+
+
+@disk_cached("cluster_summaries", _cluster_cache_key, _is_cacheable)
+@observe()
+@log_performance
+async def asummarize_single_cluster(cluster: Dict[str, Any], cluster_index: int) -> Dict[str, Any]:
+    """
+    Async version of summarize_single_cluster using the async Azure OpenAI client.
+    
+    Args:
+        cluster: Single cluster dictionary from clustering.py
+        cluster_index: Index of the cluster (for naming/logging)
+        
+    Returns:
+        Dictionary with cluster summary
+    """
+    logger = get_logger("summarizer")
+    topic_name = cluster.get('topic_name', f'Topic {cluster_index+1}')
+    sources = []
+    logger.info(f"Summarizing cluster {cluster_index+1}: {topic_name}")
+    
+    try:
+        # The Langfuse prompt fetch is blocking, keep it off the event loop
+        topic_name, prompt, sources = await asyncio.to_thread(_prepare_cluster, cluster, cluster_index)
+        
+        response = await achat_completion(get_async_client(), **_summary_request(prompt))
         
+        content = response.choices[0].message.content
+        summary = content.strip() if content else "Summary not available"
+        
+        logger.info(f"Generated summary for cluster: {topic_name}")
         return {
             'topic_name': topic_name,
             'article_count': len(cluster.get('articles', [])),
             'summary': summary,
-            'sources': list(sources) if 'sources' in locals() else []
+            'sources': sources
         }
+        
+    except Exception as e:
+        return _failed_summary(cluster, cluster_index, topic_name, sources, e)
 
 
-@log_performance  # Remove @observe() from the parent function
-def summarize_clusters(clusters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+@log_performance
+async def asummarize_clusters(clusters: List[Dict[str, Any]],
+                              concurrency: int = SUMMARY_CONCURRENCY) -> List[Dict[str, Any]]:
     """
-    Generate summaries for each cluster of articles.
-    Each cluster gets its own Langfuse trace for individual evaluation.
+    Summarize all clusters concurrently, at most ``concurrency`` LLM calls at a time.
     
     Args:
         clusters: List of cluster dictionaries from clustering.py
+        concurrency: Maximum number of in-flight summary requests
         
     Returns:
-        List of cluster summaries with topic_name, summary, sources, etc.
+        List of cluster summaries, in the same order as ``clusters`` (so
+        cluster_articles' largest-first ordering is preserved)
     """
     logger = get_logger("summarizer")
-    logger.info(f"Summarizing {len(clusters)} clusters")
+    logger.info(f"Summarizing {len(clusters)} clusters (concurrency {concurrency})")
     
-    cluster_summaries = []
+    semaphore = asyncio.Semaphore(concurrency)
     
-    # Process each cluster with individual tracing
-    for i, cluster in enumerate(clusters):
-        cluster_summary = summarize_single_cluster(cluster, i)
-        cluster_summaries.append(cluster_summary)
+    async def bounded(cluster, i):
+        async with semaphore:
+            return await asummarize_single_cluster(cluster, i)
+    
+    cluster_summaries = await asyncio.gather(*(bounded(cluster, i) for i, cluster in enumerate(clusters)))
     
     logger.info(f"Completed summarization of {len(cluster_summaries)} clusters")
+    return list(cluster_summaries)
+
+
+@log_performance
+def submit_summary_batch(clusters: List[Dict[str, Any]]) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """
+    Submit one Batch API job containing a summary request per cluster.
+    
+    Args:
+        clusters: List of cluster dictionaries from clustering.py
+        
+    Returns:
+        (batch_id, [(topic_name, sources), ...]) - the per-cluster metadata is
+        needed to assemble the summaries once the batch completes
+    """
+    logger = get_logger("summarizer")
+    
+    lines = []
+    cluster_meta = []
+    for i, cluster in enumerate(clusters):
+        topic_name, prompt, sources = _prepare_cluster(cluster, i)
+        cluster_meta.append((topic_name, sources))
+        lines.append(orjson.dumps({
+            "custom_id": f"cluster-{i}",
+            "method": "POST",
+            "url": "/chat/completions",
+            "body": _summary_request(prompt)
+        }))
+    
+    batch_file = io.BytesIO(b"\n".join(lines))
+    batch_file.name = "cluster_summaries.jsonl"
+    uploaded = get_client().files.create(file=batch_file, purpose="batch")
+    batch = get_client().batches.create(
+        input_file_id=uploaded.id,
+        endpoint="/chat/completions",
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+    
+    logger.info(f"Submitted summary batch {batch.id} with {len(lines)} clusters")
+    return batch.id, cluster_meta
+
+
+@log_performance
+def collect_summary_batch(batch_id: str,
+                          clusters: List[Dict[str, Any]],
+                          cluster_meta: List[Tuple[str, List[str]]],
+                          poll_interval: float = BATCH_POLL_INTERVAL) -> List[Dict[str, Any]]:
+    """
+    Wait for a summary batch to finish and map its results back to clusters.
+    
+    Args:
+        batch_id: ID returned by submit_summary_batch
+        clusters: The clusters that were submitted, in the same order
+        cluster_meta: Metadata returned by submit_summary_batch
+        poll_interval: Seconds between status checks
+        
+    Returns:
+        List of cluster summaries, in the same order as ``clusters``
+    """
+    logger = get_logger("summarizer")
+    
+    batch = get_client().batches.retrieve(batch_id)
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        logger.debug(f"Summary batch {batch_id} status: {batch.status}")
+        time.sleep(poll_interval)
+        batch = get_client().batches.retrieve(batch_id)
+    
+    logger.info(f"Summary batch {batch_id} finished with status: {batch.status}")
+    
+    results = {}
+    if batch.output_file_id:
+        for line in get_client().files.content(batch.output_file_id).content.splitlines():
+            if line.strip():
+                item = orjson.loads(line)
+                results[item["custom_id"]] = item
+    
+    cluster_summaries = []
+    for i, (cluster, (topic_name, sources)) in enumerate(zip(clusters, cluster_meta)):
+        item = results.get(f"cluster-{i}")
+        response = (item or {}).get("response") or {}
+        if response.get("status_code") != 200:
+            error = (item or {}).get("error") or response.get("body") or f"batch {batch.status}"
+            cluster_summaries.append(_failed_summary(cluster, i, topic_name, sources, Exception(str(error))))
+            continue
+        
+        content = response["body"]["choices"][0]["message"].get("content")
+        cluster_summaries.append({
+            'topic_name': topic_name,
+            'article_count': len(cluster.get('articles', [])),
+            'summary': content.strip() if content else "Summary not available",
+            'sources': sources
+        })
+    
     return cluster_summaries
+
+
+@log_performance  # Remove @observe() from the parent function
+def summarize_clusters(clusters: List[Dict[str, Any]], mode: str = "online") -> List[Dict[str, Any]]:
+    """
+    Generate summaries for each cluster of articles.
+    Each cluster gets its own Langfuse trace for individual evaluation.
+    
+    In "online" mode clusters are summarized concurrently on a thread pool
+    of SUMMARY_CONCURRENCY sync calls; code that already runs an event loop
+    uses asummarize_clusters instead. "batch" mode submits all clusters as
+    one Batch API job and blocks until it completes - cheaper, for runs that
+    are not interactive.
+    
+    Args:
+        clusters: List of cluster dictionaries from clustering.py
+        mode: "online" or "batch"
+        
+    Returns:
+        List of cluster summaries with topic_name, summary, sources, etc.
+    """
+    if mode == "batch":
+        if not clusters:
+            return []
+        batch_id, cluster_meta = submit_summary_batch(clusters)
+        return collect_summary_batch(batch_id, clusters, cluster_meta)
+    if mode != "online":
+        raise ValueError(f"Unknown summarization mode: {mode}")
+    if not clusters:
+        return []
+    with ThreadPoolExecutor(max_workers=min(SUMMARY_CONCURRENCY, len(clusters))) as executor:
+        return list(executor.map(summarize_single_cluster, clusters, range(len(clusters))))
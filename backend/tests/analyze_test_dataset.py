@@ -8,28 +8,129 @@ Usage:
 """
 
 import json
+import mmap
 import sys
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson is optional for standalone use
+    orjson = None
 
-def calculate_evaluation_metrics(test_data):
-    """Calculate precision, recall, F1-score from test dataset."""
-    tp = fp = tn = fn = 0
-    labeled_cases = 0
+try:
+    import ijson
+except ImportError:  # ijson is optional; without it large files are parsed in memory
+    ijson = None
+
+# Datasets above this size are streamed case by case instead of parsed whole
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+
+def _ground_truth_code(label) -> int:
+    """int8 code of a ground truth label: -1 if not labeled yet, else 1/0 by truthiness."""
+    return -1 if label is None else int(bool(label))
+
+
+# Interpretation of the evaluation metrics: (metric, threshold, warning) printed
+# when the metric is below threshold, then the first F1 bucket the score exceeds
+METRIC_WARNINGS = (
+    ("precision", 0.7, "Low precision - many false positives (non-AI articles classified as AI)"),
+    ("recall", 0.7, "Low recall - missing many AI articles (false negatives)"),
+)
+F1_BUCKETS = (
+    (0.8, "Good overall performance (F1 > 0.8)"),
+    (0.6, "Moderate performance (F1 > 0.6)"),
+    (float("-inf"), "Poor performance (F1 ≤ 0.6) - needs improvement"),
+)
+
+JSON_ERRORS = (json.JSONDecodeError,) + ((ijson.JSONError,) if ijson is not None else ())
+
+
+def extract_labels(test_data):
+    """
+    Extract (ground_truth, predicted) int8 label arrays from a test dataset.
     
-    for case in test_data["test_cases"]:
-        ground_truth = case["ground_truth"]["is_ai_relevant"]
-        if ground_truth is None:
-            continue  # Skip unlabeled cases
-            
-        labeled_cases += 1
-        predicted = case["filtering_results"]["passed_ai_filter"]
-        
-        if predicted and ground_truth:       tp += 1
-        elif predicted and not ground_truth: fp += 1
-        elif not predicted and ground_truth: fn += 1
-        else:                               tn += 1
+    Ground truth is -1 for unlabeled cases. Parse once and reuse the arrays
+    across repeated confusion_counts calls (threshold sweeps, k-fold eval).
+    """
+    test_cases = test_data["test_cases"]
+    return _case_labels(test_cases, len(test_cases))
+
+
+def _case_labels(test_cases, count=-1):
+    """(ground_truth, predicted) int8 arrays of an iterable of cases; count is its length if known."""
+    import numpy as np  # deferred: importing the module stays cheap
+    
+    # One pass over the cases into an (N, 2) int8 array of (ground_truth, predicted);
+    # each nested field is looked up once and the label is encoded by _ground_truth_code
+    labels = np.fromiter(
+        ((_ground_truth_code(case["ground_truth"]["is_ai_relevant"]),
+          bool(case["filtering_results"]["passed_ai_filter"]))
+         for case in test_cases),
+        dtype=np.dtype((np.int8, 2)), count=count
+    ).reshape(-1, 2)
+    return np.ascontiguousarray(labels[:, 0]), np.ascontiguousarray(labels[:, 1])
+
+
+@lru_cache(maxsize=None)
+def _compiled_confusion_kernel():
+    """Import numba and JIT the confusion-count kernel on first use; None if numba is missing."""
+    try:
+        from numba import njit, prange
+    except ImportError:  # numba is optional; confusion_counts falls back to NumPy
+        return None
+    
+    @njit(parallel=True, cache=True)
+    def kernel(gt, pred):
+        tp = fp = tn = fn = 0
+        for i in prange(gt.shape[0]):
+            g = gt[i]
+            if g < 0:
+                continue
+            p = pred[i]
+            tp += p & g
+            fp += p & (1 - g)
+            fn += (1 - p) & g
+            tn += (1 - p) & (1 - g)
+        return tp, fp, tn, fn
+    
+    return kernel
+
+
+def confusion_counts(gt, pred):
+    """
+    Count (tp, fp, tn, fn) over labeled cases.
+    
+    Uses a Numba-compiled kernel when numba is installed (first call pays the
+    JIT warmup, cached on disk afterwards), NumPy boolean reductions otherwise.
+    """
+    kernel = _compiled_confusion_kernel()
+    if kernel is not None:
+        return tuple(int(c) for c in kernel(gt, pred))
     
+    gt_pos = gt == 1
+    gt_neg = gt == 0
+    pred_pos = pred == 1
+    
+    tp = int((pred_pos & gt_pos).sum())
+    fp = int((pred_pos & gt_neg).sum())
+    tn = int((~pred_pos & gt_neg).sum())
+    fn = int((~pred_pos & gt_pos).sum())
+    return tp, fp, tn, fn
+
+
+def calculate_evaluation_metrics(test_data):
+    """Calculate precision, recall, F1-score from test dataset."""
+    gt, pred = extract_labels(test_data)
+    tp, fp, tn, fn = confusion_counts(gt, pred)
+    return _metrics_from_counts(tp, fp, tn, fn, len(gt))
+
+
+def _metrics_from_counts(tp, fp, tn, fn, total_cases):
+    """Build the metrics report from confusion-matrix counts."""
+    labeled_cases = tp + fp + tn + fn
     if labeled_cases == 0:
         return {"error": "No ground truth labels found"}
     
@@ -53,9 +154,9 @@ def calculate_evaluation_metrics(test_data):
             "false_negatives": fn
         },
         "dataset_stats": {
-            "total_cases": len(test_data["test_cases"]),
+            "total_cases": total_cases,
             "labeled_cases": labeled_cases,
-            "unlabeled_cases": len(test_data["test_cases"]) - labeled_cases,
+            "unlabeled_cases": total_cases - labeled_cases,
             "ground_truth_ai_relevant": tp + fn,
             "ground_truth_not_ai_relevant": fp + tn,
             "predicted_ai_relevant": tp + fp,
@@ -64,76 +165,117 @@ def calculate_evaluation_metrics(test_data):
     }
 
 
+def load_dataset(filepath):
+    """Load a test dataset, memory-mapping the file for orjson when it is available."""
+    if orjson is None:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    with open(filepath, 'rb') as f:
+        if Path(filepath).stat().st_size == 0:
+            return orjson.loads(b"")  # raises JSONDecodeError like json.load would
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def _count_test_cases(test_cases):
+    """
+    Single pass over the cases: labels are extracted as in extract_labels while
+    the sources are counted.
+    
+    Returns:
+        (total_cases, ai_relevant, labeled_cases, sources, (tp, fp, tn, fn))
+    """
+    sources = Counter()
+    
+    def counted(cases):
+        for case in cases:
+            sources[case["input"]["source_url"]] += 1
+            yield case
+    
+    gt, pred = _case_labels(counted(test_cases))
+    total_cases = len(gt)
+    ai_relevant = int(pred.sum())
+    labeled_cases = int((gt >= 0).sum())
+    return total_cases, ai_relevant, labeled_cases, sources, confusion_counts(gt, pred)
+
+
+def iter_test_cases(filepath):
+    """
+    Yield the test cases of a dataset.
+    
+    Files larger than STREAM_THRESHOLD_BYTES are streamed with ijson so peak
+    memory stays at one case; smaller files are loaded whole.
+    """
+    if ijson is not None and Path(filepath).stat().st_size > STREAM_THRESHOLD_BYTES:
+        with open(filepath, 'rb') as f:
+            yield from ijson.items(f, 'test_cases.item')
+    else:
+        yield from load_dataset(filepath)["test_cases"]
+
+
 def analyze_dataset(filepath):
     """Analyze test dataset and print statistics."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            dataset = json.load(f)
+        counts = _count_test_cases(iter_test_cases(filepath))
     except FileNotFoundError:
         print(f"Error: File '{filepath}' not found.")
         return
-    except json.JSONDecodeError as e:
+    except JSON_ERRORS as e:
         print(f"Error: Invalid JSON in '{filepath}': {e}")
         return
     
-    total_cases = len(dataset["test_cases"])
-    ai_relevant = sum(1 for tc in dataset["test_cases"] if tc["filtering_results"]["passed_ai_filter"])
-    labeled_cases = sum(1 for tc in dataset["test_cases"] if tc["ground_truth"]["is_ai_relevant"] is not None)
+    total_cases, ai_relevant, labeled_cases, sources, (tp, fp, tn, fn) = counts
     
-    # Source distribution
-    sources = {}
-    for tc in dataset["test_cases"]:
-        source = tc["input"]["source_url"]
-        sources[source] = sources.get(source, 0) + 1
+    # Build the whole report and emit it with a single write
+    lines = []
+    out = lines.append
     
-    print(f"\n=== Test Dataset Analysis: {Path(filepath).name} ===")
-    print(f"Total articles: {total_cases}")
-    print(f"Labeled articles: {labeled_cases} ({labeled_cases/total_cases*100:.1f}%)")
-    print(f"AI-relevant (predicted): {ai_relevant} ({ai_relevant/total_cases*100:.1f}%)")
-    print(f"Not AI-relevant (predicted): {total_cases - ai_relevant} ({(total_cases - ai_relevant)/total_cases*100:.1f}%)")
+    out(f"\n=== Test Dataset Analysis: {Path(filepath).name} ===")
+    out(f"Total articles: {total_cases}")
+    out(f"Labeled articles: {labeled_cases} ({labeled_cases/total_cases*100:.1f}%)")
+    out(f"AI-relevant (predicted): {ai_relevant} ({ai_relevant/total_cases*100:.1f}%)")
+    out(f"Not AI-relevant (predicted): {total_cases - ai_relevant} ({(total_cases - ai_relevant)/total_cases*100:.1f}%)")
     
-    print(f"\nSource distribution:")
-    for source, count in sorted(sources.items(), key=lambda x: x[1], reverse=True):
+    out(f"\nSource distribution:")
+    for source, count in sources.most_common():
         source_short = source if len(source) <= 50 else source[:47] + "..."
-        print(f"  {source_short}: {count} articles ({count/total_cases*100:.1f}%)")
+        out(f"  {source_short}: {count} articles ({count/total_cases*100:.1f}%)")
     
     # Calculate evaluation metrics if we have labeled data
     if labeled_cases > 0:
-        print(f"\n=== Evaluation Metrics ===")
-        metrics = calculate_evaluation_metrics(dataset)
+        out(f"\n=== Evaluation Metrics ===")
+        metrics = _metrics_from_counts(tp, fp, tn, fn, total_cases)
         if "error" not in metrics:
             eval_metrics = metrics["evaluation_metrics"]
             confusion = metrics["confusion_matrix"]
             stats = metrics["dataset_stats"]
             
-            print(f"Precision: {eval_metrics['precision']:.3f} ({confusion['true_positives']}/{confusion['true_positives'] + confusion['false_positives']}) - Of predicted AI articles, how many were correct?")
-            print(f"Recall: {eval_metrics['recall']:.3f} ({confusion['true_positives']}/{confusion['true_positives'] + confusion['false_negatives']}) - Of actual AI articles, how many were found?")
-            print(f"F1-Score: {eval_metrics['f1_score']:.3f} - Balanced measure of precision and recall")
-            print(f"Accuracy: {eval_metrics['accuracy']:.3f} - Overall correctness")
+            out(f"Precision: {eval_metrics['precision']:.3f} ({confusion['true_positives']}/{confusion['true_positives'] + confusion['false_positives']}) - Of predicted AI articles, how many were correct?")
+            out(f"Recall: {eval_metrics['recall']:.3f} ({confusion['true_positives']}/{confusion['true_positives'] + confusion['false_negatives']}) - Of actual AI articles, how many were found?")
+            out(f"F1-Score: {eval_metrics['f1_score']:.3f} - Balanced measure of precision and recall")
+            out(f"Accuracy: {eval_metrics['accuracy']:.3f} - Overall correctness")
             
-            print(f"\nConfusion Matrix:")
-            print(f"                    Predicted")
-            print(f"                 AI    Not-AI")
-            print(f"Actual    AI    {confusion['true_positives']:3d}     {confusion['false_negatives']:3d}")
-            print(f"       Not-AI    {confusion['false_positives']:3d}     {confusion['true_negatives']:3d}")
+            out(f"\nConfusion Matrix:")
+            out(f"                    Predicted")
+            out(f"                 AI    Not-AI")
+            out(f"Actual    AI    {confusion['true_positives']:3d}     {confusion['false_negatives']:3d}")
+            out(f"       Not-AI    {confusion['false_positives']:3d}     {confusion['true_negatives']:3d}")
             
-            print(f"\nInterpretation:")
-            if eval_metrics['precision'] < 0.7:
-                print("Low precision - many false positives (non-AI articles classified as AI)")
-            if eval_metrics['recall'] < 0.7:
-                print("Low recall - missing many AI articles (false negatives)")
-            if eval_metrics['f1_score'] > 0.8:
-                print("Good overall performance (F1 > 0.8)")
-            elif eval_metrics['f1_score'] > 0.6:
-                print("Moderate performance (F1 > 0.6)")
-            else:
-                print("Poor performance (F1 ≤ 0.6) - needs improvement")
+            out(f"\nInterpretation:")
+            for metric, threshold, warning in METRIC_WARNINGS:
+                if eval_metrics[metric] < threshold:
+                    out(warning)
+            out(next(msg for threshold, msg in F1_BUCKETS if eval_metrics['f1_score'] > threshold))
                 
         else:
-            print("Cannot calculate metrics: No ground truth labels found")
+            out("Cannot calculate metrics: No ground truth labels found")
     else:
-        print(f"\nTo get evaluation metrics, manually label some articles by setting:")
-        print(f"   'is_ai_relevant': true/false in the 'ground_truth' section")
+        out(f"\nTo get evaluation metrics, manually label some articles by setting:")
+        out(f"   'is_ai_relevant': true/false in the 'ground_truth' section")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
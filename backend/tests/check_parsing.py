@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Standalone checks for the LLM reply parsing and article grouping helpers.
+
+No network, database or API keys are needed. Run from the backend directory:
+    python tests/check_parsing.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm_call import JSON_TRAILING_CHUNKS, _JsonObjectEnd, _JsonStreamReader
+from src.clustering import _assemble_llm_clusters
+from src.dedup import MinHash, near_duplicate_groups
+
+
+def _chunk(text):
+    """A streamed chat completion chunk carrying text."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+def check_json_object_end():
+    # Braces and escaped quotes inside strings don't close the object
+    reply = '{"topic": "a } in \\"quotes\\" {", "ids": [1, 2]}  \n\n'
+    end = _JsonObjectEnd().feed(reply)
+    assert reply[:end] == '{"topic": "a } in \\"quotes\\" {", "ids": [1, 2]}', reply[:end]
+
+    # The object may close in a later chunk; the index is into that chunk
+    detector = _JsonObjectEnd()
+    assert detector.feed('{"s": "\\') == -1
+    assert detector.feed('"}"') == -1
+    assert detector.feed('}   ') == 1
+    print("✓ _JsonObjectEnd")
+
+
+def check_trailing_whitespace_reply():
+    # A reply that trails off into whitespace is cut shortly after the object closes
+    chunks = [_chunk('{"relevant_ids"'), _chunk(': [0, 3]}'), _chunk("")] + [_chunk("\n ")] * 1000
+    reader = _JsonStreamReader(want_usage=True)
+    consumed = 0
+    for chunk in chunks:
+        consumed += 1
+        if reader.feed(chunk):
+            break
+    assert reader.text() == '{"relevant_ids": [0, 3]}', reader.text()
+    assert consumed == 2 + JSON_TRAILING_CHUNKS, consumed
+
+    # Without a usage chunk to wait for, reading stops at the closing brace
+    reader = _JsonStreamReader(want_usage=False)
+    assert not reader.feed(_chunk('{"a": 1'))
+    assert reader.feed(_chunk('}\n'))
+    assert reader.text() == '{"a": 1}'
+    print("✓ _JsonStreamReader")
+
+
+def check_assemble_llm_clusters():
+    articles = [{"title": f"Article {i}"} for i in range(5)]
+    clusters = _assemble_llm_clusters([
+        # Repeated, out-of-range and non-integer ids are dropped
+        {"n": "Models", "d": "New models", "ids": [0, 0, 1, 7, -1, "2"]},
+        # An article listed by an earlier cluster stays there
+        {"topic_name": "Chips", "article_ids": [1, 2]},
+        # A cluster left without valid ids is skipped
+        {"n": "Empty", "ids": [0, 99]},
+    ], articles)
+
+    assert [c["topic_name"] for c in clusters] == ["Models", "Other AI Topics", "Chips"], clusters
+    assert [a["title"] for a in clusters[0]["articles"]] == ["Article 0", "Article 1"]
+    assert clusters[0]["description"] == "New models"
+    assert [a["title"] for a in clusters[1]["articles"]] == ["Article 3", "Article 4"]
+    assert [a["title"] for a in clusters[2]["articles"]] == ["Article 2"]
+    assert sum(c["article_count"] for c in clusters) == len(articles)
+    print("✓ _assemble_llm_clusters")
+
+
+def check_near_duplicate_groups():
+    story = "OpenAI released a new reasoning model today that beats previous benchmarks on math and code tasks"
+    articles = [
+        {"title": "New reasoning model", "content": story},
+        {"title": "Chip export rules", "content": "The commerce department announced new export rules for GPUs"},
+        {"title": "New reasoning model", "content": story + " (updated)"},
+    ]
+    groups = near_duplicate_groups(articles)
+    if MinHash is None:
+        assert groups == [[0], [1], [2]], groups
+        print("✓ near_duplicate_groups (datasketch not installed, no grouping)")
+        return
+
+    # The longer syndicated copy represents the group; groups keep first-appearance order
+    assert groups == [[2, 0], [1]], groups
+    assert near_duplicate_groups(articles[:1]) == [[0]]
+    print("✓ near_duplicate_groups")
+
+
+def main():
+    check_json_object_end()
+    check_trailing_whitespace_reply()
+    check_assemble_llm_clusters()
+    check_near_duplicate_groups()
+    print("\nAll parsing checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -92,7 +92,7 @@ if __name__ == "__main__":
         # Run clustering and summarization
         clusters = cluster_articles(articles)
         summaries = [summarize_cluster(c) for c in clusters]
-        overview = generate_final_overview(summaries)
+        overview = "".join(generate_final_overview(summaries))
 
         print(overview)
         logger.info("LLM clustering and summarization completed successfully.")
@@ -0,0 +1,102 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from utils.logger import get_logger
+
+# One JSON file per entry under <CACHE_DIR>/<namespace>/<key>.json
+CACHE_DIR = Path(os.getenv("TRENDMIND_CACHE_DIR", str(Path.home() / ".cache" / "trendmind")))
+
+
+def content_hash(value: Any) -> str:
+    """
+    SHA-256 of a JSON-serializable value, stable across runs.
+
+    Args:
+        value: Value to hash (dict keys are sorted, unknown types use str())
+
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_load(namespace: str, key: str) -> Optional[Any]:
+    """Return the cached value for key, or None if absent or unreadable."""
+    path = CACHE_DIR / namespace / f"{key}.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_store(namespace: str, key: str, value: Any) -> None:
+    """Write value for key; failures are logged and otherwise ignored."""
+    directory = CACHE_DIR / namespace
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = directory / f"{key}.json.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, directory / f"{key}.json")
+    except OSError as e:
+        get_logger("disk_cache").warning(f"Failed to write cache entry {namespace}/{key}: {str(e)}")
+
+
+def disk_cached(namespace: str,
+                key_fn: Callable[..., Any],
+                cacheable: Callable[[Any], bool] = lambda result: True):
+    """
+    Decorator caching a function's JSON-serializable result on disk.
+
+    The cache key is content_hash(key_fn(*args, **kwargs)), so entries are
+    invalidated by changing the inputs rather than by expiry. Works for plain
+    and async functions.
+
+    Args:
+        namespace: Cache subdirectory for this function
+        key_fn: Maps the call arguments to the value identifying the result
+        cacheable: Results for which this returns False are not stored (e.g. fallbacks)
+
+    Returns:
+        Decorator
+    """
+    def decorator(func):
+        logger = get_logger("disk_cache")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = content_hash(key_fn(*args, **kwargs))
+                cached = cache_load(namespace, key)
+                if cached is not None:
+                    logger.debug(f"Cache hit for {func.__name__} ({namespace}/{key[:12]})")
+                    return cached
+                result = await func(*args, **kwargs)
+                if cacheable(result):
+                    cache_store(namespace, key, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = content_hash(key_fn(*args, **kwargs))
+            cached = cache_load(namespace, key)
+            if cached is not None:
+                logger.debug(f"Cache hit for {func.__name__} ({namespace}/{key[:12]})")
+                return cached
+            result = func(*args, **kwargs)
+            if cacheable(result):
+                cache_store(namespace, key, result)
+            return result
+
+        return wrapper
+
+    return decorator
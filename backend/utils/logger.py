@@ -141,8 +141,35 @@ def log_performance(func):
         Wrapped function with performance logging
     """
     import functools
+    import inspect
     import time
     
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            logger = get_logger(func.__module__)
+            start_time = time.time()
+            
+            logger.debug(f"Starting {func.__name__} with args: {args[:2]}{'...' if len(args) > 2 else ''}")
+            
+            try:
+                result = await func(*args, **kwargs)
+                execution_time = time.time() - start_time
+                
+                logger.info(f"{func.__name__} completed successfully in {execution_time:.2f}s")
+                
+                if isinstance(result, list):
+                    logger.debug(f"{func.__name__} returned {len(result)} items")
+                    
+                return result
+                
+            except Exception as e:
+                execution_time = time.time() - start_time
+                logger.error(f"{func.__name__} failed after {execution_time:.2f}s: {str(e)}")
+                raise
+                
+        return async_wrapper
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         logger = get_logger(func.__module__)
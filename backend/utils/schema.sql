@@ -15,9 +15,28 @@ CREATE TABLE IF NOT EXISTS articles (
     CONSTRAINT unique_article UNIQUE(source_url, published_date)
 );
 
--- Index for fast lookups by source and date range
-CREATE INDEX IF NOT EXISTS idx_source_date 
-ON articles(source_url, published_date DESC);
+-- One-time cleanup for rows stored before source_url was stripped on insert:
+-- lookups compare source_url directly so they can use unique_article.
+-- A row whose trimmed key already exists is a duplicate and is removed.
+DELETE FROM articles a
+USING articles b
+WHERE a.source_url <> TRIM(a.source_url)
+AND TRIM(b.source_url) = TRIM(a.source_url)
+AND b.published_date = a.published_date
+AND (b.source_url = TRIM(b.source_url) OR b.id < a.id);
+
+UPDATE articles SET source_url = TRIM(source_url)
+WHERE source_url <> TRIM(source_url);
+
+-- Lookups by source and date range (ORDER BY published_date DESC included)
+-- use unique_article, scanned backwards; a separate (source_url,
+-- published_date DESC) index only duplicated it and slowed down inserts
+DROP INDEX IF EXISTS idx_source_date;
+
+-- Date-window scans across all sources (article counts per source, cleanup):
+-- index-only for the counts, which read just published_date and source_url
+CREATE INDEX IF NOT EXISTS idx_published_source 
+ON articles(published_date, source_url);
 
 -- Index for checking freshness of scraped data
 CREATE INDEX IF NOT EXISTS idx_scraped_date 
@@ -27,6 +46,17 @@ ON articles(scraped_date DESC);
 CREATE INDEX IF NOT EXISTS idx_source_type 
 ON articles(source_type);
 
+-- HTTP validators of each feed's last download, for conditional GETs
+-- (an unchanged feed answers 304 Not Modified instead of the whole feed)
+CREATE TABLE IF NOT EXISTS feed_cache (
+    source_url VARCHAR(500) PRIMARY KEY,
+    etag TEXT,
+    modified TEXT,                         -- Last-Modified header, as sent
+    days_back INTEGER,                     -- scrape window the download was processed for
+    checked_at TIMESTAMP DEFAULT NOW()
+);
+ALTER TABLE feed_cache ADD COLUMN IF NOT EXISTS days_back INTEGER;
+
 -- Optional: Add a table to track scraping stats/history
 CREATE TABLE IF NOT EXISTS scraping_logs (
     id SERIAL PRIMARY KEY,
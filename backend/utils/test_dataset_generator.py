@@ -5,7 +5,7 @@ from typing import List, Dict, Any
 from pathlib import Path
 import uuid
 
-from content_filter import filter_ai_relevant_articles, quick_ai_keyword_filter
+from src.content_filter import filter_ai_relevant_articles, quick_ai_keyword_filter
 from utils.logger import get_logger
 
 logger = get_logger("test_dataset")